@@ -101,7 +101,7 @@ class MCastManager(EmpowerApp):
             if not self.lvaps(block) or mode == TX_MCAST_DMS:
                 self.log.info("Block %s setting mcast address %s to %s",
                               block, self.mcast_addr, TX_MCAST[TX_MCAST_DMS])
-                txp.mcast = TX_MCAST_DMS
+                txp.update(mcast=TX_MCAST_DMS)
                 continue
 
             # legacy period
@@ -113,11 +113,10 @@ class MCastManager(EmpowerApp):
             # assign MCS
             self.info("Block %s setting mcast address %s to %s",
                       block, self.mcast_addr, TX_MCAST[TX_MCAST_DMS])
-            txp.mcast = TX_MCAST_LEGACY
             if mcs_type == BT_HT20:
-                txp.ht_mcs = [mcs]
+                txp.update(mcast=TX_MCAST_LEGACY, ht_mcs=[mcs])
             else:
-                txp.mcs = [mcs]
+                txp.update(mcast=TX_MCAST_LEGACY, mcs=[mcs])
 
     def to_dict(self):
         """ Return a JSON-serializable."""
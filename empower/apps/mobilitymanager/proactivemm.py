@@ -19,6 +19,9 @@
 
 from empower.core.app import EmpowerApp
 from empower.core.app import DEFAULT_PERIOD
+from empower.core.handover import HandoverEngine
+from empower.core.handover import DEFAULT_HYSTERESIS
+from empower.core.handover import DEFAULT_DWELL
 
 
 class ProactiveMobilityManager(EmpowerApp):
@@ -28,6 +31,9 @@ class ProactiveMobilityManager(EmpowerApp):
 
         tenant_id: tenant id
         every: loop period in ms (optional, default 5000ms)
+        hysteresis: min RSSI improvement in dB (optional, default 3dB)
+        dwell: min time between two handovers of an LVAP in s (optional,
+            default 10s)
 
     Example:
 
@@ -37,6 +43,8 @@ class ProactiveMobilityManager(EmpowerApp):
 
     def __init__(self, **kwargs):
 
+        self.__engine = HandoverEngine()
+
         super().__init__(**kwargs)
 
         # Register an wtp up event
@@ -49,14 +57,46 @@ class ProactiveMobilityManager(EmpowerApp):
         for block in wtp.supports:
             self.ucqm(block=block, every=self.every)
 
+    @property
+    def hysteresis(self):
+        """Return the handover hysteresis."""
+
+        return self.__engine.hysteresis
+
+    @hysteresis.setter
+    def hysteresis(self, value):
+        """Set the handover hysteresis."""
+
+        self.__engine.hysteresis = value
+
+    @property
+    def dwell(self):
+        """Return the handover dwell time."""
+
+        return self.__engine.dwell
+
+    @dwell.setter
+    def dwell(self, value):
+        """Set the handover dwell time."""
+
+        self.__engine.dwell = value
+
     def loop(self):
         """ Periodic job. """
 
-        for lvap in self.lvaps():
-            lvap.blocks = self.blocks().sortByRssi(lvap.addr).first()
+        lvaps = self.lvaps()
+
+        if not lvaps:
+            return
+
+        self.__engine.run(lvaps, self.blocks())
 
 
-def launch(tenant_id, every=DEFAULT_PERIOD):
+def launch(tenant_id, every=DEFAULT_PERIOD, hysteresis=DEFAULT_HYSTERESIS,
+           dwell=DEFAULT_DWELL):
     """ Initialize the module. """
 
-    return ProactiveMobilityManager(tenant_id=tenant_id, every=every)
+    return ProactiveMobilityManager(tenant_id=tenant_id,
+                                    every=every,
+                                    hysteresis=hysteresis,
+                                    dwell=dwell)
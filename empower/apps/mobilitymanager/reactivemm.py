@@ -19,6 +19,9 @@
 
 from empower.core.app import EmpowerApp
 from empower.core.app import DEFAULT_PERIOD
+from empower.core.handover import HandoverEngine
+from empower.core.handover import DEFAULT_HYSTERESIS
+from empower.core.handover import DEFAULT_DWELL
 
 
 DEFAULT_LIMIT = -30
@@ -32,6 +35,9 @@ class ReactiveMobilityManager(EmpowerApp):
         tenant_id: tenant id
         limit: handover limit in dBm (optional, default -80)
         every: loop period in ms (optional, default 5000ms)
+        hysteresis: min RSSI improvement in dB (optional, default 3dB)
+        dwell: min time between two handovers of an LVAP in s (optional,
+            default 10s)
 
     Example:
 
@@ -42,6 +48,7 @@ class ReactiveMobilityManager(EmpowerApp):
     def __init__(self, **kwargs):
 
         self.__limit = DEFAULT_LIMIT
+        self.__engine = HandoverEngine()
 
         super().__init__(**kwargs)
 
@@ -84,6 +91,30 @@ class ReactiveMobilityManager(EmpowerApp):
         self.log.info("Setting limit %u dB" % value)
         self.__limit = limit
 
+    @property
+    def hysteresis(self):
+        """Return the handover hysteresis."""
+
+        return self.__engine.hysteresis
+
+    @hysteresis.setter
+    def hysteresis(self, value):
+        """Set the handover hysteresis."""
+
+        self.__engine.hysteresis = value
+
+    @property
+    def dwell(self):
+        """Return the handover dwell time."""
+
+        return self.__engine.dwell
+
+    @dwell.setter
+    def dwell(self, value):
+        """Set the handover dwell time."""
+
+        self.__engine.dwell = value
+
     def low_rssi(self, trigger):
         """ Perform handover if an LVAP's rssi is
         going below the threshold. """
@@ -97,12 +128,15 @@ class ReactiveMobilityManager(EmpowerApp):
         if not lvap:
             return
 
-        lvap.blocks = self.blocks().sortByRssi(lvap.addr).first()
+        self.__engine.run([lvap], self.blocks())
 
 
-def launch(tenant_id, limit=DEFAULT_LIMIT, every=DEFAULT_PERIOD):
+def launch(tenant_id, limit=DEFAULT_LIMIT, every=DEFAULT_PERIOD,
+           hysteresis=DEFAULT_HYSTERESIS, dwell=DEFAULT_DWELL):
     """ Initialize the module. """
 
     return ReactiveMobilityManager(tenant_id=tenant_id,
                                    limit=limit,
-                                   every=every)
+                                   every=every,
+                                   hysteresis=hysteresis,
+                                   dwell=dwell)
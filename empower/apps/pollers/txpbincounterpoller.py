@@ -48,8 +48,7 @@ class TXPBinCounterPoller(EmpowerApp):
         for block in wtp.supports:
 
             tx_policy = block.tx_policies[EtherAddress("ff:ff:ff:ff:ff:ff")]
-            tx_policy.mcast = TX_MCAST_LEGACY
-            tx_policy.mcs = [6]
+            tx_policy.update(mcast=TX_MCAST_LEGACY, mcs=[6])
 
             self.txp_bin_counter(block=block,
                                  mcast="ff:ff:ff:ff:ff:ff",
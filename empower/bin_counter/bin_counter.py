@@ -31,6 +31,8 @@ from construct import Array
 from empower.datatypes.etheraddress import EtherAddress
 from empower.lvapp.lvappserver import ModuleLVAPPWorker
 from empower.core.module import ModulePeriodic
+from empower.core.bins import fill_samples
+from empower.core.bins import rates
 from empower.core.app import EmpowerApp
 from empower.lvapp import PT_VERSION
 
@@ -106,11 +108,9 @@ class BinCounter(ModulePeriodic):
 
         self.last = None
 
-    def __eq__(self, other):
+    def poll_key(self):
 
-        return super().__eq__(other) and \
-            self.lvap == other.lvap and \
-            self.bins == other.bins
+        return super().poll_key() + (self.lvap, tuple(self.bins))
 
     @property
     def lvap(self):
@@ -150,6 +150,14 @@ class BinCounter(ModulePeriodic):
 
         self._bins = bins
 
+    def sample(self):
+        """Return the current throughput (see Module.sample())."""
+
+        if self.last is None:
+            return None
+
+        return self.tx_bytes_per_second + self.rx_bytes_per_second
+
     def to_dict(self):
         """ Return a JSON-serializable dictionary representing the Stats """
 
@@ -203,71 +211,22 @@ class BinCounter(ModulePeriodic):
 
         msg = STATS_REQUEST.build(stats_req)
         lvap.wtp.connection.stream.write(msg)
+        self.request_sent(lvap.wtp.addr)
 
     def fill_bytes_samples(self, data):
-        """ Compute samples.
-
-        Samples are in the following format (after ordering):
-
-        [[60, 3], [66, 2], [74, 1], [98, 40], [167, 2], [209, 2], [1466, 1762]]
-
-        Each 2-tuple has format [ size, count ] where count is the number of
-        size-long (bytes, including the Ethernet 2 header) TX/RX by the LVAP.
+        """ Compute the bytes in each bin (see fill_samples). """
 
-        """
-
-        samples = sorted(data, key=lambda entry: entry[0])
-        out = [0] * len(self.bins)
-
-        for entry in samples:
-            if len(entry) == 0:
-                continue
-            size = entry[0]
-            count = entry[1]
-            for i in range(0, len(self.bins)):
-                if size <= self.bins[i]:
-                    out[i] = out[i] + size * count
-                    break
-
-        return out
+        return fill_samples(self.bins, data)[0]
 
     def fill_packets_samples(self, data):
-        """ Compute samples.
+        """ Compute the packets in each bin (see fill_samples). """
 
-        Samples are in the following format (after ordering):
-
-        [[60, 3], [66, 2], [74, 1], [98, 40], [167, 2], [209, 2], [1466, 1762]]
-
-        Each 2-tuple has format [ size, count ] where count is the number of
-        size-long (bytes, including the Ethernet 2 header) TX/RX by the LVAP.
-
-        """
-
-        samples = sorted(data, key=lambda entry: entry[0])
-        out = [0] * len(self.bins)
-
-        for entry in samples:
-            if len(entry) == 0:
-                continue
-            size = entry[0]
-            count = entry[1]
-            for i in range(0, len(self.bins)):
-                if size <= self.bins[i]:
-                    out[i] = out[i] + count
-                    break
-
-        return out
+        return fill_samples(self.bins, data)[1]
 
     def update_stats(self, delta, last, current):
         """Update stats."""
 
-        stats = []
-
-        for i in range(0, len(last)):
-            diff = current[i] - last[i]
-            stats.append(diff / delta)
-
-        return stats
+        return rates(delta, last, current)
 
     def handle_response(self, response):
         """Handle an incoming STATS_RESPONSE message.
@@ -287,22 +246,19 @@ class BinCounter(ModulePeriodic):
         old_tx_packets = self.tx_packets
         old_rx_packets = self.rx_packets
 
-        self.tx_bytes = self.fill_bytes_samples(tx_samples)
-        self.rx_bytes = self.fill_bytes_samples(rx_samples)
-
-        self.tx_packets = self.fill_packets_samples(tx_samples)
-        self.rx_packets = self.fill_packets_samples(rx_samples)
+        self.tx_bytes, self.tx_packets = fill_samples(self.bins, tx_samples)
+        self.rx_bytes, self.rx_packets = fill_samples(self.bins, rx_samples)
 
         if self.last:
             delta = time.time() - self.last
             self.tx_bytes_per_second = \
-                self.update_stats(delta, old_tx_bytes, self.tx_bytes)
+                rates(delta, old_tx_bytes, self.tx_bytes)
             self.rx_bytes_per_second = \
-                self.update_stats(delta, old_rx_bytes, self.rx_bytes)
+                rates(delta, old_rx_bytes, self.rx_bytes)
             self.tx_packets_per_second = \
-                self.update_stats(delta, old_tx_packets, self.tx_packets)
+                rates(delta, old_tx_packets, self.tx_packets)
             self.rx_packets_per_second = \
-                self.update_stats(delta, old_rx_packets, self.rx_packets)
+                rates(delta, old_rx_packets, self.rx_packets)
 
         self.last = time.time()
 
@@ -19,11 +19,11 @@
 
 import time
 import uuid
-import tornado.ioloop
 import empower.logger
 
 from empower.core.lvnf import LVNF
 from empower.core.resourcepool import ResourcePool
+from empower.core.timerwheel import TIMER_WHEEL
 
 from empower.main import RUNTIME
 
@@ -74,9 +74,9 @@ class EmpowerApp:
     def start(self):
         """Start control loop."""
 
-        self.worker = \
-            tornado.ioloop.PeriodicCallback(self.loop, self.every)
-        self.worker.start()
+        key = "%s-%s" % (self.app_name, self.tenant_id)
+
+        self.worker = TIMER_WHEEL.add_timer(self.loop, self.every, key)
 
     def stop(self):
         """Stop control loop."""
@@ -130,12 +130,13 @@ class EmpowerApp:
         if self.tenant_id not in RUNTIME.tenants:
             return None
 
-        lvaps = RUNTIME.tenants[self.tenant_id].lvaps.values()
+        lvaps = RUNTIME.tenants[self.tenant_id].lvaps
 
         if not block:
-            return lvaps
+            return lvaps.values()
 
-        return [x for x in lvaps if x.blocks[0] == block]
+        return [x for x in RUNTIME.hosted_lvaps(block.radio)
+                if x.addr in lvaps and x.blocks[0] == block]
 
     def lvap(self, addr):
         """Return a particular LVAP in this tenant."""
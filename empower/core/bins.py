@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2016 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""EmPOWER shared binning kernel.
+
+The bin counters receive the traffic as a list of [size, count] samples,
+where count is the number of size-long frames (in bytes, including the
+Ethernet header). The samples are classified into bins: a frame falls in
+the first bin whose upper bound is larger than or equal to its size,
+frames larger than the last bin are discarded.
+"""
+
+from bisect import bisect_left
+
+
+def fill_samples(bins, samples):
+    """Classify the samples into bins in a single pass.
+
+    Args:
+        bins: the (monotonically increasing) bins upper bounds
+        samples: a list of [size, count] samples (in any order)
+
+    Returns:
+        the bytes and the packets in each bin, as two lists
+    """
+
+    out_bytes = [0] * len(bins)
+    out_packets = [0] * len(bins)
+    nb_bins = len(bins)
+
+    for entry in samples:
+
+        if not entry:
+            continue
+
+        size, count = entry[0], entry[1]
+        index = bisect_left(bins, size)
+
+        if index == nb_bins:
+            continue
+
+        out_bytes[index] += size * count
+        out_packets[index] += count
+
+    return out_bytes, out_packets
+
+
+def rates(delta, last, current):
+    """Return the per second rate of each bin.
+
+    Args:
+        delta: the time elapsed between last and current in seconds
+        last: the previous values
+        current: the current values
+
+    Returns:
+        a list with one rate per bin
+    """
+
+    return [(cur - old) / delta for old, cur in zip(last, current)]
+
+
+class BinTable:
+    """Per key (e.g. per LVAP) bin counters in columnar form.
+
+    Rows are stored back to back in flat lists, each row holds one value
+    per bin. The index table maps each key to its row.
+
+    Attributes:
+        bins: the bins upper bounds
+        keys: the key of each row
+        index: the row of each key
+        bytes: the bytes in each bin, one row per key
+        packets: the packets in each bin, one row per key
+    """
+
+    def __init__(self, bins):
+
+        self.bins = bins
+        self.keys = []
+        self.index = {}
+        self.bytes = []
+        self.packets = []
+
+    def __len__(self):
+        return len(self.keys)
+
+    def row(self, key):
+        """Return the row of key, adding a new (empty) row if needed."""
+
+        if key not in self.index:
+            self.index[key] = len(self.keys)
+            self.keys.append(key)
+            self.bytes.extend([0] * len(self.bins))
+            self.packets.extend([0] * len(self.bins))
+
+        return self.index[key]
+
+    @classmethod
+    def from_samples(cls, bins, samples, convert=None):
+        """Classify the samples into bins and group them by key.
+
+        Args:
+            bins: the (monotonically increasing) bins upper bounds
+            samples: a list of [key, size, count] samples
+            convert: the function mapping the raw key found in the samples
+                to the table key (optional), called once per key
+
+        Returns:
+            a BinTable
+        """
+
+        table = cls(bins)
+        rows = {}
+        nb_bins = len(bins)
+        out_bytes = table.bytes
+        out_packets = table.packets
+
+        for entry in samples:
+
+            if not entry:
+                continue
+
+            raw, size, count = entry[0], entry[1], entry[2]
+
+            if raw not in rows:
+                rows[raw] = table.row(convert(raw) if convert else raw)
+
+            index = bisect_left(bins, size)
+
+            if index == nb_bins:
+                continue
+
+            offset = rows[raw] * nb_bins + index
+            out_bytes[offset] += size * count
+            out_packets[offset] += count
+
+        return table
+
+    def rates(self, delta, last):
+        """Return the per second rates with respect to a previous table.
+
+        Only the keys found in both tables are included.
+
+        Args:
+            delta: the time elapsed between last and this table in seconds
+            last: the previous BinTable
+
+        Returns:
+            a BinTable whose values are per second rates
+        """
+
+        out = BinTable(self.bins)
+        width = len(self.bins)
+
+        if last.bins != self.bins:
+            return out
+
+        for key, row in self.index.items():
+
+            if key not in last.index:
+                continue
+
+            start = row * width
+            old = last.index[key] * width
+
+            out.row(key)
+            out.bytes[-width:] = \
+                rates(delta, last.bytes[old:old + width],
+                      self.bytes[start:start + width])
+            out.packets[-width:] = \
+                rates(delta, last.packets[old:old + width],
+                      self.packets[start:start + width])
+
+        return out
+
+    def rows(self, values):
+        """Return values (bytes or packets) as a dictionary of rows."""
+
+        width = len(self.bins)
+
+        return {key: values[row * width:(row + 1) * width]
+                for key, row in self.index.items()}
+
+    def to_dict(self, values):
+        """Return values as a JSON-serializable dictionary of rows."""
+
+        return {str(k): v for k, v in self.rows(values).items()}
@@ -0,0 +1,415 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2016 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""EmPOWER remote callbacks delivery.
+
+Module callbacks pointing to a remote XML-RPC server are delivered by one
+worker thread per endpoint (i.e. per URL). Each endpoint keeps a persistent
+HTTP connection to the remote server and a bounded queue of pending calls,
+so that a slow or dead endpoint can neither grow the controller memory nor
+delay the callbacks directed to the other endpoints.
+
+When the queue of an endpoint is full the oldest pending call is dropped.
+Pending calls with the same key (e.g. the updates of the same module) are
+coalesced: only the latest one is delivered. Optionally, up to batch pending
+calls are delivered in a single request using system.multicall (the
+remote server must support it).
+
+Endpoints are reference counted by the modules whose callback points to
+them. When the last module is removed the endpoint delivers its pending
+calls and its worker thread exits. The settings of an endpoint (see
+configure()) are kept and applied if the endpoint is created again.
+"""
+
+import time
+import threading
+import xmlrpc.client
+
+from collections import OrderedDict
+
+import empower.logger
+
+# default max number of pending calls per endpoint
+QUEUE_SIZE = 100
+
+# default max number of calls per request (1 disables multicall)
+BATCH = 1
+
+# max time in seconds between reconnection attempts
+MAX_BACKOFF = 5.0
+
+
+class CallbackEndpoint:
+    """A remote XML-RPC endpoint.
+
+    Attributes:
+        url: the URL of the remote XML-RPC server
+        queue_size: the max number of pending calls
+        batch: the max number of calls delivered in a single request
+        sent: the number of delivered calls
+        errors: the number of failed calls
+        dropped: the number of calls dropped because the queue was full
+        coalesced: the number of calls replaced by a more recent one
+        max_depth: the max queue depth
+        latency: the latency of the last request in ms
+        max_latency: the max request latency in ms
+    """
+
+    def __init__(self, url, queue_size=QUEUE_SIZE, batch=BATCH):
+
+        if queue_size < 1:
+            raise ValueError("Invalid queue size %s" % queue_size)
+
+        if batch < 1:
+            raise ValueError("Invalid batch size %s" % batch)
+
+        self.url = url
+        self.queue_size = queue_size
+        self.batch = batch
+        self.sent = 0
+        self.errors = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.max_depth = 0
+        self.requests = 0
+        self.latency = 0.0
+        self.max_latency = 0.0
+        self.total_latency = 0.0
+        self.last_error = None
+        self.closed = False
+        self.__pending = OrderedDict()
+        self.__seq = 0
+        self.__proxy = None
+        self.__backoff = 0.0
+        self.__cond = threading.Condition()
+        self.__thread = threading.Thread(target=self.__run, daemon=True,
+                                         name="xmlrpc-%s" % url)
+        self.log = empower.logger.get_logger()
+        self.__thread.start()
+
+    @property
+    def depth(self):
+        """Return the number of pending calls."""
+
+        return len(self.__pending)
+
+    def close(self):
+        """Stop the worker thread once the pending calls are delivered.
+
+        If a delivery fails after the endpoint has been closed, the pending
+        calls are dropped instead of being retried.
+        """
+
+        with self.__cond:
+            self.closed = True
+            self.__cond.notify()
+
+    def join(self, timeout=None):
+        """Wait for the worker thread to exit (see close())."""
+
+        self.__thread.join(timeout)
+
+    def put(self, method, args, key=None):
+        """Queue a new call.
+
+        Args:
+            method: the name of the remote method
+            args: the arguments of the remote method
+            key: calls with the same key and method are coalesced, if None
+                the call is never coalesced
+
+        Returns:
+            None
+        """
+
+        with self.__cond:
+
+            if key is None:
+                self.__seq += 1
+                entry = (method, None, self.__seq)
+            else:
+                entry = (method, key)
+
+            if entry in self.__pending:
+                self.coalesced += 1
+                del self.__pending[entry]
+
+            while len(self.__pending) >= self.queue_size:
+                self.dropped += 1
+                self.__pending.popitem(last=False)
+
+            self.__pending[entry] = args
+            self.max_depth = max(self.max_depth, len(self.__pending))
+
+            self.__cond.notify()
+
+    def __take(self):
+        """Wait for pending calls and dequeue up to batch of them.
+
+        Returns an empty list when the endpoint is closed and idle.
+        """
+
+        with self.__cond:
+
+            while not self.__pending:
+                if self.closed:
+                    return []
+                self.__cond.wait()
+
+            calls = []
+
+            while self.__pending and len(calls) < self.batch:
+                entry, args = self.__pending.popitem(last=False)
+                calls.append((entry[0], args))
+
+            return calls
+
+    def __connect(self):
+        """Return the proxy, creating a new connection if needed."""
+
+        if not self.__proxy:
+            self.__proxy = xmlrpc.client.ServerProxy(self.url,
+                                                     allow_none=True)
+
+        return self.__proxy
+
+    def __disconnect(self):
+        """Close the connection to the remote server."""
+
+        if not self.__proxy:
+            return
+
+        try:
+            self.__proxy("close")()
+        except Exception:
+            pass
+
+        self.__proxy = None
+
+    def __deliver(self, calls):
+        """Deliver a list of calls."""
+
+        proxy = self.__connect()
+
+        if len(calls) == 1:
+            method, args = calls[0]
+            getattr(proxy, method)(*args)
+            return
+
+        multicall = xmlrpc.client.MultiCall(proxy)
+
+        for method, args in calls:
+            getattr(multicall, method)(*args)
+
+        # raise the first fault, if any
+        for _ in multicall():
+            pass
+
+    def __run(self):
+        """Delivery loop."""
+
+        while True:
+
+            calls = self.__take()
+
+            if not calls:
+                self.__disconnect()
+                return
+
+            start = time.monotonic()
+
+            try:
+
+                self.__deliver(calls)
+
+            except Exception as ex:
+
+                self.errors += len(calls)
+                self.last_error = str(ex)
+                self.__disconnect()
+                self.log.warning("Unable to deliver %u calls to %s: %s",
+                                 len(calls), self.url, ex)
+
+                # do not hammer an unreachable endpoint
+                self.__backoff = min(max(self.__backoff * 2, 0.1),
+                                     MAX_BACKOFF)
+
+                with self.__cond:
+
+                    if not self.closed:
+                        self.__cond.wait(self.__backoff)
+
+                    # nobody is waiting for the pending calls anymore
+                    if self.closed:
+                        self.dropped += len(self.__pending)
+                        self.__pending.clear()
+
+                continue
+
+            self.__backoff = 0.0
+            self.latency = (time.monotonic() - start) * 1000
+            self.max_latency = max(self.max_latency, self.latency)
+            self.total_latency += self.latency
+            self.requests += 1
+            self.sent += len(calls)
+
+    def to_dict(self):
+        """Return JSON-serializable representation of the object."""
+
+        avg = self.total_latency / self.requests if self.requests else 0.0
+
+        return {'url': self.url,
+                'queue_size': self.queue_size,
+                'batch': self.batch,
+                'depth': self.depth,
+                'max_depth': self.max_depth,
+                'sent': self.sent,
+                'requests': self.requests,
+                'errors': self.errors,
+                'dropped': self.dropped,
+                'coalesced': self.coalesced,
+                'latency': self.latency,
+                'avg_latency': avg,
+                'max_latency': self.max_latency,
+                'last_error': self.last_error}
+
+
+class CallbackDelivery:
+    """Remote callbacks delivery service.
+
+    Attributes:
+        endpoints: the endpoints, indexed by URL
+        settings: the endpoint settings set with configure(), indexed by URL
+        refs: the number of modules using each endpoint, indexed by URL
+    """
+
+    def __init__(self):
+
+        self.endpoints = {}
+        self.settings = {}
+        self.refs = {}
+        self.__lock = threading.Lock()
+
+    def endpoint(self, url, **kwargs):
+        """Return the endpoint for url, creating it if needed.
+
+        Args:
+            url: the URL of the remote XML-RPC server
+            kwargs: the endpoint settings (queue_size, batch), only used
+                when the endpoint is created
+
+        Returns:
+            a CallbackEndpoint
+        """
+
+        with self.__lock:
+
+            if url not in self.endpoints:
+                settings = dict(self.settings.get(url, {}))
+                settings.update(kwargs)
+                self.endpoints[url] = CallbackEndpoint(url, **settings)
+
+            return self.endpoints[url]
+
+    def configure(self, url, queue_size=None, batch=None):
+        """Change the settings of an endpoint.
+
+        The settings are applied to the endpoint if it exists, and whenever
+        it is created.
+        """
+
+        if queue_size is not None and queue_size < 1:
+            raise ValueError("Invalid queue size %s" % queue_size)
+
+        if batch is not None and batch < 1:
+            raise ValueError("Invalid batch size %s" % batch)
+
+        settings = self.settings.setdefault(url, {})
+
+        if queue_size is not None:
+            settings['queue_size'] = queue_size
+
+        if batch is not None:
+            settings['batch'] = batch
+
+        endpoint = self.endpoints.get(url)
+
+        if endpoint:
+            endpoint.queue_size = settings.get('queue_size',
+                                               endpoint.queue_size)
+            endpoint.batch = settings.get('batch', endpoint.batch)
+
+    def acquire(self, url):
+        """Add a reference to an endpoint (e.g. a module callback)."""
+
+        with self.__lock:
+            self.refs[url] = self.refs.get(url, 0) + 1
+
+    def release(self, url):
+        """Remove a reference to an endpoint.
+
+        The endpoint is closed when its last reference is removed. Its
+        pending calls are still delivered.
+        """
+
+        with self.__lock:
+
+            if url not in self.refs:
+                return
+
+            self.refs[url] -= 1
+
+            if self.refs[url]:
+                return
+
+            del self.refs[url]
+            endpoint = self.endpoints.pop(url, None)
+
+        if endpoint:
+            endpoint.close()
+
+    def deliver(self, callback, args=(), key=None):
+        """Deliver a remote callback.
+
+        Args:
+            callback: a [url, method] list
+            args: the arguments of the remote method
+            key: the coalescing key, see CallbackEndpoint.put
+
+        Returns:
+            None
+        """
+
+        url = callback[0]
+
+        self.endpoint(url).put(callback[1], args, key)
+
+        # nobody references this endpoint, deliver and close it
+        if url not in self.refs:
+            with self.__lock:
+                endpoint = self.endpoints.pop(url, None)
+            if endpoint:
+                endpoint.close()
+
+    def to_dict(self):
+        """Return JSON-serializable representation of the object."""
+
+        return {url: endpoint.to_dict()
+                for url, endpoint in self.endpoints.items()}
+
+
+CALLBACKS = CallbackDelivery()
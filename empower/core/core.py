@@ -30,6 +30,7 @@ from construct import Bytes
 
 from sqlalchemy.exc import IntegrityError
 
+from empower import settings
 from empower.datatypes.etheraddress import EtherAddress
 from empower.persistence import Session
 from empower.persistence.persistence import TblTenant
@@ -38,6 +39,7 @@ from empower.persistence.persistence import TblBelongs
 from empower.persistence.persistence import TblPendingTenant
 from empower.core.account import Account
 from empower.core.tenant import Tenant
+from empower.core.tenant import T_TYPE_SHARED
 from empower.core.acl import ACL
 from empower.persistence.persistence import TblAllow
 from empower.persistence.persistence import TblDeny
@@ -93,6 +95,9 @@ class EmpowerRuntime:
         self.components = {}
         self.accounts = {}
         self.tenants = {}
+        self.tenants_by_name = {}
+        self.tenants_by_plmn = {}
+        self.__wtp_ssids = {}
         self.lvaps = {}
         self.ues = {}
         self.wtps = {}
@@ -102,6 +107,9 @@ class EmpowerRuntime:
         self.allowed = {}
         self.denied = {}
         self.imsi2mac = {}
+        self.wtp_dl_lvaps = {}
+        self.wtp_ul_lvaps = {}
+        self.wtp_vaps = {}
         self.log = empower.logger.get_logger()
 
         self.log.info("Starting EmPOWER Runtime")
@@ -174,13 +182,50 @@ class EmpowerRuntime:
             if tenant.tenant_id in self.tenants:
                 raise KeyError(tenant.tenant_id)
 
-            self.tenants[tenant.tenant_id] = \
-                Tenant(tenant.tenant_id,
-                       tenant.tenant_name,
-                       tenant.owner,
-                       tenant.desc,
-                       tenant.bssid_type,
-                       tenant.plmn_id)
+            self.__index_tenant(Tenant(tenant.tenant_id,
+                                       tenant.tenant_name,
+                                       tenant.owner,
+                                       tenant.desc,
+                                       tenant.bssid_type,
+                                       tenant.plmn_id))
+
+    def __index_tenant(self, tenant):
+        """Add tenant to the tenants dict and to its indexes."""
+
+        self.tenants[tenant.tenant_id] = tenant
+        self.tenants_by_name[tenant.tenant_name] = tenant
+
+        if tenant.plmn_id is not None:
+            self.tenants_by_plmn[tenant.plmn_id] = tenant
+
+        self.invalidate_ssids()
+
+        if settings.CHECK_INDEXES:
+            self.__check_tenant_indexes()
+
+    def __unindex_tenant(self, tenant):
+        """Remove tenant from the tenants dict and from its indexes."""
+
+        del self.tenants[tenant.tenant_id]
+        self.tenants_by_name.pop(tenant.tenant_name, None)
+
+        if tenant.plmn_id is not None:
+            self.tenants_by_plmn.pop(tenant.plmn_id, None)
+
+        self.invalidate_ssids()
+
+        if settings.CHECK_INDEXES:
+            self.__check_tenant_indexes()
+
+    def __check_tenant_indexes(self):
+        """Check that the tenant indexes match the tenants dict."""
+
+        by_name = {t.tenant_name: t for t in self.tenants.values()}
+        by_plmn = {t.plmn_id: t for t in self.tenants.values()
+                   if t.plmn_id is not None}
+
+        assert by_name == self.tenants_by_name
+        assert by_plmn == self.tenants_by_plmn
 
     def __load_imsi2mac(self):
         """Load IMSI to MAC mapped values."""
@@ -499,13 +544,12 @@ class EmpowerRuntime:
             session.rollback()
             raise ValueError("Tenant name %s exists", tenant_name)
 
-        self.tenants[request.tenant_id] = \
-            Tenant(request.tenant_id,
-                   request.tenant_name,
-                   self.accounts[owner].username,
-                   desc,
-                   request.bssid_type,
-                   request.plmn_id)
+        self.__index_tenant(Tenant(request.tenant_id,
+                                   request.tenant_name,
+                                   self.accounts[owner].username,
+                                   desc,
+                                   request.bssid_type,
+                                   request.plmn_id))
 
         return request.tenant_id
 
@@ -598,8 +642,12 @@ class EmpowerRuntime:
             session.delete(dev)
             session.commit()
 
+        # remove vaps
+        for vap in list(tenant.vaps.values()):
+            self.remove_vap(vap)
+
         # remove tenant
-        del self.tenants[tenant_id]
+        self.__unindex_tenant(tenant)
 
         tenant = Session().query(TblTenant) \
                           .filter(TblTenant.tenant_id == tenant_id) \
@@ -615,32 +663,40 @@ class EmpowerRuntime:
             if not hasattr(component, 'modules'):
                 continue
 
-            to_be_removed = []
+            for module_id in component.modules.find('tenant_id', tenant_id):
+                if module_id in component.modules:
+                    component.remove_module(module_id)
+
+    def wtp_ssids(self, wtp_addr):
+        """Return the SSIDs of the unique tenants available at a WTP."""
+
+        if wtp_addr not in self.__wtp_ssids:
+            self.__wtp_ssids[wtp_addr] = \
+                frozenset(tenant.tenant_name
+                          for tenant in self.tenants.values()
+                          if tenant.bssid_type != T_TYPE_SHARED and
+                          wtp_addr in tenant.wtps)
+
+        return self.__wtp_ssids[wtp_addr]
 
-            for module in component.modules.values():
-                if module.tenant_id == tenant_id:
-                    to_be_removed.append(module.module_id)
+    def invalidate_ssids(self):
+        """Invalidate the WTP -> SSIDs map.
 
-            for module_id in to_be_removed:
-                component.remove_module(module_id)
+        Must be called every time a tenant is created/deleted or a WTP is
+        added to/removed from a tenant.
+        """
+
+        self.__wtp_ssids = {}
 
     def load_tenant(self, tenant_name):
         """Load tenant from network name (SSID)."""
 
-        for tenant in self.tenants.values():
-            if tenant.tenant_name == tenant_name:
-                return tenant
-
-        return None
+        return self.tenants_by_name.get(tenant_name)
 
     def load_tenant_by_plmn_id(self, plmn_id):
         """Load tenant from network name."""
 
-        for tenant in self.tenants.values():
-            if tenant.plmn_id == plmn_id:
-                return tenant
-
-        return None
+        return self.tenants_by_plmn.get(plmn_id)
 
     def remove_lvap(self, lvap_addr):
         """Remove LVAP from the network"""
@@ -669,6 +725,63 @@ class EmpowerRuntime:
 
         del self.lvaps[lvap.addr]
 
+    def add_hosted_lvap(self, wtp, lvap, downlink):
+        """Record that the LVAP has a downlink/uplink block on the WTP."""
+
+        index = self.wtp_dl_lvaps if downlink else self.wtp_ul_lvaps
+        index.setdefault(wtp.addr, {})[lvap.addr] = lvap
+
+    def remove_hosted_lvap(self, wtp, lvap, downlink):
+        """Record that the LVAP has no downlink/uplink block on the WTP."""
+
+        index = self.wtp_dl_lvaps if downlink else self.wtp_ul_lvaps
+
+        if wtp.addr not in index:
+            return
+
+        index[wtp.addr].pop(lvap.addr, None)
+
+        if not index[wtp.addr]:
+            del index[wtp.addr]
+
+    def hosted_lvaps(self, wtp):
+        """Return the LVAPs with the downlink block on the WTP."""
+
+        return list(self.wtp_dl_lvaps.get(wtp.addr, {}).values())
+
+    def hosted_ul_lvaps(self, wtp):
+        """Return the LVAPs with only uplink blocks on the WTP."""
+
+        downlink = self.wtp_dl_lvaps.get(wtp.addr, {})
+        uplink = self.wtp_ul_lvaps.get(wtp.addr, {})
+
+        return [lvap for addr, lvap in uplink.items() if addr not in downlink]
+
+    def add_vap(self, vap):
+        """Add VAP to its tenant."""
+
+        vap.tenant.vaps[vap.net_bssid] = vap
+        self.wtp_vaps.setdefault(vap.wtp.addr, {})[vap.net_bssid] = vap
+
+    def remove_vap(self, vap):
+        """Remove VAP from its tenant."""
+
+        if vap.net_bssid in vap.tenant.vaps:
+            del vap.tenant.vaps[vap.net_bssid]
+
+        if vap.wtp.addr not in self.wtp_vaps:
+            return
+
+        self.wtp_vaps[vap.wtp.addr].pop(vap.net_bssid, None)
+
+        if not self.wtp_vaps[vap.wtp.addr]:
+            del self.wtp_vaps[vap.wtp.addr]
+
+    def hosted_vaps(self, wtp):
+        """Return the VAPs on the WTP."""
+
+        return list(self.wtp_vaps.get(wtp.addr, {}).values())
+
     def remove_ue(self, imsi):
         """Remove UE from the network"""
 
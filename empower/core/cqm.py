@@ -0,0 +1,507 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2016 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""EmPOWER channel quality matrices.
+
+The channel quality maps reported by the WTPs (UCQM: RSSI of the stations
+as seen by each block, NCQM: RSSI of the neighbouring WTPs) are stored in
+two controller-wide matrices, with one row per resource block and one
+column per station address. Each metric (e.g. mov_rssi) is stored as an
+array of floats per row, the index tables map blocks to rows and addresses
+to columns. Rows and columns are recycled through free lists when a block
+is dropped or no block sees a station anymore. Cross-block queries (e.g.
+the best block for a station) scan a single column instead of one
+dictionary per block.
+
+The CQM class is a dictionary-like view of a row, so that the existing code
+can keep using block.ucqm[addr]['mov_rssi'] and friends.
+"""
+
+from array import array
+from types import MappingProxyType
+from collections.abc import MutableMapping
+
+# the metrics reported for each station
+FIELDS = ('last_rssi_std', 'last_rssi_avg', 'last_packets', 'hist_packets',
+          'mov_rssi')
+
+# the array type of each metric
+TYPES = {'last_rssi_std': 'd',
+         'last_rssi_avg': 'd',
+         'last_packets': 'q',
+         'hist_packets': 'q',
+         'mov_rssi': 'd'}
+
+# the value of the missing entries
+DEFAULTS = {'last_rssi_std': -float("inf"),
+            'last_rssi_avg': -float("inf"),
+            'last_packets': 0,
+            'hist_packets': 0,
+            'mov_rssi': -float("inf")}
+
+
+class QualityMatrix:
+    """A channel quality matrix (blocks x stations).
+
+    Attributes:
+        rows: the row of each block
+        columns: the column of each station address
+        addrs: the address of each column (None if the column is free)
+    """
+
+    def __init__(self):
+
+        self.rows = {}
+        self.columns = {}
+        self.addrs = []
+        self.__blocks = []
+        self.__data = {field: [] for field in FIELDS}
+        self.__present = []
+        self.__versions = []
+        self.__counts = []
+        self.__free_rows = []
+        self.__free_columns = []
+
+    def __row(self, block, create=False):
+        """Return the row of a block (None if missing and not create)."""
+
+        row = self.rows.get(block)
+
+        if row is not None or not create:
+            return row
+
+        # a free row has already been reset by drop()
+        if self.__free_rows:
+            row = self.__free_rows.pop()
+            self.rows[block] = row
+            self.__blocks[row] = block
+            return row
+
+        row = len(self.__blocks)
+        self.rows[block] = row
+        self.__blocks.append(block)
+        self.__present.append({})
+        self.__versions.append(0)
+
+        width = len(self.addrs)
+
+        for field in FIELDS:
+            self.__data[field].append(array(TYPES[field], [DEFAULTS[field]]) *
+                                      width)
+
+        return row
+
+    def __column(self, addr):
+        """Return the column of addr, allocating a new column if needed."""
+
+        column = self.columns.get(addr)
+
+        if column is not None:
+            return column
+
+        if self.__free_columns:
+            column = self.__free_columns.pop()
+            self.addrs[column] = addr
+        else:
+            column = len(self.addrs)
+            self.addrs.append(addr)
+            self.__counts.append(0)
+            for field in FIELDS:
+                default = DEFAULTS[field]
+                for values in self.__data[field]:
+                    values.append(default)
+
+        self.columns[addr] = column
+
+        return column
+
+    def __clear(self, row, column):
+        """Reset an entry to the default values."""
+
+        for field in FIELDS:
+            self.__data[field][row][column] = DEFAULTS[field]
+
+        del self.__present[row][column]
+
+        self.__counts[column] -= 1
+
+        # release the column if no block sees this station anymore
+        if not self.__counts[column]:
+            del self.columns[self.addrs[column]]
+            self.addrs[column] = None
+            self.__free_columns.append(column)
+
+    def version(self, block):
+        """Return the version of the row of a block."""
+
+        row = self.rows.get(block)
+
+        return self.__versions[row] if row is not None else 0
+
+    def touch(self, block):
+        """Bump the version of the row of a block."""
+
+        row = self.__row(block, True)
+        self.__versions[row] += 1
+
+    def set(self, block, addr, value):
+        """Set the entry of a station (a dict of FIELDS, missing = default)."""
+
+        row = self.__row(block, True)
+        column = self.__column(addr)
+
+        for field in FIELDS:
+            self.__data[field][row][column] = \
+                value.get(field, DEFAULTS[field])
+
+        if column not in self.__present[row]:
+            self.__present[row][column] = None
+            self.__counts[column] += 1
+
+        self.__versions[row] += 1
+
+    def replace(self, block, entries):
+        """Replace the row of a block, in place.
+
+        Args:
+            block: the resource block
+            entries: a list of (addr, values) pairs, values being a sequence
+                with one value per field in FIELDS order
+        """
+
+        row = self.__row(block, True)
+        present = self.__present[row]
+        seen = set()
+
+        for addr, values in entries:
+
+            column = self.__column(addr)
+            seen.add(column)
+
+            for field, value in zip(FIELDS, values):
+                self.__data[field][row][column] = value
+
+            if column not in present:
+                present[column] = None
+                self.__counts[column] += 1
+
+        for column in [x for x in present if x not in seen]:
+            self.__clear(row, column)
+
+        self.__versions[row] += 1
+
+    def remove(self, block, addr):
+        """Remove the entry of a station.
+
+        Raises:
+            KeyError, if there is no such entry
+        """
+
+        row = self.rows.get(block)
+        column = self.columns.get(addr)
+
+        if row is None or column is None or \
+           column not in self.__present[row]:
+            raise KeyError(addr)
+
+        self.__clear(row, column)
+        self.__versions[row] += 1
+
+    def clear(self, block):
+        """Remove all the entries of a block."""
+
+        row = self.rows.get(block)
+
+        if row is None:
+            return
+
+        for column in list(self.__present[row]):
+            self.__clear(row, column)
+
+        self.__versions[row] += 1
+
+    def drop(self, block):
+        """Remove a block and free its row."""
+
+        row = self.rows.pop(block, None)
+
+        if row is None:
+            return
+
+        for column in list(self.__present[row]):
+            self.__clear(row, column)
+
+        # versions keep growing so that a reused row is never mistaken for
+        # an unchanged one
+        self.__versions[row] += 1
+        self.__blocks[row] = None
+        self.__free_rows.append(row)
+
+    def get(self, block, addr):
+        """Return the entry of a station as a dict (None if missing)."""
+
+        row = self.rows.get(block)
+        column = self.columns.get(addr)
+
+        if row is None or column is None or \
+           column not in self.__present[row]:
+            return None
+
+        out = {'addr': addr}
+
+        for field in FIELDS:
+            value = self.__data[field][row][column]
+            # the WTPs report integer values
+            if isinstance(value, float) and value.is_integer():
+                value = int(value)
+            out[field] = value
+
+        return out
+
+    def value(self, block, addr, field='mov_rssi'):
+        """Return a metric of a station (the default value if missing)."""
+
+        row = self.rows.get(block)
+        column = self.columns.get(addr)
+
+        if row is None or column is None or \
+           column not in self.__present[row]:
+            return DEFAULTS[field]
+
+        return self.__data[field][row][column]
+
+    def addresses(self, block):
+        """Return the addresses seen by a block."""
+
+        row = self.rows.get(block)
+
+        if row is None:
+            return []
+
+        return [self.addrs[x] for x in self.__present[row]]
+
+    def row(self, block, field='mov_rssi'):
+        """Return a metric of all the stations seen by a block.
+
+        Returns:
+            a dictionary mapping station addresses to values
+        """
+
+        row = self.rows.get(block)
+
+        if row is None:
+            return {}
+
+        values = self.__data[field][row]
+
+        return {self.addrs[x]: values[x] for x in self.__present[row]}
+
+    def column(self, addr, field='mov_rssi', blocks=None):
+        """Return a metric of a station as seen by each block.
+
+        Args:
+            addr: the station address
+            field: the metric
+            blocks: only consider these blocks (optional)
+
+        Returns:
+            a dictionary mapping blocks to values
+        """
+
+        column = self.columns.get(addr)
+
+        if column is None:
+            return {}
+
+        data = self.__data[field]
+        out = {}
+
+        for row, block in self.__rows(blocks):
+            if column in self.__present[row]:
+                out[block] = data[row][column]
+
+        return out
+
+    def __rows(self, blocks):
+        """Return the (row, block) pairs of blocks (all if None)."""
+
+        if blocks is None:
+            return [(row, block) for block, row in self.rows.items()]
+
+        return [(self.rows[x], x) for x in blocks if x in self.rows]
+
+    def best(self, addr, field='mov_rssi', blocks=None):
+        """Return the block with the highest metric for a station.
+
+        Returns:
+            a (block, value) pair, (None, default) if no block sees addr
+        """
+
+        best, best_value = None, DEFAULTS[field]
+
+        for block, value in self.column(addr, field, blocks).items():
+            if best is None or value > best_value:
+                best, best_value = block, value
+
+        return best, best_value
+
+    def best_blocks(self, field='mov_rssi', blocks=None):
+        """Return the best block of every station, in a single scan.
+
+        Returns:
+            a dictionary mapping station addresses to (block, value) pairs
+        """
+
+        best = {}
+        best_values = {}
+
+        for row, block in self.__rows(blocks):
+
+            values = self.__data[field][row]
+
+            for column in self.__present[row]:
+                value = values[column]
+                if column not in best or value > best_values[column]:
+                    best[column] = block
+                    best_values[column] = value
+
+        return {self.addrs[x]: (best[x], best_values[x]) for x in best}
+
+    def neighbours(self, block, field='mov_rssi', threshold=None):
+        """Return the stations seen by a block, best first.
+
+        Args:
+            block: the resource block
+            field: the metric
+            threshold: only return the stations whose metric is at least
+                threshold (optional)
+
+        Returns:
+            a list of (addr, value) pairs
+        """
+
+        out = [(addr, value) for addr, value in self.row(block, field).items()
+               if threshold is None or value >= threshold]
+
+        return sorted(out, key=lambda x: x[1], reverse=True)
+
+    def to_dict(self):
+        """Return JSON-serializable representation of the object."""
+
+        return {'blocks': len(self.rows),
+                'rows': len(self.__blocks),
+                'stations': len(self.columns),
+                'columns': len(self.addrs)}
+
+
+class CQM(MutableMapping):
+    """Dictionary view of the row of a block in a quality matrix.
+
+    Missing entries are returned with -inf RSSI and 0 packets instead of
+    raising KeyError. Entries are read-only snapshots of the matrix, an
+    entry is changed by assigning a new dictionary, e.g.
+
+        block.ucqm[addr] = dict(block.ucqm[addr], mov_rssi=-60)
+
+    A CQM created without a matrix has its own private single row matrix.
+
+    Attributes:
+        matrix: the quality matrix
+        block: the block whose row is viewed
+    """
+
+    def __init__(self, matrix=None, block=None):
+
+        self.matrix = matrix if matrix is not None else QualityMatrix()
+        self.block = block
+
+    @property
+    def version(self):
+        """Return the version of the row."""
+
+        return self.matrix.version(self.block)
+
+    def touch(self):
+        """Bump the version of the row."""
+
+        self.matrix.touch(self.block)
+
+    def __getitem__(self, addr):
+
+        out = self.matrix.get(self.block, addr)
+
+        if out is None:
+            out = {'addr': addr}
+            out.update(DEFAULTS)
+
+        return MappingProxyType(out)
+
+    def get(self, addr, default=None):
+
+        out = self.matrix.get(self.block, addr)
+
+        return MappingProxyType(out) if out is not None else default
+
+    def __contains__(self, addr):
+        return self.matrix.get(self.block, addr) is not None
+
+    def __setitem__(self, addr, value):
+        self.matrix.set(self.block, addr, value)
+
+    def __delitem__(self, addr):
+        self.matrix.remove(self.block, addr)
+
+    def __iter__(self):
+        return iter(self.matrix.addresses(self.block))
+
+    def __len__(self):
+        return len(self.matrix.addresses(self.block))
+
+    def clear(self):
+        self.matrix.clear(self.block)
+
+    def drop(self):
+        """Remove the row from the matrix, see QualityMatrix.drop()."""
+
+        self.matrix.drop(self.block)
+
+    def replace(self, entries):
+        """Replace all the entries, see QualityMatrix.replace()."""
+
+        self.matrix.replace(self.block, entries)
+
+    def value(self, addr, field='mov_rssi'):
+        """Return a metric of a station (the default value if missing)."""
+
+        return self.matrix.value(self.block, addr, field)
+
+    def values_of(self, field='mov_rssi'):
+        """Return a metric of all the stations, indexed by address."""
+
+        return self.matrix.row(self.block, field)
+
+    def to_dict(self):
+        """Return JSON-serializable representation of the object."""
+
+        return {str(k): dict(v) for k, v in self.items()}
+
+    def __repr__(self):
+        return repr(self.to_dict())
+
+
+UCQM_MATRIX = QualityMatrix()
+NCQM_MATRIX = QualityMatrix()
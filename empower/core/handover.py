@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2016 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""EmPOWER handover decision engine.
+
+The engine picks the best resource block (the highest RSSI in the user
+channel quality matrix) of every LVAP in a single scan of the matrix, and
+only moves the LVAPs whose placement actually changes. A handover happens
+only if the best block beats the current one by at least hysteresis dB
+and the LVAP has not been moved in the last dwell seconds.
+"""
+
+import time
+
+import empower.logger
+
+from empower.core.cqm import UCQM_MATRIX
+
+# min RSSI improvement in dB
+DEFAULT_HYSTERESIS = 3
+
+# min time in seconds between two handovers of the same LVAP
+DEFAULT_DWELL = 10
+
+
+class HandoverEngine:
+    """Best block handover decision engine.
+
+    Attributes:
+        hysteresis: the min RSSI improvement in dB
+        dwell: the min time in seconds between two handovers of an LVAP
+        field: the metric used to rank the blocks
+        matrix: the quality matrix
+        handovers: the number of handovers performed
+        suppressed: the number of handovers suppressed by hysteresis/dwell
+    """
+
+    def __init__(self, hysteresis=DEFAULT_HYSTERESIS, dwell=DEFAULT_DWELL,
+                 field='mov_rssi', matrix=UCQM_MATRIX):
+
+        self.hysteresis = hysteresis
+        self.dwell = dwell
+        self.field = field
+        self.matrix = matrix
+        self.handovers = 0
+        self.suppressed = 0
+        self.__last = {}
+        self.log = empower.logger.get_logger()
+
+    @property
+    def hysteresis(self):
+        """Return the hysteresis."""
+
+        return self.__hysteresis
+
+    @hysteresis.setter
+    def hysteresis(self, value):
+        """Set the hysteresis."""
+
+        value = float(value)
+
+        if value < 0:
+            raise ValueError("Invalid hysteresis %s" % value)
+
+        self.__hysteresis = value
+
+    @property
+    def dwell(self):
+        """Return the dwell time."""
+
+        return self.__dwell
+
+    @dwell.setter
+    def dwell(self, value):
+        """Set the dwell time."""
+
+        value = float(value)
+
+        if value < 0:
+            raise ValueError("Invalid dwell time %s" % value)
+
+        self.__dwell = value
+
+    def __best(self, lvaps, blocks):
+        """Return the best (block, value) of each LVAP address."""
+
+        if len(lvaps) == 1:
+            addr = lvaps[0].addr
+            block, value = self.matrix.best(addr, self.field, blocks)
+            return {addr: (block, value)} if block is not None else {}
+
+        return self.matrix.best_blocks(self.field, blocks)
+
+    def decide(self, lvaps, blocks=None):
+        """Return the handovers that change the placement of the LVAPs.
+
+        Args:
+            lvaps: the LVAPs
+            blocks: the candidate blocks (optional, all if None)
+
+        Returns:
+            a list of (lvap, block) pairs
+        """
+
+        lvaps = list(lvaps)
+
+        if not lvaps:
+            return []
+
+        best = self.__best(lvaps, blocks)
+        now = time.monotonic()
+        out = []
+
+        for lvap in lvaps:
+
+            if lvap.addr not in best or lvap.pending:
+                continue
+
+            block, value = best[lvap.addr]
+            current = next(iter(lvap.downlink), None)
+
+            if block == current:
+                continue
+
+            if current is not None:
+
+                rssi = self.matrix.value(current, lvap.addr, self.field)
+
+                if value < rssi + self.hysteresis:
+                    self.suppressed += 1
+                    continue
+
+                if now - self.__last.get(lvap.addr, -self.dwell) < \
+                   self.dwell:
+                    self.suppressed += 1
+                    continue
+
+            out.append((lvap, block))
+
+        return out
+
+    def run(self, lvaps, blocks=None):
+        """Perform the handovers returned by decide().
+
+        Returns:
+            the number of handovers performed
+        """
+
+        now = time.monotonic()
+        count = 0
+
+        for lvap, block in self.decide(lvaps, blocks):
+
+            self.log.info("Handover %s to %s", lvap.addr, block)
+
+            try:
+                lvap.blocks = block
+            except ValueError as ex:
+                self.log.warning("Unable to move %s: %s", lvap.addr, ex)
+                continue
+
+            self.__last[lvap.addr] = now
+            self.handovers += 1
+            count += 1
+
+        # forget the LVAPs whose dwell time is over
+        for addr in [k for k, v in self.__last.items()
+                     if now - v >= self.dwell]:
+            del self.__last[addr]
+
+        return count
+
+    def to_dict(self):
+        """Return JSON-serializable representation of the object."""
+
+        return {'hysteresis': self.hysteresis,
+                'dwell': self.dwell,
+                'field': self.field,
+                'handovers': self.handovers,
+                'suppressed': self.suppressed}
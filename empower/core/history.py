@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2016 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""EmPOWER module history.
+
+Modules can optionally keep the last samples they received (see
+Module.sample()) in a fixed depth circular buffer, together with the time
+at which each sample was received. Samples are numbers, lists of numbers
+(e.g. one value per bin), or dictionaries of numbers (e.g. one value per
+station). Queries on lists and dictionaries are computed element-wise,
+dictionary entries missing from some samples are computed over the
+samples where they are present.
+"""
+
+from array import array
+
+
+def _reduce(values, func):
+    """Apply func to the samples in values, element-wise."""
+
+    first = values[-1]
+
+    if isinstance(first, dict):
+        keys = {}
+        for value in values:
+            for key in value:
+                keys[key] = None
+        return {key: func([x[key] for x in values if key in x])
+                for key in keys}
+
+    if isinstance(first, (list, tuple)):
+        return [func(column) for column in zip(*values)]
+
+    return func(values)
+
+
+def _mean(values):
+    """Return the mean of a list of numbers."""
+
+    return sum(values) / len(values)
+
+
+def _ewma(alpha):
+    """Return a function computing the EWMA of a list of numbers."""
+
+    def ewma(values):
+
+        out = values[0]
+
+        for value in values[1:]:
+            out = alpha * value + (1 - alpha) * out
+
+        return out
+
+    return ewma
+
+
+def _percentile(percent):
+    """Return a function computing a percentile of a list of numbers."""
+
+    def percentile(values):
+
+        values = sorted(values)
+        pos = (len(values) - 1) * percent / 100
+        low = int(pos)
+        high = min(low + 1, len(values) - 1)
+
+        return values[low] + (values[high] - values[low]) * (pos - low)
+
+    return percentile
+
+
+def _jsonable(value):
+    """Return value with string keys, if value is a dictionary."""
+
+    if isinstance(value, dict):
+        return {str(k): v for k, v in value.items()}
+
+    return value
+
+
+class History:
+    """Fixed depth circular history of timestamped samples.
+
+    Attributes:
+        depth: the max number of samples retained
+    """
+
+    def __init__(self, depth):
+
+        if depth < 1:
+            raise ValueError("Invalid history depth %s" % depth)
+
+        self.depth = depth
+        self.__times = array('d', [0.0] * depth)
+        self.__values = [None] * depth
+        self.__next = 0
+        self.__count = 0
+
+    def __len__(self):
+        return self.__count
+
+    def append(self, timestamp, value):
+        """Add a new sample, replacing the oldest one if full."""
+
+        self.__times[self.__next] = timestamp
+        self.__values[self.__next] = value
+        self.__next = (self.__next + 1) % self.depth
+        self.__count = min(self.__count + 1, self.depth)
+
+    def clear(self):
+        """Remove all the samples."""
+
+        self.__values = [None] * self.depth
+        self.__next = 0
+        self.__count = 0
+
+    def window(self, count=None):
+        """Return the last count samples (all if None), oldest first.
+
+        Returns:
+            the list of timestamps and the list of values
+        """
+
+        if count is None or count > self.__count:
+            count = self.__count
+
+        if count <= 0:
+            return [], []
+
+        start = (self.__next - count) % self.depth
+
+        if start + count <= self.depth:
+            return (self.__times[start:start + count].tolist(),
+                    self.__values[start:start + count])
+
+        tail = start + count - self.depth
+
+        return (self.__times[start:].tolist() + self.__times[:tail].tolist(),
+                self.__values[start:] + self.__values[:tail])
+
+    def mean(self, count=None):
+        """Return the mean of the last count samples (None if empty)."""
+
+        _, values = self.window(count)
+
+        if not values:
+            return None
+
+        return _reduce(values, _mean)
+
+    def ewma(self, alpha, count=None):
+        """Return the EWMA of the last count samples (None if empty).
+
+        Args:
+            alpha: the weight of the most recent sample, in (0, 1]
+            count: the number of samples (all if None)
+        """
+
+        if not 0 < alpha <= 1:
+            raise ValueError("Invalid alpha %s" % alpha)
+
+        _, values = self.window(count)
+
+        if not values:
+            return None
+
+        return _reduce(values, _ewma(alpha))
+
+    def percentile(self, percent, count=None):
+        """Return a percentile of the last count samples (None if empty).
+
+        Args:
+            percent: the percentile, in [0, 100]
+            count: the number of samples (all if None)
+        """
+
+        if not 0 <= percent <= 100:
+            raise ValueError("Invalid percentile %s" % percent)
+
+        _, values = self.window(count)
+
+        if not values:
+            return None
+
+        return _reduce(values, _percentile(percent))
+
+    def rate(self, count=None):
+        """Return the rate of change per second over the last count samples.
+
+        The rate is computed between the first and the last sample of the
+        window, None if there are less than two samples.
+        """
+
+        times, values = self.window(count)
+
+        if len(values) < 2 or times[-1] == times[0]:
+            return None
+
+        delta = times[-1] - times[0]
+
+        return _reduce([values[0], values[-1]],
+                       lambda x: (x[-1] - x[0]) / delta
+                       if len(x) == 2 else None)
+
+    def to_dict(self, count=None):
+        """Return the last count samples in columnar form."""
+
+        times, values = self.window(count)
+
+        return {'depth': self.depth,
+                'timestamps': times,
+                'values': [_jsonable(x) for x in values]}
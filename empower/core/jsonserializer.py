@@ -23,6 +23,7 @@ import types
 
 import empower.datatypes.etheraddress
 import empower.datatypes.ssid
+import empower.datatypes.plmnid
 
 
 class IterEncoder(json.JSONEncoder):
@@ -56,6 +57,9 @@ class EmpowerEncoder(IterEncoder):
         if isinstance(obj, empower.datatypes.etheraddress.EtherAddress):
             return str(obj)
 
+        if hasattr(obj, 'snapshot'):
+            return obj.snapshot()
+
         if hasattr(obj, 'to_dict'):
             return obj.to_dict()
 
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2016 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""EmPOWER request/response latency statistics.
+
+Polled modules record the time elapsed between each request and the
+matching response, as well as the requests that never got a response. The
+statistics are aggregated per module type and per module type and device
+(e.g. WTP).
+"""
+
+import bisect
+
+# histogram bins upper bounds in ms, the last bin collects the rest
+BINS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000]
+
+
+class LatencyHistogram:
+    """Latency histogram.
+
+    Attributes:
+        counts: the number of samples in each bin
+        samples: the number of samples
+        lost: the number of requests that timed out
+        total: the sum of the samples in ms
+        max: the largest sample in ms
+    """
+
+    def __init__(self):
+
+        self.counts = [0] * (len(BINS) + 1)
+        self.samples = 0
+        self.lost = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, latency):
+        """Add a sample (in ms)."""
+
+        self.counts[bisect.bisect_left(BINS, latency)] += 1
+        self.samples += 1
+        self.total += latency
+        self.max = max(self.max, latency)
+
+    def to_dict(self):
+        """Return JSON-serializable representation of the object."""
+
+        bins = ["<=%u" % x for x in BINS] + [">%u" % BINS[-1]]
+        avg = self.total / self.samples if self.samples else 0.0
+
+        return {'bins': dict(zip(bins, self.counts)),
+                'samples': self.samples,
+                'lost': self.lost,
+                'avg': avg,
+                'max': self.max}
+
+
+class LatencyStats:
+    """Latency statistics per module type and per module type and device.
+
+    Attributes:
+        modules: the histograms indexed by module type
+        devices: the histograms indexed by module type and device address
+    """
+
+    def __init__(self):
+
+        self.modules = {}
+        self.devices = {}
+
+    def __histograms(self, module_type, addr):
+        """Return the histograms for a module type and a device."""
+
+        if module_type not in self.modules:
+            self.modules[module_type] = LatencyHistogram()
+            self.devices[module_type] = {}
+
+        if addr not in self.devices[module_type]:
+            self.devices[module_type][addr] = LatencyHistogram()
+
+        return self.modules[module_type], self.devices[module_type][addr]
+
+    def add(self, module_type, addr, latency):
+        """Record a response received after latency ms."""
+
+        for histogram in self.__histograms(module_type, addr):
+            histogram.add(latency)
+
+    def lost(self, module_type, addr):
+        """Record a request that timed out."""
+
+        for histogram in self.__histograms(module_type, addr):
+            histogram.lost += 1
+
+    def to_dict(self):
+        """Return JSON-serializable representation of the object."""
+
+        out = {}
+
+        for module_type, histogram in self.modules.items():
+            out[module_type] = histogram.to_dict()
+            out[module_type]['devices'] = \
+                {str(k): v for k, v in self.devices[module_type].items()}
+
+        return out
+
+
+LATENCIES = LatencyStats()
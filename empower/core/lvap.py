@@ -17,6 +17,8 @@
 
 """EmPOWER Light Virtual Access Point (LVAP) class."""
 
+from contextlib import contextmanager
+
 from empower.core.resourcepool import ResourceBlock
 from empower.core.resourcepool import BANDS
 from empower.core.radioport import RadioPort
@@ -25,12 +27,13 @@ from empower.core.radioport import UplinkPort
 from empower.core.virtualport import VirtualPortLvap
 from empower.core.utils import generate_bssid
 from empower.core.tenant import T_TYPE_SHARED
+from empower.core.versioned import Versioned
 from empower.intentserver.intentserver import IntentServer
 
 from empower.main import RUNTIME
 
 
-class LVAP:
+class LVAP(Versioned):
     """ The EmPOWER Light Virtual Access Point
 
     One LVAP is created for every station probing the network (unless the MAC
@@ -82,6 +85,16 @@ class LVAP:
 
     where port is an instance of the RadioPort class.
 
+    Several changes can be pushed to the agents in a single step by grouping
+    them in a batch:
+
+      with lvap.batch():
+          lvap.tenant = tenant
+          lvap.assoc_id = assoc_id
+
+    In this case exactly one ADD_LVAP message is sent to each block when the
+    batch is closed (together with the pending port configurations).
+
     The last line will trigger a Port update message if the entry already
     exists. If the entry does not exists a ValueError message will be
     triggered. This is because the property blocks cannot be empty, then if
@@ -178,12 +191,19 @@ class LVAP:
         # pending ids
         self.pending = []
 
+        # batch state (nesting level, dirty fields, deferred messages)
+        self.__batch = 0
+        self.__dirty = set()
+        self.__pending_adds = {}
+        self.__pending_ports = {}
+
     @property
     def module_id(self):
         """Return new sequence id."""
 
         self.__module_id += 1
         self.pending.append(self.__module_id)
+        self.touch()
 
         return self.__module_id
 
@@ -218,8 +238,96 @@ class LVAP:
         else:
             self.poa_uuid = intent_server.add_poa(intent)
 
-    def refresh_lvap(self):
-        """Send add lvap message on the selected port."""
+    @contextmanager
+    def batch(self):
+        """Group LVAP changes.
+
+        ADD_LVAP and SET_PORT messages generated within the batch are
+        deferred and coalesced. When the outermost batch exits, at most one
+        ADD_LVAP and one SET_PORT message are sent to each block.
+        """
+
+        self.__batch += 1
+
+        try:
+            yield self
+        finally:
+            self.__batch -= 1
+            if not self.__batch:
+                self.__flush()
+
+    def __flush(self):
+        """Send the messages deferred by a batch."""
+
+        dirty = self.__dirty
+        pending_adds = self.__pending_adds
+        pending_ports = self.__pending_ports
+
+        self.__dirty = set()
+        self.__pending_adds = {}
+        self.__pending_ports = {}
+
+        for ports in (self._downlink, self._uplink):
+            for block in ports.keys():
+                if dirty or block in pending_adds:
+                    block.radio.connection.send_add_lvap(self, block,
+                                                         ports.SET_MASK)
+                if block in pending_adds:
+                    block.tx_policies[self.addr].invalidate()
+
+        for block, tx_policy in pending_ports.items():
+            if block in self._downlink or block in self._uplink:
+                tx_policy.flush()
+
+    def send_add_lvap(self, block, set_mask):
+        """Send add lvap message on the specified block."""
+
+        if self.__batch:
+            self.__pending_adds[block] = set_mask
+            return
+
+        block.radio.connection.send_add_lvap(self, block, set_mask)
+
+        # the agent has a new port, its tx policy must be pushed again
+        block.tx_policies[self.addr].invalidate()
+
+    def send_del_lvap(self, block):
+        """Send del lvap message on the specified block."""
+
+        # the add lvap message was never sent, just drop it
+        if block in self.__pending_adds:
+            del self.__pending_adds[block]
+            self.__pending_ports.pop(block, None)
+            return
+
+        self.__pending_ports.pop(block, None)
+
+        block.radio.connection.send_del_lvap(self)
+        block.tx_policies[self.addr].invalidate()
+
+    def send_set_port(self, block, tx_policy):
+        """Send set port message on the specified block.
+
+        The message is sent only if the tx policy differs from the one
+        last pushed to the agent.
+        """
+
+        if self.__batch:
+            self.__pending_ports[block] = tx_policy
+            return
+
+        tx_policy.flush()
+
+    def refresh_lvap(self, field=None):
+        """Send add lvap message on the selected port.
+
+        If a batch is in progress the field is marked as dirty and the
+        message is sent when the batch exits.
+        """
+
+        if self.__batch:
+            self.__dirty.add(field)
+            return
 
         for port in self._downlink.values():
             port.block.radio.connection.send_add_lvap(port.lvap, port.block,
@@ -243,7 +351,7 @@ class LVAP:
             return
 
         self._encap = encap
-        self.refresh_lvap()
+        self.refresh_lvap("encap")
 
     @property
     def assoc_id(self):
@@ -259,7 +367,7 @@ class LVAP:
             return
 
         self._assoc_id = assoc_id
-        self.refresh_lvap()
+        self.refresh_lvap("assoc_id")
 
     @property
     def lvap_bssid(self):
@@ -275,7 +383,7 @@ class LVAP:
             return
 
         self._lvap_bssid = lvap_bssid
-        self.refresh_lvap()
+        self.refresh_lvap("lvap_bssid")
 
     @property
     def ssids(self):
@@ -291,7 +399,7 @@ class LVAP:
             return
 
         self._ssids = ssids
-        self.refresh_lvap()
+        self.refresh_lvap("ssids")
 
     def set_ssids(self, ssids):
         """Set the ssids assigned to this LVAP without seding messages."""
@@ -321,7 +429,7 @@ class LVAP:
             return
 
         self._tenant = tenant
-        self.refresh_lvap()
+        self.refresh_lvap("tenant")
 
     @property
     def downlink(self):
@@ -372,11 +480,13 @@ class LVAP:
             if not isinstance(block, ResourceBlock):
                 raise TypeError("Invalid type: %s", type(block))
 
-        # Set downlink block if different.
-        self.__assign_downlink(pool[0])
+        with self.batch():
 
-        # set uplink blocks
-        self.__assign_uplink(pool[1:])
+            # Set downlink block if different.
+            self.__assign_downlink(pool[0])
+
+            # set uplink blocks
+            self.__assign_uplink(pool[1:])
 
         # send intents
         self.__set_ports()
@@ -474,6 +584,12 @@ class LVAP:
 
         self.block = []
 
+    def clear_uplink(self):
+        """Clear all uplink blocks."""
+
+        for block in list(self._uplink.keys()):
+            del self._uplink[block]
+
     def clear_lvap(self):
         """Clear all downlink blocks."""
 
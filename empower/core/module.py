@@ -19,50 +19,55 @@
 
 import re
 import json
+import time
 import types
-import xmlrpc.client
 
 import tornado.web
 import tornado.httpserver
+
 from tornado.ioloop import IOLoop
 
 from uuid import UUID
-from multiprocessing.pool import ThreadPool
 
 import empower.logger
 
 from empower.core.service import Service
+from empower.core.timerwheel import TIMER_WHEEL
+from empower.core.callbacks import CALLBACKS
+from empower.core.streams import STREAMS
+from empower.core.latency import LATENCIES
+from empower.core.history import History
+from empower.core.tsdb import TSDB
+from empower.core.tsdb import series_name
+from empower.core.versioned import Versioned
 from empower.core.jsonserializer import EmpowerEncoder
 from empower.restserver.apihandlers import EmpowerAPIHandlerAdminUsers
 from empower.restserver.restserver import RESTServer
 
 from empower.main import RUNTIME
 
-
-_WORKERS = ThreadPool(10)
+# window in ms over which the first requests of a bulk creation are spread
+STAGGER = 1000
 
 
-def exec_xmlrpc(callback, args=()):
+def exec_xmlrpc(callback, args=(), key=None):
     """Execute XML-RPC call."""
 
-    proxy = xmlrpc.client.ServerProxy(callback[0])
-    func = getattr(proxy, callback[1])
-    run_background(func, on_complete, args)
-
+    CALLBACKS.deliver(callback, args, key)
 
-def run_background(func, callback, args=(), kwds={}):
-    """Run callback in background."""
 
-    def _callback(result):
-        IOLoop.instance().add_callback(lambda: callback(result))
+def acquire_xmlrpc(callback):
+    """Reference the XML-RPC endpoint of callback (if remote)."""
 
-    _WORKERS.apply_async(func, args, kwds, _callback)
+    if isinstance(callback, list) and len(callback) == 2:
+        CALLBACKS.acquire(callback[0])
 
 
-def on_complete(res):
-    """XML RPC Callback."""
+def release_xmlrpc(callback):
+    """Release the XML-RPC endpoint of callback (if remote)."""
 
-    pass
+    if isinstance(callback, list) and len(callback) == 2:
+        CALLBACKS.release(callback[0])
 
 
 class ModuleHandler(EmpowerAPIHandlerAdminUsers):
@@ -75,10 +80,16 @@ class ModuleHandler(EmpowerAPIHandlerAdminUsers):
             [0]: tenant_id
             [1]: module_id
 
+        Query:
+            history: also return the last history samples of the modules
+                keeping a history (optional)
+
         Example URLs:
 
             GET /api/v1/tenants/52313ecb-9d00-4b7d-b873-b55d3d9ada26/<module>
             GET /api/v1/tenants/52313ecb-9d00-4b7d-b873-b55d3d9ada26/<module>/1
+            GET /api/v1/tenants/52313ecb-9d00-4b7d-b873-b55d3d9ada26/<module>/1
+              ?history=60
         """
 
         try:
@@ -88,8 +99,19 @@ class ModuleHandler(EmpowerAPIHandlerAdminUsers):
 
             tenant_id = UUID(args[0])
 
+            history = self.get_argument("history", default=None)
+
+            if history is not None:
+                history = int(history)
+                if history < 0:
+                    raise ValueError("Invalid history %s" % history)
+
             resp = {k: v for k, v in self.server.modules.items()
-                    if v.tenant_id == tenant_id}
+                    if v.tenant_id == tenant_id and v.attached}
+
+            if history is not None:
+                resp = {k: v.history_to_dict(history)
+                        for k, v in resp.items()}
 
             if len(args) == 1:
                 self.write_as_json(resp.values())
@@ -103,13 +125,17 @@ class ModuleHandler(EmpowerAPIHandlerAdminUsers):
             self.send_error(400, message=ex)
 
     def post(self, *args, **kwargs):
-        """Create a new module.
+        """Create a new module, or a list of modules.
 
         Args:
             [0]: tenant_id
 
         Request:
             version: the protocol version (1.0)
+            modules: the list of modules to be created (optional, if
+                missing the request itself describes a single module)
+            window: the window in ms over which the first requests of the
+                modules are spread (optional, bulk only)
 
         Example URLs:
 
@@ -129,6 +155,25 @@ class ModuleHandler(EmpowerAPIHandlerAdminUsers):
                 raise ValueError("missing version element")
 
             del request['version']
+
+            if "modules" in request:
+
+                if not isinstance(request['modules'], list):
+                    raise ValueError("modules must be a list")
+
+                for entry in request['modules']:
+                    if not isinstance(entry, dict):
+                        raise ValueError("invalid module %s" % entry)
+                    entry['tenant_id'] = tenant_id
+
+                window = int(request.get('window', STAGGER))
+                modules = self.server.add_modules(request['modules'], window)
+
+                self.set_status(201, None)
+                self.write_as_json([x.module_id for x in modules])
+
+                return
+
             request['tenant_id'] = tenant_id
             request['module_type'] = self.server.module.MODULE_NAME
             request['worker'] = self.server
@@ -170,7 +215,7 @@ class ModuleHandler(EmpowerAPIHandlerAdminUsers):
 
             module = self.server.modules[module_id]
 
-            if module.tenant_id != tenant_id:
+            if module.tenant_id != tenant_id or not module.attached:
                 raise KeyError("Module %u not found" % module_id)
 
             module.unload()
@@ -183,7 +228,7 @@ class ModuleHandler(EmpowerAPIHandlerAdminUsers):
         self.set_status(204, None)
 
 
-class Module():
+class Module(Versioned):
     """Module object.
 
     Attributes:
@@ -192,6 +237,9 @@ class Module():
         worker: the module worker responsible for reating new module instances.
         tenant_id: The tenant's Id for convenience (UUID)
         callback: Module callback (FunctionType)
+        history: the number of samples retained (0 disables the history)
+        series: the history of the samples (None if disabled)
+        persist: store the samples in the time-series store (bool)
     """
 
     REQUIRED = ['module_type', 'worker', 'tenant_id']
@@ -204,8 +252,194 @@ class Module():
         self.__tenant_id = None
         self.__callback = None
         self.__periodic = None
+        self.subscribers = {}
+        self.attached = True
+        self.sent = 0
+        self.received = 0
+        self.skipped = 0
+        self.lost = 0
+        self.__in_flight = None
+        self.__history = None
+        self.__persist = False
         self.log = empower.logger.get_logger()
 
+    @property
+    def persist(self):
+        """Return True if the samples are stored in the time-series store."""
+
+        return self.__persist
+
+    @persist.setter
+    def persist(self, value):
+        """Enable/disable the time-series store."""
+
+        if isinstance(value, str):
+            value = value.lower() in ('true', '1', 'yes')
+
+        self.__persist = bool(value)
+
+    @property
+    def persisted(self):
+        """Return True if the samples of this module must be stored."""
+
+        return self.__persist
+
+    @property
+    def metric(self):
+        """Return the series name prefix of this module.
+
+        The name is made of the tenant, the module type and the target, so
+        that it is stable across restarts. Modules without a target use
+        their module id.
+        """
+
+        targets = []
+
+        for target in ('lvap', 'wtp', 'block', 'lvnf'):
+            value = getattr(self, target, None)
+            if value is None:
+                continue
+            if target == 'block':
+                targets.append("%s-%s-%u-%u" % (value.radio.addr,
+                                                value.hwaddr,
+                                                value.channel,
+                                                value.band))
+            elif target == 'lvnf':
+                targets.append(_lvnf_id(value))
+            else:
+                targets.append(_addr(value))
+
+        if not targets:
+            targets.append(self.module_id)
+
+        return series_name(self.tenant_id, self.module_type, *targets)
+
+    @property
+    def history(self):
+        """Return the history depth."""
+
+        return self.__history.depth if self.__history is not None else 0
+
+    @history.setter
+    def history(self, value):
+        """Set the history depth (0 disables the history)."""
+
+        depth = int(value) if value else 0
+
+        if depth < 0:
+            raise ValueError("Invalid history %s" % value)
+
+        if depth == self.history:
+            return
+
+        self.__history = History(depth) if depth else None
+
+    @property
+    def series(self):
+        """Return the history of the samples."""
+
+        return self.__history
+
+    def sample(self):
+        """Return the current values of the module.
+
+        Modules supporting adaptive polling or history return the current
+        values (numbers, lists, or dictionaries), or None if there are no
+        values yet.
+        """
+
+        return None
+
+    @property
+    def observed(self):
+        """Return True if the samples must be computed."""
+
+        return self.__history is not None or self.persisted
+
+    def observe(self, sample):
+        """Process a new sample."""
+
+        if sample is None:
+            return
+
+        timestamp = time.time()
+
+        if self.__history is not None:
+            self.__history.append(timestamp, sample)
+
+        if self.persisted:
+            TSDB.append_sample(self.metric, timestamp, sample)
+
+    def history_to_dict(self, count):
+        """Return the JSON representation with the last count samples."""
+
+        out = dict(self.snapshot())
+
+        if self.__history is not None:
+            out['history'] = self.__history.to_dict(count)
+        else:
+            out['history'] = None
+
+        return out
+
+    @property
+    def in_flight(self):
+        """Return True if a request is waiting for its response."""
+
+        return self.__in_flight is not None
+
+    def request_sent(self, addr):
+        """Record a request sent to the device addr (e.g. a WTP)."""
+
+        self.__in_flight = (time.monotonic(), addr)
+        self.sent += 1
+
+    def request_completed(self):
+        """Record the response to the outstanding request, if any."""
+
+        if not self.__in_flight:
+            return
+
+        sent_at, addr = self.__in_flight
+        self.__in_flight = None
+        self.received += 1
+
+        latency = (time.monotonic() - sent_at) * 1000
+        LATENCIES.add(self.module_type, addr, latency)
+
+    def request_expired(self, timeout):
+        """Drop the outstanding request if older than timeout ms.
+
+        Returns:
+            True if the request has been dropped
+        """
+
+        if not self.__in_flight:
+            return False
+
+        sent_at, addr = self.__in_flight
+
+        if (time.monotonic() - sent_at) * 1000 < timeout:
+            return False
+
+        self.log.info("%s request to %s lost (id=%u)", self.module_type, addr,
+                      self.module_id)
+
+        self.__in_flight = None
+        self.lost += 1
+        LATENCIES.lost(self.module_type, addr)
+
+        return True
+
+    def requests_to_dict(self):
+        """Return the request counters."""
+
+        return {'sent': self.sent,
+                'received': self.received,
+                'skipped': self.skipped,
+                'lost': self.lost,
+                'in_flight': self.in_flight}
+
     def unload(self):
         """Remove this module."""
 
@@ -221,16 +455,28 @@ class Module():
             None
         """
 
+        # the module has been updated
+        self.touch()
+
+        # update history and adaptive polling
+        if self.observed:
+            self.observe(self.sample())
+
+        # push to stream subscribers
+        STREAMS.publish_module(self)
+
         # call callback if defined
-        if not self.callback:
-            return
+        if self.callback:
+            self.__exec_callback(self.callback, serializable)
 
-        callback = self.callback
+        # fan-out to subscribers
+        for subscriber in list(self.subscribers.values()):
+            subscriber.handle_callback(subscriber)
 
-        try:
+    def __exec_callback(self, callback, serializable):
+        """Execute the callback."""
 
-            as_dict = serializable.to_dict()
-            as_json = json.dumps(as_dict, cls=EmpowerEncoder)
+        try:
 
             if isinstance(callback, types.FunctionType) or \
                isinstance(callback, types.MethodType):
@@ -239,7 +485,14 @@ class Module():
 
             elif isinstance(callback, list) and len(callback) == 2:
 
-                exec_xmlrpc(callback, (as_json, ))
+                if hasattr(serializable, 'snapshot_json'):
+                    as_json = serializable.snapshot_json()
+                else:
+                    as_json = json.dumps(serializable.to_dict(),
+                                         cls=EmpowerEncoder)
+
+                exec_xmlrpc(callback, (as_json, ),
+                            (self.module_type, self.module_id))
 
             else:
 
@@ -267,7 +520,10 @@ class Module():
         out = {'id': self.module_id,
                'module_type': self.module_type,
                'tenant_id': self.tenant_id,
-               'callback': self.callback}
+               'callback': self.callback,
+               'history': self.history,
+               'persist': self.persist,
+               'requests': self.requests_to_dict()}
 
         return out
 
@@ -314,6 +570,8 @@ class Module():
         if isinstance(other, Module):
             return self.module_type == other.module_type and \
                 self.tenant_id == other.tenant_id and \
+                self.history == other.history and \
+                self.persist == other.persist and \
                 self.callback == other.callback
 
         return False
@@ -360,12 +618,220 @@ class ModuleTrigger(Module):
     pass
 
 
+def within_tolerance(old, new, tolerance):
+    """Return True if new differs from old by at most tolerance.
+
+    Numbers are compared relatively to their magnitude, dictionaries and
+    lists element by element (their keys/lengths must match), everything
+    else must be equal.
+    """
+
+    if isinstance(old, dict) and isinstance(new, dict):
+        return old.keys() == new.keys() and \
+            all(within_tolerance(old[k], new[k], tolerance) for k in old)
+
+    if isinstance(old, (list, tuple)) and isinstance(new, (list, tuple)):
+        return len(old) == len(new) and \
+            all(within_tolerance(x, y, tolerance) for x, y in zip(old, new))
+
+    if isinstance(old, (int, float)) and isinstance(new, (int, float)):
+        return abs(new - old) <= tolerance * max(abs(old), abs(new))
+
+    return old == new
+
+
 class ModulePeriodic(Module):
-    """Module Scheduled object."""
+    """Module Scheduled object.
+
+    Periodic modules polling the same target with the same parameters are
+    shared: the first module is the poll, the following ones are attached to
+    it as subscribers (see ModuleSubscriber). The poll runs with the period
+    of the fastest subscriber and is stopped when the last subscriber is
+    unloaded.
+
+    A new request is not sent while the previous one is still waiting for
+    its response: the tick is skipped and, as soon as the response arrives,
+    a single request is sent in place of all the skipped ones. Requests
+    without a response for timeout ms (by default three times the period)
+    are counted as lost.
+
+    Adaptive polling is enabled by setting max_every. In this case every is
+    the minimum period: the period is doubled (up to max_every) every time a
+    response is within tolerance from the previous one (see sample()), and
+    it is reset to every as soon as a change is detected or a new subscriber
+    is attached.
+    """
 
     def __init__(self):
         super().__init__()
         self.__every = 5000
+        self.__max_every = None
+        self.__tolerance = 0.05
+        self.__adaptive_every = None
+        self.__last_sample = None
+        self.__timeout = None
+        self.__deferred = False
+        self.__periodic = None
+
+    @property
+    def period(self):
+        """Return the effective polling period."""
+
+        periods = [x.every for x in self.subscribers.values()]
+
+        if self.attached:
+            if self.adaptive and self.__adaptive_every:
+                periods.append(self.__adaptive_every)
+            else:
+                periods.append(self.every)
+
+        return min(periods) if periods else self.every
+
+    @property
+    def max_every(self):
+        """Return the max period (None if adaptive polling is disabled)."""
+
+        return self.__max_every
+
+    @max_every.setter
+    def max_every(self, value):
+        """Set the max period."""
+
+        self.__max_every = int(value) if value is not None else None
+
+    @property
+    def tolerance(self):
+        """Return the tolerance."""
+
+        return self.__tolerance
+
+    @tolerance.setter
+    def tolerance(self, value):
+        """Set the tolerance (relative difference, e.g. 0.05)."""
+
+        if float(value) < 0:
+            raise ValueError("Invalid tolerance %s" % value)
+
+        self.__tolerance = float(value)
+
+    @property
+    def timeout(self):
+        """Return the response timeout in ms."""
+
+        if self.__timeout:
+            return self.__timeout
+
+        return 3 * self.period
+
+    @timeout.setter
+    def timeout(self, value):
+        """Set the response timeout in ms (None for the default)."""
+
+        self.__timeout = int(value) if value is not None else None
+
+    def __tick(self):
+        """Poll, unless the previous request is still outstanding."""
+
+        if self.in_flight and not self.request_expired(self.timeout):
+            self.skipped += 1
+            self.__deferred = True
+            return
+
+        self.__deferred = False
+        self.run_once()
+
+    def __run_deferred(self):
+        """Send the request deferred while waiting for a response."""
+
+        if self.worker.modules.get(self.module_id) is not self:
+            return
+
+        if self.__deferred and not self.in_flight:
+            self.__deferred = False
+            self.run_once()
+
+    def request_completed(self):
+
+        super().request_completed()
+
+        if self.__deferred:
+            IOLoop.current().add_callback(self.__run_deferred)
+
+    @property
+    def adaptive(self):
+        """Return True if adaptive polling is enabled."""
+
+        return self.max_every is not None and self.every != -1
+
+    def reset_period(self):
+        """Reset the adaptive polling period to every."""
+
+        self.__adaptive_every = None
+        self.update_period()
+
+    @property
+    def persisted(self):
+        """Return True if this poll or any of its subscribers persists."""
+
+        return self.persist or \
+            any(x.persist for x in self.subscribers.values())
+
+    @property
+    def observed(self):
+        """Return True if the samples must be computed."""
+
+        return super().observed or self.adaptive
+
+    def observe(self, sample):
+
+        super().observe(sample)
+
+        if self.adaptive:
+            self.__adapt(sample)
+
+    def __adapt(self, sample):
+        """Update the adaptive polling period after a new response.
+
+        The period is backed off only if the sample (see sample()) is within
+        tolerance of the previous one.
+        """
+
+        if sample is None:
+            return
+
+        last, self.__last_sample = self.__last_sample, sample
+
+        if last is None or not within_tolerance(last, sample, self.tolerance):
+            self.__adaptive_every = None
+        else:
+            current = self.__adaptive_every or self.every
+            self.__adaptive_every = \
+                max(min(current * 2, self.max_every), self.every)
+
+        self.update_period()
+
+    def update_period(self):
+        """Reschedule the poll if the effective period changed."""
+
+        if not self.__periodic or not self.__periodic.is_running():
+            return
+
+        if self.__periodic.every == self.period:
+            return
+
+        self.__periodic.stop()
+        self.__schedule()
+
+    def poll_key(self):
+        """Return the key of the poll performed by this module.
+
+        Modules with the same key poll the same target with the same
+        parameters, regardless of callback and period, and can share a
+        single poll. Subclasses extend the key with their target and
+        parameters.
+        """
+
+        return (self.module_type, self.tenant_id)
 
     @property
     def every(self):
@@ -386,9 +852,15 @@ class ModulePeriodic(Module):
             self.run_once()
             return
 
+        self.__schedule()
+
+    def __schedule(self):
+        """Schedule the poll on the timer wheel."""
+
+        key = "%s-%s-%u" % (self.module_type, self.tenant_id, self.module_id)
+
         self.__periodic = \
-            tornado.ioloop.PeriodicCallback(self.run_once, self.every)
-        self.__periodic.start()
+            TIMER_WHEEL.add_timer(self.__tick, self.period, key)
 
     def stop(self):
         """Stop worker."""
@@ -405,21 +877,230 @@ class ModulePeriodic(Module):
                'module_type': self.module_type,
                'tenant_id': self.tenant_id,
                'every': self.every,
-               'callback': self.callback}
+               'max_every': self.max_every,
+               'tolerance': self.tolerance,
+               'period': self.period,
+               'timeout': self.timeout,
+               'subscribers': sorted(self.subscribers.keys()),
+               'callback': self.callback,
+               'history': self.history,
+               'persist': self.persist,
+               'requests': self.requests_to_dict()}
 
         return out
 
     def __eq__(self, other):
 
-        if isinstance(other, Module):
-            return self.module_type == other.module_type and \
-                self.tenant_id == other.tenant_id and \
+        if isinstance(other, (ModulePeriodic, ModuleSubscriber)):
+            return self.poll_key() == other.poll_key() and \
                 self.every == other.every and \
+                self.max_every == other.max_every and \
+                self.tolerance == other.tolerance and \
+                self.history == other.history and \
+                self.persist == other.persist and \
                 self.callback == other.callback
 
         return False
 
 
+class ModuleSubscriber(Module):
+    """A subscription to a shared periodic module.
+
+    The subscriber has its own module id, callback, and period, but it does
+    not poll: the poll is performed by the shared module and the results are
+    delivered to each subscriber's callback. All the other attributes are
+    read from the shared module.
+
+    Attributes:
+        poll: the shared ModulePeriodic object
+        every: the period requested by this subscriber
+    """
+
+    def __init__(self, module, poll):
+
+        super().__init__()
+
+        self.poll = poll
+        self.module_type = module.module_type
+        self.worker = module.worker
+        self.tenant_id = module.tenant_id
+        self.callback = module.callback
+        self.every = module.every
+        self.history = module.history
+        self.persist = module.persist
+
+    def __getattr__(self, name):
+
+        poll = self.__dict__.get('poll')
+
+        if poll is None:
+            raise AttributeError(name)
+
+        return getattr(poll, name)
+
+    @property
+    def version(self):
+        """Return the version, including the version of the poll."""
+
+        return (super().version, self.poll.version)
+
+    def to_dict(self):
+        """Return JSON-serializable representation of the object."""
+
+        out = self.poll.to_dict()
+
+        out['id'] = self.module_id
+        out['every'] = self.every
+        out['callback'] = self.callback
+        out['history'] = self.history
+        out['persist'] = self.persist
+        out['poll'] = self.poll.module_id
+        del out['subscribers']
+
+        return out
+
+    def poll_key(self):
+        """Return the key of the shared poll."""
+
+        return self.poll.poll_key()
+
+    def __eq__(self, other):
+
+        if isinstance(other, (ModulePeriodic, ModuleSubscriber)):
+            return self.poll_key() == other.poll_key() and \
+                self.every == other.every and \
+                self.history == other.history and \
+                self.persist == other.persist and \
+                self.callback == other.callback
+
+        return False
+
+    @property
+    def persisted(self):
+        """The samples are stored once, by the poll."""
+
+        return False
+
+    def sample(self):
+        """Return the current values of the poll."""
+
+        return self.poll.sample()
+
+    def __hash__(self):
+        return hash(str(self.tenant_id) + str(self.module_id))
+
+    def start(self):
+        """Subscribers do not poll."""
+
+        pass
+
+    def run_once(self):
+        """Subscribers do not poll."""
+
+        pass
+
+
+def _addr(value):
+    """Return the address of a LVAP/WTP object or the address itself."""
+
+    return getattr(value, 'addr', value)
+
+
+def _lvnf_id(value):
+    """Return the id of a LVNF object or the id itself."""
+
+    return getattr(value, 'lvnf_id', value)
+
+
+class ModuleRegistry(dict):
+    """Dictionary of modules indexed by target.
+
+    Maps module ids to modules like a plain dictionary, and keeps track of
+    the modules sharing the same canonical key, i.e. the same module type,
+    tenant, and target (LVAP, WTP, block, LVNF). The secondary indexes map
+    each target and tenant to the ids of the modules referring to it.
+    """
+
+    TARGETS = {'tenant_id': lambda x: x,
+               'lvap': _addr,
+               'wtp': _addr,
+               'block': lambda x: x,
+               'lvnf': _lvnf_id}
+
+    def __init__(self):
+        super().__init__()
+        self.__keys = {}
+        self.__targets = {target: {} for target in self.TARGETS}
+
+    def __targets_of(self, module):
+        """Return the (target, value) pairs of a module."""
+
+        out = []
+
+        for target, normalize in self.TARGETS.items():
+            value = getattr(module, target, None)
+            if value is not None:
+                out.append((target, normalize(value)))
+
+        return out
+
+    def key(self, module):
+        """Return the canonical key of a module."""
+
+        return (module.module_type,) + tuple(self.__targets_of(module))
+
+    def __setitem__(self, module_id, module):
+
+        if module_id in self:
+            del self[module_id]
+
+        super().__setitem__(module_id, module)
+
+        key = self.key(module)
+        self.__keys.setdefault(key, {})[module_id] = module
+
+        for target, value in self.__targets_of(module):
+            self.__targets[target].setdefault(value, set()).add(module_id)
+
+    def __delitem__(self, module_id):
+
+        module = self[module_id]
+
+        super().__delitem__(module_id)
+
+        key = self.key(module)
+        del self.__keys[key][module_id]
+        if not self.__keys[key]:
+            del self.__keys[key]
+
+        for target, value in self.__targets_of(module):
+            self.__targets[target][value].discard(module_id)
+            if not self.__targets[target][value]:
+                del self.__targets[target][value]
+
+    def matches(self, module):
+        """Return the modules with the same canonical key as module."""
+
+        return list(self.__keys.get(self.key(module), {}).values())
+
+    def find(self, target, value):
+        """Return the ids of the modules referring to the specified target.
+
+        Args:
+            target, one of tenant_id, lvap, wtp, block, lvnf
+            value, the target (or its address/id)
+
+        Returns:
+            a list of module ids
+
+        Raises:
+            KeyError, if target is not indexed
+        """
+
+        normalize = self.TARGETS[target]
+        return sorted(self.__targets[target].get(normalize(value), ()))
+
+
 class ModuleWorker(Service):
     """Module worker.
 
@@ -438,7 +1119,7 @@ class ModuleWorker(Service):
         super().__init__(every=-1)
 
         self.__module_id = 0
-        self.modules = {}
+        self.modules = ModuleRegistry()
         self.pt_type = pt_type
         self.pt_packet = pt_packet
         self.module = module
@@ -503,8 +1184,8 @@ class ModuleWorker(Service):
         self.__module_id += 1
         return self.__module_id
 
-    def add_module(self, **kwargs):
-        """Add a new module."""
+    def __build(self, kwargs):
+        """Validate the parameters and instantiate a new module."""
 
         # check if module type has been set
         if not self.module:
@@ -537,11 +1218,32 @@ class ModuleWorker(Service):
                 raise ValueError("Invalid param %s" % arg)
             setattr(module, arg, kwargs[arg])
 
+        return module
+
+    def __register(self, module):
+        """Register a new module.
+
+        Returns:
+            the module (or the equivalent module already registered, or the
+            subscriber of an existing poll), and True if the module must be
+            started
+        """
+
+        # only modules with the same type, tenant, and target can match
+        matches = self.modules.matches(module)
+
         # check if an equivalent module has already been defined in the tenant
-        for val in self.modules.values():
+        for val in matches:
             # if so return a reference to that trigger
-            if val == module:
-                return val
+            if val.attached and val == module:
+                return val, False
+
+        # check if the same target is already polled, if so subscribe to it
+        if isinstance(module, ModulePeriodic) and module.every != -1:
+            for val in matches:
+                if isinstance(val, ModulePeriodic) and val.every != -1 and \
+                   val.poll_key() == module.poll_key():
+                    return self.__subscribe(val, module), False
 
         # otherwise generate a new module id
         module.module_id = self.module_id
@@ -551,15 +1253,107 @@ class ModuleWorker(Service):
 
         # add to dict
         self.modules[module.module_id] = module
+        acquire_xmlrpc(module.callback)
+
+        return module, True
+
+    def add_module(self, **kwargs):
+        """Add a new module."""
+
+        module, start = self.__register(self.__build(kwargs))
 
         # start module
-        self.modules[module.module_id].start()
+        if start:
+            module.start()
 
         return module
 
+    def add_modules(self, requests, window=STAGGER):
+        """Add a list of modules.
+
+        All the requests are validated before any module is registered.
+        Periodic modules are phased by the timer wheel, so their first poll
+        already falls somewhere within the period. The other modules send
+        their first request as soon as they are started: their start is
+        spread over window ms.
+
+        Args:
+            requests: a list of dictionaries with the add_module() params
+            window: the window in ms over which the first requests are
+                spread
+
+        Returns:
+            the list of modules, in the same order as the requests
+
+        Raises:
+            ValueError, if any of the requests is invalid
+        """
+
+        if window < 0:
+            raise ValueError("Invalid window %s" % window)
+
+        built = []
+
+        for index, request in enumerate(requests):
+            try:
+                built.append(self.__build(dict(request)))
+            except ValueError as ex:
+                raise ValueError("module %u: %s" % (index, ex))
+
+        out = []
+        deferred = []
+
+        for module in built:
+
+            module, start = self.__register(module)
+            out.append(module)
+
+            if not start:
+                continue
+
+            if isinstance(module, ModulePeriodic) and module.every != -1:
+                module.start()
+            else:
+                deferred.append(module)
+
+        for index, module in enumerate(deferred):
+            delay = window * index / len(deferred) / 1000
+            IOLoop.current().call_later(delay, self.__start_deferred, module)
+
+        return out
+
+    def __start_deferred(self, module):
+        """Start a module, unless it has been removed in the meantime."""
+
+        if self.modules.get(module.module_id) is module:
+            module.start()
+
+    def __subscribe(self, poll, module):
+        """Attach a new subscriber to an existing poll."""
+
+        subscriber = ModuleSubscriber(module, poll)
+        subscriber.module_id = self.module_id
+
+        self.modules[subscriber.module_id] = subscriber
+        acquire_xmlrpc(subscriber.callback)
+        poll.subscribers[subscriber.module_id] = subscriber
+        poll.touch()
+        poll.reset_period()
+
+        self.log.info("Subscribing %s (id=%u) to id=%u", module.module_type,
+                      subscriber.module_id, poll.module_id)
+
+        return subscriber
+
     def remove_module(self, module_id):
         """Remove a module.
 
+        Removing a subscriber detaches it from its poll, the poll is removed
+        with its last subscriber. Removing a poll that still has subscribers
+        only removes its own callback. Removing a poll that has already been
+        removed by its owner (e.g. because its target is gone), also removes
+        all its subscribers.
+
         Args:
             module_id, the tenant id
 
@@ -576,12 +1370,48 @@ class ModuleWorker(Service):
 
         module = self.modules[module_id]
 
+        if isinstance(module, ModuleSubscriber):
+
+            self.log.info("Unsubscribing %s (id=%u) from id=%u",
+                          module.module_type, module.module_id,
+                          module.poll.module_id)
+
+            poll = module.poll
+            del poll.subscribers[module_id]
+            poll.touch()
+            del self.modules[module_id]
+            release_xmlrpc(module.callback)
+
+            if poll.attached or poll.subscribers:
+                poll.update_period()
+                return
+
+            module = poll
+
+        elif module.subscribers and module.attached:
+
+            self.log.info("Detaching %s (id=%u)", module.module_type,
+                          module.module_id)
+
+            module.attached = False
+            release_xmlrpc(module.callback)
+            module.callback = None
+            module.update_period()
+            return
+
+        for subscriber_id, subscriber in list(module.subscribers.items()):
+            del self.modules[subscriber_id]
+            release_xmlrpc(subscriber.callback)
+
+        module.subscribers = {}
+
         self.log.info("Removing %s (id=%u)", module.module_type,
                       module.module_id)
 
         module.stop()
 
-        del self.modules[module_id]
+        del self.modules[module.module_id]
+        release_xmlrpc(module.callback)
 
 
 class ModuleEventWorker(ModuleWorker):
@@ -597,6 +1427,8 @@ class ModuleEventWorker(ModuleWorker):
     def handle_packet(self, event):
         """Handle response message."""
 
+        STREAMS.publish_event(self.module.MODULE_NAME, event)
+
         for module in self.modules.values():
 
             if module.tenant_id not in RUNTIME.tenants:
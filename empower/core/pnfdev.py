@@ -23,12 +23,14 @@ from empower.main import RUNTIME
 
 import empower.logger
 
+from empower.core.versioned import Versioned
+
 P_STATE_DISCONNECTED = "disconnected"
 P_STATE_CONNECTED = "connected"
 P_STATE_ONLINE = "online"
 
 
-class BasePNFDev:
+class BasePNFDev(Versioned):
     """A Programmable Network Fabric Device (PNFDev).
 
     The PNFDev State machine is the following:
@@ -61,7 +63,8 @@ class BasePNFDev:
         self.feed = None
         self.__seq = 0
         self.period = 0
-        self.ports = {}
+        self.__ifaces = {}
+        self.__ports = {}
         self.__state = P_STATE_DISCONNECTED
         self.log = empower.logger.get_logger()
 
@@ -137,14 +140,33 @@ class BasePNFDev:
         # generate register message
         self.__connection.send_register_message_to_self()
 
+    @property
+    def ports(self):
+        """Return the OVS ports indexed by port id."""
+
+        return self.__ports
+
+    @ports.setter
+    def ports(self, ports):
+        """Set the OVS ports."""
+
+        self.__ports = {}
+        self.__ifaces = {}
+
+        for port in ports.values():
+            self.add_port(port)
+
+    def add_port(self, port):
+        """Add an OVS port."""
+
+        self.__ports[port.port_id] = port
+        self.__ifaces[port.iface] = port
+        self.touch()
+
     def port(self, ifname="empower0"):
         """Return OVS port."""
 
-        for port in self.ports.values():
-            if port.iface == ifname:
-                return port
-
-        return None
+        return self.__ifaces.get(ifname)
 
     @property
     def connection(self):
@@ -268,10 +268,19 @@ class BaseTenantPNFDevHandler(EmpowerAPIHandlerAdminUsers):
 
 
 class PNFPServer(Service):
-    """Exposes the PNF Protocol API."""
+    """Exposes the PNF Protocol API.
+
+    Incoming messages are dispatched using a table which is compiled when
+    message types and handlers are registered. Each entry of the table is a
+    tuple (parser, built-in handler, extension handlers) where the built-in
+    handler is the name of the connection method handling the message (or
+    None) and the extension handlers are the handlers registered by the
+    other components.
+    """
 
     PNFDEV = None
     TBL_PNFDEV = None
+    CONNECTION = None
 
     def __init__(self, port, pt_types, pt_types_handlers):
 
@@ -282,6 +291,10 @@ class PNFPServer(Service):
         self.__load_belongs()
         self.pt_types = pt_types
         self.pt_types_handlers = pt_types_handlers
+        self.dispatch = {}
+
+        for pt_type in set(self.pt_types) | set(self.pt_types_handlers):
+            self.compile_message(pt_type)
 
     @property
     def pnfdevs(self):
@@ -319,6 +332,8 @@ class PNFPServer(Service):
 
             tenant_pnfdevs[pnfdev.addr] = pnfdev
 
+        RUNTIME.invalidate_ssids()
+
     def to_dict(self):
         """ Return a dict representation of the object. """
 
@@ -365,6 +380,42 @@ class PNFPServer(Service):
         session.delete(pnfdev)
         session.commit()
 
+    def message_name(self, pt_type):
+        """Return the name used to look up the built-in handler."""
+
+        parser = self.pt_types.get(pt_type)
+
+        if not parser:
+            return None
+
+        return parser.name
+
+    def compile_message(self, pt_type):
+        """Compile the dispatch table entry for the specified type.
+
+        Returns the (parser, built-in handler, extension handlers) tuple. The
+        entry is saved in the dispatch table only if the message type is
+        known or if somebody is listening for it.
+        """
+
+        parser = self.pt_types.get(pt_type)
+        handlers = tuple(self.pt_types_handlers.get(pt_type, ()))
+        builtin = None
+
+        name = self.message_name(pt_type)
+
+        if name and self.CONNECTION:
+            method = "_handle_%s" % name
+            if hasattr(self.CONNECTION, method):
+                builtin = method
+
+        entry = (parser, builtin, handlers)
+
+        if pt_type in self.pt_types or handlers or builtin:
+            self.dispatch[pt_type] = entry
+
+        return entry
+
     def register_message(self, pt_type, parser, handler):
         """ Register new handler. This will be called after the default. """
 
@@ -377,6 +428,8 @@ class PNFPServer(Service):
         if handler:
             self.pt_types_handlers[pt_type].append(handler)
 
+        self.compile_message(pt_type)
+
     def register_message_handler(self, pt_type, handler):
         """ Register new handler. This will be called after the default. """
 
@@ -385,3 +438,5 @@ class PNFPServer(Service):
 
         if handler:
             self.pt_types_handlers[pt_type].append(handler)
+
+        self.compile_message(pt_type)
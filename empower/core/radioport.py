@@ -20,6 +20,8 @@
 from empower.core.resourcepool import ResourceBlock
 from empower.core.resourcepool import BT_HT20
 
+from empower.main import RUNTIME
+
 
 class RadioPort():
     """RadioPort class.
@@ -68,6 +70,19 @@ class RadioPort():
 
         return self._block.tx_policies[self._lvap.addr]
 
+    def update(self, **fields):
+        """Update one or more tx policy fields for this port.
+
+        The SET_PORT message is sent through the LVAP, so that it is
+        deferred if an LVAP batch is in progress, and only if the effective
+        policy changed.
+        """
+
+        tx_policy = self.tx_policy
+        tx_policy.apply(**fields)
+
+        self._lvap.send_set_port(self._block, tx_policy)
+
     @property
     def lvap(self):
         """ Return the lvap. """
@@ -102,7 +117,7 @@ class RadioPort():
     def mcs(self, mcs):
         """ Set the list of MCS. """
 
-        self._block.tx_policies[self._lvap.addr].mcs = mcs
+        self.update(mcs=mcs)
 
     @property
     def ht_mcs(self):
@@ -114,7 +129,7 @@ class RadioPort():
     def ht_mcs(self, ht_mcs):
         """ Set the list of HT MCS. """
 
-        self._block.tx_policies[self._lvap.addr].ht_mcs = ht_mcs
+        self.update(ht_mcs=ht_mcs)
 
     @property
     def no_ack(self):
@@ -126,7 +141,7 @@ class RadioPort():
     def no_ack(self, no_ack):
         """ Set the no ack flag. """
 
-        self._block.tx_policies[self._lvap.addr].no_ack = no_ack
+        self.update(no_ack=no_ack)
 
     @property
     def rts_cts(self):
@@ -138,7 +153,7 @@ class RadioPort():
     def rts_cts(self, rts_cts):
         """ Set rts_cts . """
 
-        self._block.tx_policies[self._lvap.addr].rts_cts = rts_cts
+        self.update(rts_cts=rts_cts)
 
     def __eq__(self, other):
 
@@ -161,14 +176,36 @@ class RadioPortProp(dict):
     MAX_PORTS = 1
     SET_MASK = True
 
+    def __index(self, key, lvap):
+        """Add the LVAP to the WTP -> LVAPs index."""
+
+        lvap.touch()
+        RUNTIME.add_hosted_lvap(key.radio, lvap, self.SET_MASK)
+
+    def __unindex(self, key, lvap):
+        """Remove the LVAP from the WTP -> LVAPs index."""
+
+        lvap.touch()
+
+        # other blocks on the same wtp are still assigned
+        for block in dict.keys(self):
+            if block.radio == key.radio:
+                return
+
+        RUNTIME.remove_hosted_lvap(key.radio, lvap, self.SET_MASK)
+
     def delitem(self, key):
         """Notice this will del the item without sending out any message."""
 
         if not isinstance(key, ResourceBlock):
             raise KeyError("Expected ResourceBlock, got %s" % type(key))
 
+        port = dict.__getitem__(self, key)
+
         dict.__delitem__(self, key)
 
+        self.__unindex(key, port.lvap)
+
     def __delitem__(self, key):
 
         if not isinstance(key, ResourceBlock):
@@ -181,10 +218,12 @@ class RadioPortProp(dict):
         # is an LVAP object)
         stream = key.radio.connection.stream
         if stream and not stream.closed():
-            key.radio.connection.send_del_lvap(port.lvap)
+            port.lvap.send_del_lvap(key)
 
         dict.__delitem__(self, key)
 
+        self.__unindex(key, port.lvap)
+
     def setitem(self, key, value):
         """Notice this will set the item without sending out any message."""
 
@@ -211,6 +250,8 @@ class RadioPortProp(dict):
             # update dict
             dict.__setitem__(self, key, value)
 
+            self.__index(key, value.lvap)
+
     def __setitem__(self, key, value):
 
         if not isinstance(key, ResourceBlock):
@@ -226,7 +267,7 @@ class RadioPortProp(dict):
             dict.__setitem__(self, key, value)
 
             # update Port configuration
-            key.radio.connection.send_set_port(value.tx_policy)
+            value.lvap.send_set_port(key, value.tx_policy)
 
         # the block is not found, max_ports is exceed
         elif dict.__len__(self) == self.MAX_PORTS:
@@ -239,11 +280,13 @@ class RadioPortProp(dict):
             # update dict
             dict.__setitem__(self, key, value)
 
+            self.__index(key, value.lvap)
+
             # update LVAP configuration
-            key.radio.connection.send_add_lvap(value.lvap, key, self.SET_MASK)
+            value.lvap.send_add_lvap(key, self.SET_MASK)
 
             # update Port configuration
-            key.radio.connection.send_set_port(value.tx_policy)
+            value.lvap.send_set_port(key, value.tx_policy)
 
     def __getitem__(self, key):
 
@@ -17,7 +17,14 @@
 
 """EmPOWER resouce pool and resource block classes."""
 
+from contextlib import contextmanager
+
 from empower.datatypes.etheraddress import EtherAddress
+from empower.core.versioned import Versioned
+from empower.core.versioned import VersionedDict
+from empower.core.cqm import CQM
+from empower.core.cqm import UCQM_MATRIX
+from empower.core.cqm import NCQM_MATRIX
 
 BT_L20 = 0
 BT_HT20 = 1
@@ -48,7 +55,7 @@ REVERSE_TX_MCAST = {TX_MCAST_LEGACY_H: TX_MCAST_LEGACY,
                     TX_MCAST_UR_H: TX_MCAST_UR}
 
 
-class TxPolicyProp(dict):
+class TxPolicyProp(VersionedDict):
     """Override getitem behaviour by a default TxPolicy."""
 
     def __init__(self, block, *args, **kwargs):
@@ -60,16 +67,27 @@ class TxPolicyProp(dict):
             return dict.__getitem__(self, key)
         except KeyError:
             value = TxPolicy(key, self.block)
-            dict.__setitem__(self, key, value)
+            self[key] = value
             return dict.__getitem__(self, key)
 
 
-class TxPolicy:
+class TxPolicy(Versioned):
     """Transmission policy.
 
     A transmission policy is a set of rule that must be used by the rate
     control algorithm to select the actual transmission rate.
 
+    Changes are pushed to the agent with a SET_PORT message. Several fields
+    can be changed at once using update(), in which case a single message is
+    sent. The policy keeps track of the last state pushed to (or reported
+    by) the agent and no message is sent if the effective policy did not
+    change. Within a batch() the push is deferred until the outermost batch
+    exits:
+
+      with txp.batch():
+          txp.mcast = TX_MCAST_LEGACY
+          txp.ht_mcs = [0]
+
     Attributes:
         block: the actuall block to which this tx policy refers to
         hwaddr: the mac address of the wireless interface
@@ -83,6 +101,8 @@ class TxPolicy:
           an 11n device it will report [0, 1, 2, 3, 4, 5, 6, 7]
     """
 
+    FIELDS = ('no_ack', 'rts_cts', 'mcast', 'mcs', 'ht_mcs', 'ur_count')
+
     def __init__(self, addr, block):
 
         self.addr = addr
@@ -93,6 +113,8 @@ class TxPolicy:
         self._mcs = block.supports
         self._ht_mcs = block.ht_supports
         self._ur_count = 3
+        self.__batch = 0
+        self.__pushed = None
 
     def to_dict(self):
         """Return a json-frinedly representation of the object."""
@@ -114,6 +136,94 @@ class TxPolicy:
             (self.addr, self.no_ack, self.rts_cts, TX_MCAST[self.mcast],
              mcs, ht_mcs, self.ur_count)
 
+    @property
+    def state(self):
+        """ Return the effective policy as sent in a SET_PORT message. """
+
+        return (self._no_ack,
+                self._rts_cts,
+                self._mcast,
+                tuple(sorted(self._mcs)),
+                tuple(sorted(self._ht_mcs)),
+                self._ur_count)
+
+    @contextmanager
+    def batch(self):
+        """Defer the SET_PORT message until the outermost batch exits."""
+
+        self.__batch += 1
+
+        try:
+            yield self
+        finally:
+            self.__batch -= 1
+            if not self.__batch:
+                self.flush()
+
+    def apply(self, **fields):
+        """Set one or more fields without pushing them to the agent."""
+
+        for field in fields:
+            if field not in self.FIELDS:
+                raise ValueError("Invalid tx policy field %s" % field)
+
+        if 'no_ack' in fields:
+            self._no_ack = True if fields['no_ack'] else False
+
+        if 'rts_cts' in fields:
+            self._rts_cts = int(fields['rts_cts'])
+
+        if 'mcast' in fields:
+            mcast = fields['mcast']
+            self._mcast = mcast if mcast in TX_MCAST else TX_MCAST_LEGACY
+
+        if 'mcs' in fields:
+            self._mcs = self.block.supports & set(fields['mcs'])
+            if not self._mcs:
+                self._mcs = self.block.supports
+
+        if 'ht_mcs' in fields:
+            self._ht_mcs = self.block.ht_supports & set(fields['ht_mcs'])
+            if not self._ht_mcs:
+                self._ht_mcs = self.block.ht_supports
+
+        if 'ur_count' in fields:
+            self._ur_count = int(fields['ur_count'])
+
+    def update(self, **fields):
+        """Set one or more fields and push the policy to the agent.
+
+        At most one SET_PORT message is sent, and only if the effective
+        policy differs from the last one pushed to the agent.
+        """
+
+        self.apply(**fields)
+        self.flush()
+
+    def flush(self):
+        """Push the policy to the agent if it changed."""
+
+        if self.__batch:
+            return
+
+        state = self.state
+
+        if state == self.__pushed:
+            return
+
+        self.block.radio.connection.send_set_port(self)
+        self.__pushed = state
+
+    def mark_synced(self):
+        """Record the current policy as the one known by the agent."""
+
+        self.__pushed = self.state
+
+    def invalidate(self):
+        """Forget the policy known by the agent, the next flush will push."""
+
+        self.__pushed = None
+
     @property
     def ur_count(self):
         """ Get ur_count . """
@@ -124,9 +234,7 @@ class TxPolicy:
     def ur_count(self, ur_count):
         """ Set ur_count . """
 
-        self._ur_count = int(ur_count)
-
-        self.block.radio.connection.send_set_port(self)
+        self.update(ur_count=ur_count)
 
     @property
     def mcast(self):
@@ -138,9 +246,7 @@ class TxPolicy:
     def mcast(self, mcast):
         """ Set the mcast mode. """
 
-        self._mcast = mcast if mcast in TX_MCAST else TX_MCAST_LEGACY
-
-        self.block.radio.connection.send_set_port(self)
+        self.update(mcast=mcast)
 
     @property
     def mcs(self):
@@ -152,12 +258,7 @@ class TxPolicy:
     def mcs(self, mcs):
         """ Set the list of MCS. """
 
-        self._mcs = self.block.supports & set(mcs)
-
-        if not self._mcs:
-            self._mcs = self.block.supports
-
-        self.block.radio.connection.send_set_port(self)
+        self.update(mcs=mcs)
 
     @property
     def ht_mcs(self):
@@ -169,12 +270,7 @@ class TxPolicy:
     def ht_mcs(self, ht_mcs):
         """ Set the list of MCS. """
 
-        self._ht_mcs = self.block.ht_supports & set(ht_mcs)
-
-        if not self._ht_mcs:
-            self._ht_mcs = self.block.ht_supports
-
-        self.block.radio.connection.send_set_port(self)
+        self.update(ht_mcs=ht_mcs)
 
     @property
     def no_ack(self):
@@ -186,9 +282,7 @@ class TxPolicy:
     def no_ack(self, no_ack):
         """ Set the no ack flag. """
 
-        self._no_ack = True if no_ack else False
-
-        self.block.radio.connection.send_set_port(self)
+        self.update(no_ack=no_ack)
 
     @property
     def rts_cts(self):
@@ -200,34 +294,7 @@ class TxPolicy:
     def rts_cts(self, rts_cts):
         """ Set rts_cts . """
 
-        self._rts_cts = int(rts_cts)
-
-        self.block.radio.connection.send_set_port(self)
-
-
-class CQM(dict):
-    """Override getitem behaviour by returning -inf instead of KeyError
-    when the key is missing."""
-
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-
-    def __getitem__(self, key):
-
-        try:
-
-            return dict.__getitem__(self, key)
-
-        except KeyError:
-
-            inf = {'addr': key,
-                   'last_rssi_std': -float("inf"),
-                   'last_rssi_avg': -float("inf"),
-                   'last_packets': 0,
-                   'hist_packets': 0,
-                   'mov_rssi': -float("inf")}
-
-            return inf
+        self.update(rts_cts=rts_cts)
 
 
 class ResourcePool(list):
@@ -237,7 +304,7 @@ class ResourcePool(list):
     """
 
     def sortByRssi(self, addr):
-        blocks = sorted(self, key=lambda x: x.ucqm[addr]['mov_rssi'],
+        blocks = sorted(self, key=lambda x: x.ucqm.value(addr, 'mov_rssi'),
                         reverse=True)
         return ResourcePool(blocks)
 
@@ -250,7 +317,7 @@ class ResourcePool(list):
         return ResourcePool([block])
 
 
-class ResourceBlock:
+class ResourceBlock(Versioned):
     """ EmPOWER resource block.
 
     A resource block is identified by a channel, a timeslot, and the
@@ -271,14 +338,16 @@ class ResourceBlock:
           an 11n device it will report [0, 1, 2, 3, 4, 5, 6, 7]
     """
 
+    VERSIONED = ('ucqm', 'ncqm', 'tx_policies')
+
     def __init__(self, radio, hwaddr, channel, band):
 
         self._radio = radio
         self._hwaddr = hwaddr
         self._channel = channel
         self._band = band
-        self.ucqm = CQM()
-        self.ncqm = CQM()
+        self.ucqm = CQM(UCQM_MATRIX, self)
+        self.ncqm = CQM(NCQM_MATRIX, self)
         self.busyness = None
         self.tx_policies = TxPolicyProp(self)
         self._supports = set()
@@ -394,8 +463,8 @@ class ResourceBlock:
                 'tx_policies': tx_policies,
                 'band': BANDS[self.band],
                 'busyness': self.busyness,
-                'ucqm': {str(k): v for k, v in self.ucqm.items()},
-                'ncqm': {str(k): v for k, v in self.ncqm.items()}}
+                'ucqm': self.ucqm.to_dict(),
+                'ncqm': self.ncqm.to_dict()}
 
     def __hash__(self):
 
@@ -0,0 +1,421 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2016 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""EmPOWER streaming subscriptions.
+
+Module updates and events are published on the stream hub and pushed to
+the subscribers connected to the REST server (WebSocket or Server-Sent
+Events). A subscriber selects the modules (by type and optionally by id)
+and the event types it is interested in, and can optionally restrict the
+modules to a single tenant.
+
+Every message is tagged with a sequence number. The most recent messages
+are retained, so that a client can reconnect and resume from the last
+sequence number it received. The retained messages are replayed at once,
+regardless of the rate limit. If they cannot all be replayed (they are no
+longer retained, or there are too many of them) the client receives a
+reset message and must fetch the current state again. Messages are
+serialized only if somebody is (or has recently been) interested in them.
+
+Each subscriber is rate limited (token bucket). When the subscriber is over
+its rate, module updates are coalesced: only the latest update of each
+module is delivered, since it carries the whole module state. Events are
+never coalesced. Subscribers that do not keep up (too many pending
+messages or outstanding writes) are disconnected.
+"""
+
+import json
+import time
+
+from collections import deque
+from collections import OrderedDict
+
+from tornado.ioloop import IOLoop
+
+import empower.logger
+
+from empower.core.jsonserializer import EmpowerEncoder
+
+# number of messages retained for resume
+BACKLOG = 1024
+
+# seconds during which messages are retained after the last subscriber left
+RETAIN = 60
+
+# default max number of messages per second per subscriber
+RATE = 10
+
+# max number of outstanding writes before a subscriber is disconnected
+MAX_INFLIGHT = 256
+
+# max number of pending messages before a subscriber is disconnected
+MAX_PENDING = 1024
+
+
+def module_topic(module_type, module_id=None):
+    """Return the topic of a module (all the modules if module_id is None)."""
+
+    return ('module', module_type, module_id)
+
+
+def event_topic(event_type):
+    """Return the topic of an event type."""
+
+    return ('event', event_type)
+
+
+class StreamSubscriber:
+    """A stream subscriber.
+
+    The transport (e.g. a WebSocket) must implement send(seq, message),
+    returning a Future or None, and close().
+
+    Attributes:
+        transport: the transport
+        topics: the subscribed topics
+        tenant_id: only receive the modules of this tenant (optional)
+        rate: the max number of messages per second
+        sent: the number of messages sent
+        coalesced: the number of module updates replaced by a more recent
+            one
+        inflight: the number of outstanding writes
+        last_seq: the sequence number of the last message sent
+    """
+
+    def __init__(self, transport, topics, tenant_id=None, rate=RATE):
+
+        if rate <= 0:
+            raise ValueError("Invalid rate %s" % rate)
+
+        self.transport = transport
+        self.topics = topics
+        self.tenant_id = tenant_id
+        self.rate = rate
+        self.sent = 0
+        self.coalesced = 0
+        self.inflight = 0
+        self.last_seq = 0
+        self.closed = False
+        self.__tokens = max(rate, 1)
+        self.__last_refill = time.monotonic()
+        self.__pending = OrderedDict()
+        self.__timer = None
+
+    def accepts(self, tenant_id):
+        """Return True if a message of tenant_id must be delivered."""
+
+        return not self.tenant_id or not tenant_id or \
+            self.tenant_id == tenant_id
+
+    def __refill(self):
+        """Refill the token bucket."""
+
+        now = time.monotonic()
+        self.__tokens = min(max(self.rate, 1), self.__tokens +
+                            (now - self.__last_refill) * self.rate)
+        self.__last_refill = now
+
+    @property
+    def writable(self):
+        """Return the number of writes allowed before disconnection."""
+
+        return MAX_INFLIGHT - self.inflight
+
+    def push(self, seq, message, key=None):
+        """Deliver a message, or queue it if over rate.
+
+        Args:
+            seq: the sequence number of the message
+            message: the serialized message
+            key: pending messages with the same key are coalesced, only the
+                latest one is delivered. If None the message is never
+                coalesced
+
+        Returns:
+            None
+        """
+
+        if self.closed:
+            return
+
+        if key is None:
+            key = seq
+        elif key in self.__pending:
+            self.coalesced += 1
+            del self.__pending[key]
+
+        if len(self.__pending) >= MAX_PENDING:
+            STREAMS.disconnect(self, "too many pending messages")
+            return
+
+        self.__pending[key] = (seq, message)
+        self.__flush()
+
+    def replay(self, messages):
+        """Write a list of (seq, message) pairs, ignoring the rate limit."""
+
+        for seq, message in messages:
+            if self.closed:
+                return
+            self.__write(seq, message)
+
+    def __flush(self):
+        """Send pending messages within the rate."""
+
+        self.__timer = None
+        self.__refill()
+
+        while self.__pending and self.__tokens >= 1 and not self.closed:
+            _, (seq, message) = self.__pending.popitem(last=False)
+            self.__tokens -= 1
+            self.__write(seq, message)
+
+        if self.__pending and not self.__timer and not self.closed:
+            delay = (1 - self.__tokens) / self.rate
+            self.__timer = IOLoop.current().call_later(delay, self.__flush)
+
+    def __write(self, seq, message):
+        """Write a message to the transport."""
+
+        if self.inflight >= MAX_INFLIGHT:
+            STREAMS.disconnect(self, "slow consumer")
+            return
+
+        self.sent += 1
+        self.last_seq = seq
+
+        future = self.transport.send(seq, message)
+
+        if future is None:
+            return
+
+        self.inflight += 1
+        future.add_done_callback(self.__on_written)
+
+    def __on_written(self, _):
+        """A write completed."""
+
+        self.inflight -= 1
+
+    def close(self):
+        """Stop delivering messages."""
+
+        self.closed = True
+        self.__pending.clear()
+
+        if self.__timer:
+            IOLoop.current().remove_timeout(self.__timer)
+            self.__timer = None
+
+    def to_dict(self):
+        """Return JSON-serializable representation of the object."""
+
+        return {'topics': [list(x) for x in self.topics],
+                'tenant_id': self.tenant_id,
+                'rate': self.rate,
+                'sent': self.sent,
+                'coalesced': self.coalesced,
+                'pending': len(self.__pending),
+                'inflight': self.inflight,
+                'last_seq': self.last_seq}
+
+
+class StreamHub:
+    """The stream hub.
+
+    Attributes:
+        seq: the sequence number of the last message
+        subscribers: the list of subscribers
+        disconnected: the number of subscribers disconnected by the hub
+    """
+
+    def __init__(self):
+
+        self.seq = 0
+        self.subscribers = []
+        self.disconnected = 0
+        self.__backlog = deque(maxlen=BACKLOG)
+        self.__topics = {}
+        self.__interest = {}
+        self.log = empower.logger.get_logger()
+
+    def subscribe(self, subscriber, since=None):
+        """Add a new subscriber.
+
+        Args:
+            subscriber: a StreamSubscriber
+            since: replay the retained messages following this sequence
+                number (optional)
+
+        Returns:
+            None
+        """
+
+        self.subscribers.append(subscriber)
+
+        for topic in subscriber.topics:
+            self.__topics.setdefault(topic, []).append(subscriber)
+            self.__interest[topic] = None
+
+        if since is None:
+            return
+
+        messages = [(seq, message)
+                    for seq, topics, tenant_id, _, message in self.__backlog
+                    if seq > since and subscriber.accepts(tenant_id) and
+                    any(topic in subscriber.topics for topic in topics)]
+
+        # e.g. a sequence number from before a restart
+        complete = since <= self.seq
+
+        if self.__backlog and since + 1 < self.__backlog[0][0]:
+            complete = False
+
+        if len(messages) > subscriber.writable:
+            messages = []
+            complete = False
+
+        if not complete:
+            first = self.__backlog[0][0] if self.__backlog else self.seq + 1
+            reset = {'seq': self.seq, 'type': 'reset', 'first': first}
+            subscriber.transport.send(self.seq, json.dumps(reset))
+
+        subscriber.replay(messages)
+
+    def unsubscribe(self, subscriber):
+        """Remove a subscriber."""
+
+        if subscriber not in self.subscribers:
+            return
+
+        subscriber.close()
+        self.subscribers.remove(subscriber)
+
+        for topic in subscriber.topics:
+            self.__topics[topic].remove(subscriber)
+            if not self.__topics[topic]:
+                del self.__topics[topic]
+                self.__interest[topic] = time.monotonic()
+
+    def disconnect(self, subscriber, reason):
+        """Forcibly disconnect a subscriber."""
+
+        self.log.warning("Disconnecting stream subscriber: %s", reason)
+
+        self.disconnected += 1
+        self.unsubscribe(subscriber)
+        subscriber.transport.close()
+
+    def __interested(self, topics):
+        """Return True if somebody is or has recently been interested."""
+
+        now = time.monotonic()
+
+        for topic in topics:
+
+            if topic not in self.__interest:
+                continue
+
+            since = self.__interest[topic]
+
+            if since is None or now - since < RETAIN:
+                return True
+
+            del self.__interest[topic]
+
+        return False
+
+    def __publish(self, topics, tenant_id, key, header, payload):
+        """Serialize and dispatch a message (see StreamSubscriber.push)."""
+
+        if not self.__interested(topics):
+            return
+
+        self.seq += 1
+        header['seq'] = self.seq
+
+        message = json.dumps(header, cls=EmpowerEncoder)[:-1] + \
+            ', "data": ' + payload + '}'
+
+        self.__backlog.append((self.seq, topics, tenant_id, key, message))
+
+        delivered = set()
+
+        for topic in topics:
+            for subscriber in list(self.__topics.get(topic, [])):
+                if subscriber in delivered:
+                    continue
+                if not subscriber.accepts(tenant_id):
+                    continue
+                delivered.add(subscriber)
+                subscriber.push(self.seq, message, key)
+
+    def publish_module(self, module):
+        """Publish a module update."""
+
+        topics = (module_topic(module.module_type, module.module_id),
+                  module_topic(module.module_type))
+
+        if not self.__interested(topics):
+            return
+
+        header = {'type': 'module',
+                  'module_type': module.module_type,
+                  'module_id': module.module_id,
+                  'tenant_id': module.tenant_id}
+
+        # a module update carries the whole state, only the latest matters
+        key = (module.module_type, module.module_id)
+
+        self.__publish(topics, module.tenant_id, key, header,
+                       module.snapshot_json())
+
+    def publish_event(self, event_type, event):
+        """Publish an event (e.g. an LVAP object for lvapjoin)."""
+
+        topics = (event_topic(event_type), )
+
+        if not self.__interested(topics):
+            return
+
+        tenant = getattr(event, 'tenant', None)
+        tenant_id = getattr(tenant, 'tenant_id', None)
+
+        if hasattr(event, 'snapshot_json'):
+            payload = event.snapshot_json()
+        else:
+            payload = json.dumps(event, cls=EmpowerEncoder)
+
+        header = {'type': 'event',
+                  'event': event_type,
+                  'tenant_id': tenant_id}
+
+        self.__publish(topics, tenant_id, None, header, payload)
+
+    def to_dict(self):
+        """Return JSON-serializable representation of the object."""
+
+        first = self.__backlog[0][0] if self.__backlog else self.seq + 1
+
+        return {'seq': self.seq,
+                'first_seq': first,
+                'backlog': len(self.__backlog),
+                'disconnected': self.disconnected,
+                'subscribers': self.subscribers}
+
+
+STREAMS = StreamHub()
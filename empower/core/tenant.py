@@ -21,13 +21,15 @@
 from empower.persistence.persistence import TblBelongs
 from empower.persistence import Session
 from empower.datatypes.etheraddress import EtherAddress
+from empower.core.versioned import Versioned
+from empower.core.versioned import VersionedDict
 
 T_TYPE_SHARED = "shared"
 T_TYPE_UNIQUE = "unique"
 T_TYPES = [T_TYPE_SHARED, T_TYPE_UNIQUE]
 
 
-class Tenant:
+class Tenant(Versioned):
     """Tenant object representing a network slice.
 
     This represents basically a virtual network or slice requested and managed
@@ -56,6 +58,8 @@ class Tenant:
                'cpps',
                'vbses']
 
+    VERSIONED = ('lvaps', 'ues', 'lvnfs', 'wtps', 'cpps', 'vbses')
+
     def __init__(self, tenant_id, tenant_name, owner, desc, bssid_type,
                  plmn_id=None):
 
@@ -65,15 +69,16 @@ class Tenant:
         self.owner = owner
         self.desc = desc
         self.bssid_type = bssid_type
-        self.wtps = {}
-        self.cpps = {}
-        self.vbses = {}
-        self.lvaps = {}
-        self.ues = {}
-        self.lvnfs = {}
+        self.wtps = VersionedDict()
+        self.cpps = VersionedDict()
+        self.vbses = VersionedDict()
+        self.lvaps = VersionedDict()
+        self.ues = VersionedDict()
+        self.lvnfs = VersionedDict()
         self.vaps = {}
         self.components = {}
         self.traffic_rules = {}
+        self.__prefix = None
 
     def to_dict(self):
         """ Return a JSON-serializable dictionary representing the Poll """
@@ -82,7 +87,7 @@ class Tenant:
 
         for field in self.TO_DICT:
             attr = getattr(self, field)
-            if type(attr) is dict:
+            if isinstance(attr, dict):
                 out[field] = {str(k): v for k, v in attr.items()}
             else:
                 out[field] = attr
@@ -92,8 +97,12 @@ class Tenant:
     def get_prefix(self):
         """Return tenant prefix."""
 
-        tokens = [self.tenant_id.hex[0:12][i:i + 2] for i in range(0, 12, 2)]
-        return EtherAddress(':'.join(tokens))
+        if not self.__prefix:
+            tokens = [self.tenant_id.hex[0:12][i:i + 2]
+                      for i in range(0, 12, 2)]
+            self.__prefix = EtherAddress(':'.join(tokens))
+
+        return self.__prefix
 
     def add_pnfdev(self, pnfdev):
         """Add a new PNF Dev to the Tenant.
@@ -115,6 +124,9 @@ class Tenant:
 
         pnfdevs[pnfdev.addr] = pnfdev
 
+        from empower.main import RUNTIME
+        RUNTIME.invalidate_ssids()
+
         belongs = TblBelongs(tenant_id=self.tenant_id, addr=pnfdev.addr)
 
         session = Session()
@@ -140,6 +152,9 @@ class Tenant:
 
         del pnfdevs[pnfdev.addr]
 
+        from empower.main import RUNTIME
+        RUNTIME.invalidate_ssids()
+
         belongs = Session().query(TblBelongs) \
                            .filter(TblBelongs.tenant_id == self.tenant_id,
                                    TblBelongs.addr == pnfdev.addr) \
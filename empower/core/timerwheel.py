@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2016 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""EmPOWER shared timer wheel.
+
+All the periodic activities (periodic modules and apps control loops) are
+scheduled on a single hierarchical timer wheel driven by one IOLoop
+callback, instead of having one PeriodicCallback each.
+
+Timers with the same period are grouped in a bucket. Within a bucket each
+timer is given a deterministic phase derived from its key, so that timers
+created at the same time (e.g. one poller per block) do not all fire in the
+same tick.
+
+The IOLoop callback only runs while at least one timer is scheduled, so an
+idle wheel does not wake up the IOLoop.
+"""
+
+import time
+import zlib
+
+from tornado.ioloop import PeriodicCallback
+
+import empower.logger
+
+# wheel resolution in ms
+TICK = 10
+
+# each level has 2^LEVEL_BITS slots
+LEVEL_BITS = 6
+LEVEL_SIZE = 1 << LEVEL_BITS
+LEVEL_MASK = LEVEL_SIZE - 1
+LEVELS = 4
+
+# largest delta (in ticks) that can be stored without clamping
+MAX_DELTA = (1 << (LEVEL_BITS * LEVELS)) - 1
+
+GOLDEN_RATIO = 0.6180339887498949
+
+
+class Timer:
+    """A periodic timer.
+
+    Attributes:
+        wheel: the timer wheel on which this timer is scheduled
+        callback: the function to be called
+        every: the period in ms
+        ticks: the period in wheel ticks
+        phase: the offset (in ticks) within the period
+        expires: the tick at which the timer will fire next
+    """
+
+    def __init__(self, wheel, callback, every, phase):
+
+        self.wheel = wheel
+        self.callback = callback
+        self.every = every
+        self.ticks = max(1, int(round(every / wheel.tick)))
+        self.phase = phase % self.ticks
+        self.expires = None
+        self.slot = None
+        self.running = False
+
+    def start(self):
+        """Start the timer."""
+
+        self.wheel.start_timer(self)
+
+    def stop(self):
+        """Stop the timer."""
+
+        self.wheel.stop_timer(self)
+
+    def is_running(self):
+        """Return True if the timer is running."""
+
+        return self.running
+
+    def to_dict(self):
+        """Return JSON-serializable representation of the object."""
+
+        return {'every': self.every,
+                'phase': self.phase * self.wheel.tick,
+                'expires': self.expires}
+
+
+class TimerBucket:
+    """Load statistics for the timers sharing the same period.
+
+    Attributes:
+        every: the period in ms
+        timers: number of running timers
+        fired: number of callbacks executed
+        busy: time spent in callbacks (s)
+        max_busy: longest callback execution (s)
+        max_burst: maximum number of callbacks executed in a single tick
+    """
+
+    def __init__(self, every):
+
+        self.every = every
+        self.timers = 0
+        self.fired = 0
+        self.busy = 0.0
+        self.max_busy = 0.0
+        self.max_burst = 0
+        self.phases = {}
+
+    def to_dict(self):
+        """Return JSON-serializable representation of the object."""
+
+        return {'every': self.every,
+                'timers': self.timers,
+                'fired': self.fired,
+                'busy_ms': round(self.busy * 1000, 3),
+                'max_busy_ms': round(self.max_busy * 1000, 3),
+                'max_burst': self.max_burst,
+                'max_phase_timers': max(self.phases.values(), default=0)}
+
+
+class TimerWheel:
+    """Hierarchical timer wheel.
+
+    The wheel has LEVELS levels of LEVEL_SIZE slots each. Level 0 has a
+    resolution of one tick, level n a resolution of LEVEL_SIZE^n ticks.
+    Timers are stored in the lowest level that can hold their deadline and
+    are moved to the lower levels as the deadline approaches.
+
+    Attributes:
+        tick: the wheel resolution in ms
+        now: the last processed tick
+        buckets: the per period load statistics
+    """
+
+    def __init__(self, tick=TICK):
+
+        self.tick = tick
+        self.now = 0
+        self.target = 0
+        self.buckets = {}
+        self.levels = [[{} for _ in range(LEVEL_SIZE)]
+                       for _ in range(LEVELS)]
+        self.max_lag = 0
+        self.__origin = None
+        self.__counter = 0
+        self.__timers = 0
+        self.__periodic = None
+        self.log = empower.logger.get_logger()
+
+    def is_running(self):
+        """Return True if the IOLoop callback is running."""
+
+        return bool(self.__periodic and self.__periodic.is_running())
+
+    def __start(self):
+        """Start the IOLoop callback, resuming from the last tick."""
+
+        self.__origin = time.monotonic() - self.now * self.tick / 1000
+        self.target = self.now
+
+        if not self.__periodic:
+            self.__periodic = PeriodicCallback(self.__on_tick, self.tick)
+
+        self.__periodic.start()
+
+    def phase(self, key, ticks):
+        """Return a deterministic phase in [0, ticks) for the key."""
+
+        if key is None:
+            self.__counter += 1
+            key = self.__counter
+
+        if not isinstance(key, int):
+            key = zlib.crc32(str(key).encode('utf-8'))
+
+        return int(((key * GOLDEN_RATIO) % 1.0) * ticks)
+
+    def add_timer(self, callback, every, key=None):
+        """Create and start a new periodic timer.
+
+        Args:
+            callback: the function to be called every period
+            every: the period in ms
+            key: used to derive the timer phase (optional)
+
+        Returns:
+            a Timer object
+
+        Raises:
+            ValueError: if every is not positive
+        """
+
+        if every <= 0:
+            raise ValueError("Timer period must be positive, got %s" % every)
+
+        ticks = max(1, int(round(every / self.tick)))
+
+        timer = Timer(self, callback, every, self.phase(key, ticks))
+        timer.start()
+
+        return timer
+
+    def start_timer(self, timer):
+        """Schedule the timer on its next phase boundary."""
+
+        if timer.running:
+            return
+
+        if not self.is_running():
+            self.__start()
+
+        timer.running = True
+        self.__timers += 1
+
+        if timer.every not in self.buckets:
+            self.buckets[timer.every] = TimerBucket(timer.every)
+
+        bucket = self.buckets[timer.every]
+        bucket.timers += 1
+        bucket.phases[timer.phase] = bucket.phases.get(timer.phase, 0) + 1
+
+        # first tick after now matching the timer phase
+        first = self.now + 1
+        timer.expires = first + (timer.phase - first) % timer.ticks
+
+        self.__schedule(timer)
+
+    def stop_timer(self, timer):
+        """Remove the timer from the wheel."""
+
+        if not timer.running:
+            return
+
+        timer.running = False
+        self.__timers -= 1
+
+        if timer.slot is not None:
+            del timer.slot[timer]
+            timer.slot = None
+
+        bucket = self.buckets[timer.every]
+        bucket.timers -= 1
+        bucket.phases[timer.phase] -= 1
+
+        if not bucket.phases[timer.phase]:
+            del bucket.phases[timer.phase]
+
+    def __schedule(self, timer):
+        """Put the timer in the slot matching its deadline."""
+
+        delta = min(max(timer.expires - self.now, 0), MAX_DELTA)
+        expires = self.now + delta
+
+        level = 0
+        while delta >= (1 << (LEVEL_BITS * (level + 1))):
+            level += 1
+
+        index = (expires >> (LEVEL_BITS * level)) & LEVEL_MASK
+
+        timer.slot = self.levels[level][index]
+        timer.slot[timer] = None
+
+    def __cascade(self, level):
+        """Move the timers in the current slot of level to lower levels."""
+
+        index = (self.now >> (LEVEL_BITS * level)) & LEVEL_MASK
+        slot = self.levels[level][index]
+
+        if not slot:
+            return
+
+        self.levels[level][index] = {}
+
+        for timer in slot:
+            self.__schedule(timer)
+
+    def __fire(self):
+        """Execute the timers expiring in the current tick."""
+
+        index = self.now & LEVEL_MASK
+        slot = self.levels[0][index]
+
+        if not slot:
+            return
+
+        self.levels[0][index] = {}
+
+        bursts = {}
+
+        for timer in list(slot):
+
+            # stopped by a previous callback
+            if timer.slot is not slot:
+                continue
+
+            timer.slot = None
+
+            # still in the upper levels range, wait for the next rotation
+            if timer.expires > self.now:
+                self.__schedule(timer)
+                continue
+
+            bucket = self.buckets[timer.every]
+            bursts[bucket] = bursts.get(bucket, 0) + 1
+
+            started = time.monotonic()
+
+            try:
+                timer.callback()
+            except Exception:
+                self.log.exception("Exception in timer callback %s",
+                                   timer.callback)
+
+            elapsed = time.monotonic() - started
+
+            bucket.fired += 1
+            bucket.busy += elapsed
+            bucket.max_busy = max(bucket.max_busy, elapsed)
+
+            # stopped or restarted by the callback
+            if not timer.running or timer.slot is not None:
+                continue
+
+            # skip the periods that have been missed
+            timer.expires += timer.ticks
+            if timer.expires <= self.target:
+                missed = (self.target - timer.expires) // timer.ticks + 1
+                timer.expires += missed * timer.ticks
+
+            self.__schedule(timer)
+
+        for bucket, burst in bursts.items():
+            bucket.max_burst = max(bucket.max_burst, burst)
+
+    def __on_tick(self):
+        """Process all the ticks elapsed since the last call."""
+
+        elapsed = (time.monotonic() - self.__origin) * 1000
+        self.advance(int(elapsed / self.tick))
+
+        # nothing left to run, restarted by the next start_timer()
+        if not self.__timers:
+            self.__periodic.stop()
+
+    def advance(self, target):
+        """Process all the ticks up to target.
+
+        Args:
+            target: the last tick to process
+
+        Returns:
+            None
+        """
+
+        self.target = max(self.target, target)
+        self.max_lag = max(self.max_lag, self.target - self.now)
+
+        while self.now < self.target:
+
+            self.now += 1
+
+            for level in range(LEVELS - 1, 0, -1):
+                if not self.now & ((1 << (LEVEL_BITS * level)) - 1):
+                    self.__cascade(level)
+
+            self.__fire()
+
+    def to_dict(self):
+        """Return JSON-serializable representation of the object."""
+
+        return {'tick': self.tick,
+                'now': self.now,
+                'running': self.is_running(),
+                'max_lag': self.max_lag,
+                'buckets': {str(k): v.to_dict()
+                            for k, v in sorted(self.buckets.items())}}
+
+
+TIMER_WHEEL = TimerWheel()
@@ -0,0 +1,608 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2016 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""EmPOWER embedded time-series store.
+
+Numeric samples are stored per series (e.g. the delivery probability of a
+rate reported by an lvap_stats module) in memory-mapped segment files under
+TSDB_PATH. Each segment has a fixed capacity and a columnar layout: a small
+header followed by one column of float64 per field (the timestamps, the
+values and, for the roll-ups, the min and max values and the number of
+samples).
+
+Samples are queued by the IOLoop and written in batches by a background
+thread, which also maintains the roll-ups (one mean/min/max record per
+minute and per hour) and removes the segments older than the retention of
+their resolution. The record of the current roll-up bucket is stored as
+soon as its first sample arrives and updated in place by the following
+ones, so a partial bucket survives a restart.
+
+Only the most recently used series keep their last segment open (see
+MAX_OPEN), each open segment takes two file descriptors.
+
+The layout on disk is:
+
+    <TSDB_PATH>/<series name>/@<resolution>/<first timestamp in ms>.seg
+
+where the series name is made of path components, e.g.
+
+    <tenant id>/lvap_stats/<lvap>/prob.6
+"""
+
+import os
+import re
+import mmap
+import time
+import struct
+import atexit
+import threading
+
+from collections import deque
+from collections import OrderedDict
+from bisect import bisect_left
+from bisect import bisect_right
+
+import empower.logger
+
+from empower import settings
+
+# (resolution, retention) in seconds, resolution 0 is the raw data
+RESOLUTIONS = [(0, 86400), (60, 30 * 86400), (3600, 365 * 86400)]
+
+# number of records per segment
+SEGMENT_SIZE = 4096
+
+# seconds between two batches of writes
+FLUSH = 1.0
+
+# seconds between two retention checks
+RETENTION_CHECK = 60
+
+# max number of queued samples, the oldest are dropped
+MAX_PENDING = 100000
+
+# max number of series with open segments, the least recently used are closed
+MAX_OPEN = 128
+
+MAGIC = b'ETS1'
+HEADER = struct.Struct('<4sIII')
+
+NAME = re.compile(r'^[A-Za-z0-9:._-]+(/[A-Za-z0-9:._-]+)*$')
+
+
+def series_name(*parts):
+    """Return a valid series name made of the specified components."""
+
+    out = []
+
+    for part in parts:
+        part = re.sub(r'[^A-Za-z0-9:._-]', '_', str(part))
+        out.append('_' if part in ('', '.', '..') else part)
+
+    return '/'.join(out)
+
+
+def flatten(name, sample):
+    """Return the (series name, value) pairs of a sample.
+
+    Lists are flattened using the index, dictionaries using the key as the
+    last component of the series name. Non-numeric values are skipped.
+    """
+
+    if isinstance(sample, dict):
+        for key, value in sample.items():
+            yield from flatten(name + "/" + series_name(key), value)
+
+    elif isinstance(sample, (list, tuple)):
+        for index, value in enumerate(sample):
+            yield from flatten("%s/%u" % (name, index), value)
+
+    elif isinstance(sample, (int, float)):
+        yield name, float(sample)
+
+
+class Segment:
+    """A memory-mapped segment file.
+
+    Attributes:
+        path: the segment file
+        columns: the number of columns (the first one is the timestamp)
+        capacity: the max number of records
+        count: the number of records
+    """
+
+    def __init__(self, path, columns=2, capacity=SEGMENT_SIZE):
+
+        self.path = path
+
+        if not os.path.exists(path):
+            with open(path, 'wb') as file_d:
+                file_d.write(HEADER.pack(MAGIC, columns, capacity, 0))
+                file_d.truncate(HEADER.size + columns * capacity * 8)
+
+        self.__file = open(path, 'r+b')
+        self.__map = mmap.mmap(self.__file.fileno(), 0)
+
+        magic, self.columns, self.capacity, self.count = \
+            HEADER.unpack_from(self.__map, 0)
+
+        if magic != MAGIC:
+            self.close()
+            raise ValueError("Invalid segment %s" % path)
+
+        self.__data = memoryview(self.__map)[HEADER.size:].cast('d')
+        self.__views = \
+            [self.__data[i * self.capacity:(i + 1) * self.capacity]
+             for i in range(self.columns)]
+
+    @property
+    def full(self):
+        """Return True if the segment is full."""
+
+        return self.count >= self.capacity
+
+    @property
+    def first(self):
+        """Return the first timestamp (None if empty)."""
+
+        return self.__views[0][0] if self.count else None
+
+    @property
+    def last(self):
+        """Return the last timestamp (None if empty)."""
+
+        return self.__views[0][self.count - 1] if self.count else None
+
+    def get(self, index):
+        """Return the record at index."""
+
+        return tuple(view[index] for view in self.__views)
+
+    def update(self, record):
+        """Overwrite the last record."""
+
+        for view, value in zip(self.__views, record):
+            view[self.count - 1] = value
+
+    def append(self, record):
+        """Append a record (a tuple with one value per column)."""
+
+        for view, value in zip(self.__views, record):
+            view[self.count] = value
+
+        self.count += 1
+        HEADER.pack_into(self.__map, 0, MAGIC, self.columns, self.capacity,
+                         self.count)
+
+    def read(self, start, end):
+        """Return the columns of the records in [start, end]."""
+
+        timestamps = self.__views[0][:self.count]
+
+        low = bisect_left(timestamps, start) if start is not None else 0
+        high = bisect_right(timestamps, end) if end is not None \
+            else self.count
+
+        out = [view[low:high].tolist() for view in self.__views]
+
+        timestamps.release()
+
+        return out
+
+    def close(self):
+        """Unmap and close the segment."""
+
+        if hasattr(self, '_Segment__data'):
+            for view in self.__views:
+                view.release()
+            self.__data.release()
+
+        self.__map.close()
+        self.__file.close()
+
+
+class Series:
+    """A time series at a given resolution.
+
+    Attributes:
+        path: the directory of the segments
+        resolution: the resolution in seconds (0 for the raw data)
+        columns: 2 for the raw data (timestamp, value), 5 for the roll-ups
+            (timestamp, mean, min, max, samples)
+    """
+
+    def __init__(self, path, resolution, segment_size=SEGMENT_SIZE):
+
+        self.path = path
+        self.resolution = resolution
+        self.columns = 5 if resolution else 2
+        self.segment_size = segment_size
+        self.__tail = None
+
+        os.makedirs(path, exist_ok=True)
+
+    def segments(self):
+        """Return the segment files, oldest first."""
+
+        return sorted(x for x in os.listdir(self.path) if x.endswith('.seg'))
+
+    def __last(self):
+        """Return the segment open for appends (None if not yet created)."""
+
+        if self.__tail is None:
+            segments = self.segments()
+            if segments:
+                self.__tail = Segment(os.path.join(self.path, segments[-1]))
+
+        return self.__tail
+
+    def __write(self, record):
+        """Append a record, opening a new segment if needed."""
+
+        tail = self.__last()
+
+        if tail is not None and tail.count:
+
+            # roll-ups have at most one record per bucket
+            if record[0] < tail.last or \
+               (self.resolution and record[0] == tail.last):
+                return False
+
+        if tail is None or tail.full:
+
+            if tail is not None:
+                tail.close()
+
+            name = "%015u.seg" % int(record[0] * 1000)
+
+            while os.path.exists(os.path.join(self.path, name)):
+                name = "%015u.seg" % (int(name[:-4]) + 1)
+
+            tail = Segment(os.path.join(self.path, name), self.columns,
+                           self.segment_size)
+            self.__tail = tail
+
+        tail.append(record)
+
+        return True
+
+    def append(self, timestamp, value):
+        """Add a sample.
+
+        Raw series store every sample. Roll-ups store one record per
+        bucket, the record of the current bucket is updated by each sample.
+
+        Returns:
+            False if the sample is older than the last one (or than the
+            current bucket for the roll-ups)
+        """
+
+        if not self.resolution:
+            return self.__write((timestamp, value))
+
+        start = timestamp - timestamp % self.resolution
+        tail = self.__last()
+
+        if tail is not None and tail.count and tail.last == start:
+            _, mean, low, high, count = tail.get(tail.count - 1)
+            tail.update((start, (mean * count + value) / (count + 1),
+                         min(low, value), max(high, value), count + 1))
+            return True
+
+        return self.__write((start, value, value, value, 1))
+
+    def read(self, start=None, end=None):
+        """Return the columns of the records in [start, end]."""
+
+        out = [[] for _ in range(self.columns)]
+        segments = self.segments()
+
+        for index, name in enumerate(segments):
+
+            # the next segment starts before start: skip this one
+            if start is not None and index + 1 < len(segments) and \
+               int(segments[index + 1][:-4]) / 1000 < start:
+                continue
+
+            if end is not None and int(name[:-4]) / 1000 > end:
+                break
+
+            tail = self.__last()
+
+            if tail and tail.path == os.path.join(self.path, name):
+                columns = tail.read(start, end)
+            else:
+                segment = Segment(os.path.join(self.path, name))
+                columns = segment.read(start, end)
+                segment.close()
+
+            for column, values in zip(out, columns):
+                column.extend(values)
+
+        return out
+
+    def expire(self, before):
+        """Remove the segments whose records are all older than before."""
+
+        segments = self.segments()
+
+        for index, name in enumerate(segments[:-1]):
+
+            if int(segments[index + 1][:-4]) / 1000 >= before:
+                break
+
+            os.remove(os.path.join(self.path, name))
+
+    def close(self):
+        """Close the segment open for appends."""
+
+        if self.__tail is not None:
+            self.__tail.close()
+            self.__tail = None
+
+
+class TimeSeriesStore:
+    """The time-series store.
+
+    Attributes:
+        path: the root directory
+        resolutions: the list of (resolution, retention) in seconds
+        max_open: the max number of series with open segments
+        written: the number of samples written
+        dropped: the number of samples dropped (queue full or out of order)
+    """
+
+    def __init__(self, path, resolutions=RESOLUTIONS,
+                 segment_size=SEGMENT_SIZE):
+
+        self.path = path
+        self.resolutions = resolutions
+        self.segment_size = segment_size
+        self.max_open = MAX_OPEN
+        self.written = 0
+        self.dropped = 0
+        self.__series = OrderedDict()
+        self.__pending = deque()
+        self.__lock = threading.Lock()
+        self.__cond = threading.Condition()
+        self.__thread = None
+        self.__last_check = 0
+        self.log = empower.logger.get_logger()
+
+    @staticmethod
+    def valid(name):
+        """Return True if name is a valid series name."""
+
+        return bool(NAME.match(name)) and \
+            not set(name.split('/')) & {'.', '..'}
+
+    def append(self, name, timestamp, value):
+        """Queue a new sample (thread safe, does not block on I/O).
+
+        Raises:
+            ValueError, if the series name is not valid
+        """
+
+        if not self.valid(name):
+            raise ValueError("Invalid series name %s" % name)
+
+        with self.__cond:
+
+            if len(self.__pending) >= MAX_PENDING:
+                self.__pending.popleft()
+                self.dropped += 1
+
+            self.__pending.append((name, timestamp, value))
+
+            if not self.__thread:
+                self.__thread = threading.Thread(target=self.__run,
+                                                 daemon=True, name="tsdb")
+                self.__thread.start()
+                atexit.register(self.close)
+
+    def append_sample(self, name, timestamp, sample):
+        """Queue all the values of a sample (see flatten())."""
+
+        for series, value in flatten(name, sample):
+            self.append(series, timestamp, value)
+
+    def __open(self, name):
+        """Return new series (one per resolution) for name."""
+
+        base = os.path.join(self.path, *name.split('/'))
+
+        return [Series(os.path.join(base, "@%u" % resolution), resolution,
+                       self.segment_size)
+                for resolution, _ in self.resolutions]
+
+    def __get(self, name):
+        """Return the series of name, closing the least recently used."""
+
+        if name in self.__series:
+            self.__series.move_to_end(name)
+            return self.__series[name]
+
+        self.__series[name] = self.__open(name)
+
+        while len(self.__series) > self.max_open:
+            _, series = self.__series.popitem(last=False)
+            for rollup in series:
+                rollup.close()
+
+        return self.__series[name]
+
+    def flush(self):
+        """Write the queued samples."""
+
+        with self.__cond:
+            pending, self.__pending = self.__pending, deque()
+
+        batches = OrderedDict()
+
+        for name, timestamp, value in pending:
+            batches.setdefault(name, []).append((timestamp, value))
+
+        # lock one series at a time, so that queries are not blocked by
+        # the whole batch
+        for name, samples in batches.items():
+
+            with self.__lock:
+
+                try:
+                    series = self.__get(name)
+                except OSError as ex:
+                    self.log.warning("Unable to open series %s: %s", name, ex)
+                    self.dropped += len(samples)
+                    continue
+
+                for timestamp, value in samples:
+
+                    if not series[0].append(timestamp, value):
+                        self.dropped += 1
+                        continue
+
+                    for rollup in series[1:]:
+                        rollup.append(timestamp, value)
+
+                    self.written += 1
+
+    def expire(self):
+        """Remove the segments older than the retention of their resolution."""
+
+        now = time.time()
+        names = self.names()
+
+        for name in names:
+            with self.__lock:
+                # do not evict the open series for a retention check
+                series = self.__series.get(name) or self.__open(name)
+                for rollup, (_, retention) in zip(series, self.resolutions):
+                    rollup.expire(now - retention)
+
+    def __run(self):
+        """Writer loop."""
+
+        while True:
+
+            time.sleep(FLUSH)
+
+            try:
+
+                self.flush()
+
+                if time.time() - self.__last_check > RETENTION_CHECK:
+                    self.__last_check = time.time()
+                    self.expire()
+
+            except Exception:
+                self.log.exception("Time-series store error")
+
+    def names(self):
+        """Return the names of the stored series."""
+
+        # the writer thread reorders the open series
+        with self.__lock:
+            out = set(self.__series.keys())
+
+        if not os.path.isdir(self.path):
+            return sorted(out)
+
+        raw = "@%u" % self.resolutions[0][0]
+
+        for root, dirs, _ in os.walk(self.path):
+            if raw in dirs:
+                out.add(os.path.relpath(root, self.path).replace(os.sep, '/'))
+            dirs[:] = [x for x in dirs if not x.startswith('@')]
+
+        return sorted(out)
+
+    def query(self, name, start=None, end=None, resolution=None):
+        """Return the samples of a series in [start, end].
+
+        Args:
+            name: the series name
+            start: the first timestamp (optional)
+            end: the last timestamp (optional)
+            resolution: the resolution in seconds, if None the finest
+                resolution whose retention covers start is used
+
+        Returns:
+            a dictionary with one list per column
+
+        Raises:
+            ValueError, if the resolution is not valid
+            KeyError, if the series does not exist
+        """
+
+        if not self.valid(name):
+            raise ValueError("Invalid series name %s" % name)
+
+        resolutions = [x[0] for x in self.resolutions]
+
+        if resolution is None:
+            resolution = resolutions[-1]
+            for res, retention in self.resolutions:
+                if start is None or start >= time.time() - retention:
+                    resolution = res
+                    break
+
+        if resolution not in resolutions:
+            raise ValueError("Invalid resolution %s" % resolution)
+
+        base = os.path.join(self.path, *name.split('/'))
+
+        if name not in self.__series and not os.path.isdir(base):
+            raise KeyError("Series %s not found" % name)
+
+        with self.__lock:
+            series = self.__get(name)[resolutions.index(resolution)]
+            columns = series.read(start, end)
+
+        out = {'name': name,
+               'resolution': resolution,
+               'timestamps': columns[0],
+               'values': columns[1]}
+
+        if resolution:
+            out['min'] = columns[2]
+            out['max'] = columns[3]
+
+        return out
+
+    def close(self):
+        """Flush the pending samples and close all the series."""
+
+        self.flush()
+
+        with self.__lock:
+            for series in self.__series.values():
+                for rollup in series:
+                    rollup.close()
+            self.__series = OrderedDict()
+
+    def to_dict(self):
+        """Return JSON-serializable representation of the object."""
+
+        return {'path': self.path,
+                'resolutions': self.resolutions,
+                'open': len(self.__series),
+                'pending': len(self.__pending),
+                'written': self.written,
+                'dropped': self.dropped}
+
+
+TSDB = TimeSeriesStore(settings.TSDB_PATH)
@@ -49,8 +49,7 @@ def ether_to_hex(ether):
 def generate_bssid(base_mac, sta_mac):
     """ Generate a new BSSID address. """
 
-    base = str(base_mac).split(":")[0:3]
-    unicast_addr_mask = int(base[0], 16) & 0xFE
-    base[0] = str(format(unicast_addr_mask, 'X'))
-    sta = str(sta_mac).split(":")[3:6]
-    return EtherAddress(":".join(base + sta))
+    base = base_mac.to_raw()
+    sta = sta_mac.to_raw()
+
+    return EtherAddress(bytes((base[0] & 0xFE,)) + base[1:3] + sta[3:6])
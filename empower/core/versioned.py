@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2016 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""EmPOWER versioned objects.
+
+A versioned object carries a version counter that is bumped every time one
+of its attributes is set (or explicitly with touch() for in-place changes)
+and caches its serialized form per version. The same snapshot is then used
+by the callbacks, the REST API and any other consumer, so that each update
+is serialized at most once, and only if somebody reads it.
+
+Two snapshots are cached: the output of to_dict() and the JSON document.
+The nested objects referenced by to_dict() are serialized by the encoder,
+so the JSON document is cached only if all of them are versioned as well,
+and it is invalidated whenever any of them changes.
+
+An object whose to_dict() copies the serialized form of another versioned
+object (e.g. a module embedding its resource block) lists that object in
+VERSIONED, so that both snapshots follow its changes.
+"""
+
+import json
+
+from empower.core.jsonserializer import EmpowerEncoder
+
+
+class Uncacheable(Exception):
+    """The JSON snapshot depends on an unversioned object."""
+
+    pass
+
+
+def deep_version(value, out=None):
+    """Return the versions of all the objects found in value.
+
+    Returns:
+        a tuple of (id, version) pairs, one for each versioned object
+
+    Raises:
+        Uncacheable, if value references an unversioned serializable object
+    """
+
+    if out is None:
+        out = {}
+        deep_version(value, out)
+        return tuple(out.items())
+
+    if isinstance(value, Versioned):
+
+        if id(value) in out:
+            return
+
+        out[id(value)] = value.version
+        deep_version(value.snapshot(), out)
+
+    elif isinstance(value, dict):
+        for item in value.values():
+            deep_version(item, out)
+
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        for item in value:
+            deep_version(item, out)
+
+    elif hasattr(value, 'to_dict'):
+        raise Uncacheable()
+
+
+class VersionedDict(dict):
+    """A dictionary with a version counter bumped on every change."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.version = 0
+
+    def touch(self):
+        """Bump the version."""
+
+        self.version += 1
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.version += 1
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self.version += 1
+
+    def pop(self, *args):
+        self.version += 1
+        return super().pop(*args)
+
+    def popitem(self):
+        self.version += 1
+        return super().popitem()
+
+    def setdefault(self, key, default=None):
+        self.version += 1
+        return super().setdefault(key, default)
+
+    def update(self, *args, **kwargs):
+        self.version += 1
+        super().update(*args, **kwargs)
+
+    def clear(self):
+        self.version += 1
+        super().clear()
+
+
+class Versioned:
+    """Mixin for objects with a version counter and a snapshot cache.
+
+    Attributes:
+        VERSIONED: the attributes (e.g. a VersionedDict) whose version is
+            part of the object version, for versioned objects this is the
+            version of everything they reference (see deep_version())
+    """
+
+    VERSIONED = ()
+
+    __version = 0
+    __snapshot = None
+    __json = None
+
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        object.__setattr__(self, '_Versioned__version', self.__version + 1)
+
+    def touch(self):
+        """Bump the version after an in-place change."""
+
+        object.__setattr__(self, '_Versioned__version', self.__version + 1)
+
+    @property
+    def version(self):
+        """Return the object version.
+
+        Versions are only meant to be compared for equality.
+        """
+
+        if not self.VERSIONED:
+            return self.__version
+
+        return (self.__version, ) + \
+            tuple(self.__version_of(getattr(self, name))
+                  for name in self.VERSIONED)
+
+    @staticmethod
+    def __version_of(value):
+        """Return the version of a VERSIONED attribute."""
+
+        if value is None:
+            return None
+
+        if isinstance(value, Versioned):
+            try:
+                return deep_version(value)
+            except Uncacheable:
+                return value.version
+
+        return value.version
+
+    def snapshot(self):
+        """Return the output of to_dict() for the current version."""
+
+        version = self.version
+
+        if self.__snapshot and self.__snapshot[0] == version:
+            return self.__snapshot[1]
+
+        out = self.to_dict()
+        object.__setattr__(self, '_Versioned__snapshot', (version, out))
+
+        return out
+
+    def snapshot_json(self):
+        """Return the JSON document for the current version."""
+
+        try:
+            version = deep_version(self)
+        except Uncacheable:
+            version = None
+
+        if version is not None and self.__json and \
+           self.__json[0] == version:
+            return self.__json[1]
+
+        out = json.dumps(self.snapshot(), sort_keys=True, indent=4,
+                         cls=EmpowerEncoder)
+
+        if version is not None:
+            object.__setattr__(self, '_Versioned__json', (version, out))
+
+        return out
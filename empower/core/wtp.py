@@ -41,7 +41,48 @@ class WTP(BasePNFDev):
 
     def __init__(self, addr, label):
         super().__init__(addr, label)
-        self.supports = set()
+        self.__blocks = {}
+        self.__supports = set()
+
+    @property
+    def supports(self):
+        """Return the set of resource blocks supported by the WTP."""
+
+        return self.__supports
+
+    @supports.setter
+    def supports(self, supports):
+        """Set the resource blocks supported by the WTP."""
+
+        supports = set(supports)
+
+        # free the quality matrix rows of the blocks that are gone
+        for block in self.__supports - supports:
+            block.ucqm.drop()
+            block.ncqm.drop()
+
+        self.__supports = set()
+        self.__blocks = {}
+
+        for block in supports:
+            self.add_block(block)
+
+    def add_block(self, block):
+        """Add a resource block to the set of supported blocks."""
+
+        self.__supports.add(block)
+        self.__blocks[(block.hwaddr, block.channel, block.band)] = block
+        block.ucqm.clear()
+        block.ncqm.clear()
+        self.touch()
+
+    def block(self, hwaddr, channel, band):
+        """Return the resource block matching hwaddr, channel, and band.
+
+        Returns None if no such block is supported by this WTP.
+        """
+
+        return self.__blocks.get((hwaddr, channel, band))
 
     def to_dict(self):
         """Return a JSON-serializable dictionary representing the CPP."""
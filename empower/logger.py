@@ -17,44 +17,64 @@
 
 """EmPOWER logging package."""
 
-import inspect
 import os
+import sys
 import logging
 
-PATH = inspect.stack()[0][1]
+PATH = sys._getframe().f_code.co_filename
 EXT_PATH = PATH[0:PATH.rindex(os.sep)]
 EXT_PATH = os.path.dirname(EXT_PATH) + os.sep
 PATH = os.path.dirname(PATH) + os.sep
 
+# logger names indexed by source file name
+NAMES = {}
+
+
+def logger_name(filename):
+    """Return the logger name for a source file (cached)."""
+
+    if filename in NAMES:
+        return NAMES[filename]
+
+    name = filename
+    if name.endswith('.py'):
+        name = name[0:-3]
+    elif name.endswith('.pyc'):
+        name = name[0:-4]
+    if name.startswith(PATH):
+        name = name[len(PATH):]
+    elif name.startswith(EXT_PATH):
+        name = name[len(EXT_PATH):]
+    name = name.replace('/', '.').replace('\\', '.')
+
+    # Remove double names ("topology.topology" -> "topology")
+    if name.find('.') != -1:
+        toks = name.split('.')
+        if len(toks) >= 2:
+            if toks[-1] == toks[-2]:
+                del toks[-1]
+                name = '.'.join(toks)
+
+    if name.startswith("ext."):
+        name = name.split("ext.", 1)[1]
+
+    if name.endswith(".__init__"):
+        name = name.rsplit(".__init__", 1)[0]
+
+    NAMES[filename] = name
+
+    return name
+
 
 def get_logger(name=None, more_frames=0):
-    """Logger factory."""
+    """Logger factory.
+
+    The logger name is derived from the file name of the caller, only the
+    caller frame is inspected (no source code is loaded).
+    """
 
     if name is None:
-        stack = inspect.stack()[1+more_frames]
-        name = stack[1]
-        if name.endswith('.py'):
-            name = name[0:-3]
-        elif name.endswith('.pyc'):
-            name = name[0:-4]
-        if name.startswith(PATH):
-            name = name[len(PATH):]
-        elif name.startswith(EXT_PATH):
-            name = name[len(EXT_PATH):]
-        name = name.replace('/', '.').replace('\\', '.')
-
-        # Remove double names ("topology.topology" -> "topology")
-        if name.find('.') != -1:
-            toks = name.split('.')
-            if len(toks) >= 2:
-                if toks[-1] == toks[-2]:
-                    del toks[-1]
-                    name = '.'.join(toks)
-
-        if name.startswith("ext."):
-            name = name.split("ext.", 1)[1]
-
-        if name.endswith(".__init__"):
-            name = name.rsplit(".__init__", 1)[0]
+        frame = sys._getframe(1 + more_frames)
+        name = logger_name(frame.f_code.co_filename)
 
     return logging.getLogger(name)
@@ -85,9 +85,9 @@ class LVAPStats(ModulePeriodic):
         self.rates = {}
         self.best_prob = None
 
-    def __eq__(self, other):
+    def poll_key(self):
 
-        return super().__eq__(other) and self.lvap == other.lvap
+        return super().poll_key() + (self.lvap, )
 
     @property
     def lvap(self):
@@ -101,6 +101,11 @@ class LVAPStats(ModulePeriodic):
 
         self._lvap = EtherAddress(value)
 
+    def sample(self):
+        """Return the delivery probabilities (see Module.sample())."""
+
+        return {k: v['prob'] for k, v in self.rates.items()}
+
     def to_dict(self):
         """ Return a JSON-serializable."""
 
@@ -146,6 +151,7 @@ class LVAPStats(ModulePeriodic):
 
         msg = RATES_REQUEST.build(rates_req)
         lvap.wtp.connection.stream.write(msg)
+        self.request_sent(lvap.wtp.addr)
 
     def handle_response(self, response):
         """Handle an incoming RATES_RESPONSE message.
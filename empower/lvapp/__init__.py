@@ -29,6 +29,8 @@ from construct import BitStruct
 from construct import Bit
 from construct import Padding
 
+from empower.lvapp import codec
+
 
 PT_VERSION = 0x00
 
@@ -291,27 +293,29 @@ ADD_DEL_LVAP_RESPONSE = Struct("add_del_lvap", UBInt8("version"),
                                UBInt32("module_id"),
                                UBInt32("status"))
 
+# messages are parsed with the precompiled codecs, the construct definitions
+# above are kept as the reference description of the protocol
 PT_TYPES = {PT_BYE: None,
             PT_REGISTER: None,
             PT_LVAP_JOIN: None,
             PT_LVAP_LEAVE: None,
-            PT_HELLO: HELLO,
-            PT_PROBE_REQUEST: PROBE_REQUEST,
-            PT_PROBE_RESPONSE: PROBE_RESPONSE,
-            PT_AUTH_REQUEST: AUTH_REQUEST,
-            PT_AUTH_RESPONSE: AUTH_RESPONSE,
-            PT_ASSOC_REQUEST: ASSOC_REQUEST,
-            PT_ASSOC_RESPONSE: ASSOC_RESPONSE,
-            PT_ADD_LVAP: ADD_LVAP,
-            PT_DEL_LVAP: DEL_LVAP,
-            PT_STATUS_LVAP: STATUS_LVAP,
-            PT_CAPS_RESPONSE: CAPS_RESPONSE,
-            PT_CAPS_REQUEST: CAPS_REQUEST,
-            PT_SET_PORT: SET_PORT,
-            PT_STATUS_PORT: STATUS_PORT,
-            PT_STATUS_VAP: STATUS_VAP,
-            PT_ADD_LVAP_RESPONSE: ADD_DEL_LVAP_RESPONSE,
-            PT_DEL_LVAP_RESPONSE: ADD_DEL_LVAP_RESPONSE}
+            PT_HELLO: codec.HELLO,
+            PT_PROBE_REQUEST: codec.PROBE_REQUEST,
+            PT_PROBE_RESPONSE: codec.PROBE_RESPONSE,
+            PT_AUTH_REQUEST: codec.AUTH_REQUEST,
+            PT_AUTH_RESPONSE: codec.AUTH_RESPONSE,
+            PT_ASSOC_REQUEST: codec.ASSOC_REQUEST,
+            PT_ASSOC_RESPONSE: codec.ASSOC_RESPONSE,
+            PT_ADD_LVAP: codec.ADD_LVAP,
+            PT_DEL_LVAP: codec.DEL_LVAP,
+            PT_STATUS_LVAP: codec.STATUS_LVAP,
+            PT_CAPS_RESPONSE: codec.CAPS_RESPONSE,
+            PT_CAPS_REQUEST: codec.CAPS_REQUEST,
+            PT_SET_PORT: codec.SET_PORT,
+            PT_STATUS_PORT: codec.STATUS_PORT,
+            PT_STATUS_VAP: codec.STATUS_VAP,
+            PT_ADD_LVAP_RESPONSE: codec.ADD_DEL_LVAP_RESPONSE,
+            PT_DEL_LVAP_RESPONSE: codec.ADD_DEL_LVAP_RESPONSE}
 
 PT_TYPES_HANDLERS = {PT_BYE: [],
                      PT_REGISTER: [],
@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2016 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""LVAPP message codec.
+
+Precompiled struct-based parsers/builders for the LVAPP message catalogue.
+Every codec mirrors one of the construct definitions in empower.lvapp: the
+fixed part of the message is handled by a single struct.Struct while the
+variable tails (SSIDs ranges, MCS arrays, CAPS arrays) are handled by small
+dedicated handlers. Parsed messages expose the same attribute names as the
+construct Containers.
+"""
+
+import struct
+
+
+class Message:
+    """A parsed (or to be built) LVAPP message.
+
+    Fields are exposed as attributes, e.g. msg.wtp or msg.flags.set_mask.
+    """
+
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+    def __getitem__(self, key):
+        return self.__dict__[key]
+
+    def __setitem__(self, key, value):
+        self.__dict__[key] = value
+
+    def __contains__(self, key):
+        return key in self.__dict__
+
+    def __eq__(self, other):
+        if isinstance(other, Message):
+            return self.__dict__ == other.__dict__
+        return False
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __repr__(self):
+        fields = ", ".join(["%s=%r" % (k, v) for k, v in
+                            self.__dict__.items()])
+        return "Message(%s)" % fields
+
+
+class Flags:
+    """A bit field packed in the rightmost bits of an unsigned integer.
+
+    Names are listed from the most to the least significant bit, i.e. in the
+    same order used by the construct BitStruct definitions.
+    """
+
+    def __init__(self, fmt, *names):
+        self.fmt = fmt
+        self.bits = [(name, 1 << i) for i, name in
+                     enumerate(reversed(names))]
+
+    def decode(self, value):
+        """Return a Message with one attribute per bit."""
+
+        flags = Message()
+        for name, mask in self.bits:
+            flags.__dict__[name] = 1 if value & mask else 0
+        return flags
+
+    def encode(self, flags):
+        """Return the integer representation of flags."""
+
+        value = 0
+        for name, mask in self.bits:
+            if getattr(flags, name):
+                value |= mask
+        return value
+
+
+class Raw:
+    """Variable length bytes running until the end of the message."""
+
+    def __init__(self, name):
+        self.name = name
+
+    def parse(self, data, offset, fields):
+        """Parse tail."""
+
+        end = fields['length']
+
+        if end > len(data) or end < offset:
+            raise ValueError("Invalid %s length" % self.name)
+
+        fields[self.name] = bytes(data[offset:end])
+        return end
+
+    def build(self, msg):
+        """Build tail."""
+
+        return bytes(getattr(msg, self.name))
+
+
+class SSIDs:
+    """Range of length-prefixed SSIDs (at least one, at most ten)."""
+
+    def __init__(self, name="ssids", mincount=1, maxcount=10):
+        self.name = name
+        self.mincount = mincount
+        self.maxcount = maxcount
+
+    def parse(self, data, offset, fields):
+        """Parse tail."""
+
+        ssids = []
+        end = len(data)
+
+        while len(ssids) < self.maxcount and offset < end:
+            length = data[offset]
+            if offset + 1 + length > end:
+                break
+            ssid = bytes(data[offset + 1:offset + 1 + length])
+            ssids.append(Message(length=length, ssid=ssid))
+            offset += 1 + length
+
+        if len(ssids) < self.mincount:
+            raise ValueError("Expected at least %u %s" % (self.mincount,
+                                                          self.name))
+
+        fields[self.name] = ssids
+        return offset
+
+    def build(self, msg):
+        """Build tail."""
+
+        ssids = getattr(msg, self.name)
+
+        if not self.mincount <= len(ssids) <= self.maxcount:
+            raise ValueError("Expected %u-%u %s" % (self.mincount,
+                                                    self.maxcount,
+                                                    self.name))
+
+        out = bytearray()
+        for entry in ssids:
+            out.append(entry.length)
+            out.extend(entry.ssid)
+        return bytes(out)
+
+
+class Array:
+    """Array of records whose size is given by a field of the message.
+
+    Records made of a single element are returned as plain values (as
+    construct does with Array(UBInt8)), otherwise as tuples.
+    """
+
+    def __init__(self, name, count, fmt):
+        self.name = name
+        self.count = count
+        self.record = struct.Struct(fmt)
+        self.flat = len(self.record.unpack(bytes(self.record.size))) == 1
+
+    def parse(self, data, offset, fields):
+        """Parse tail."""
+
+        end = offset + fields[self.count] * self.record.size
+
+        if end > len(data):
+            raise ValueError("Invalid %s array" % self.name)
+
+        if self.flat and self.record.format in ("!B", "B"):
+            fields[self.name] = list(data[offset:end])
+        elif self.flat:
+            fields[self.name] = [x[0] for x in self.record.iter_unpack(
+                data[offset:end])]
+        else:
+            fields[self.name] = list(self.record.iter_unpack(
+                data[offset:end]))
+
+        return end
+
+    def build(self, msg):
+        """Build tail."""
+
+        values = getattr(msg, self.name)
+
+        if self.flat:
+            return b''.join([self.record.pack(x) for x in values])
+
+        return b''.join([self.record.pack(*x) for x in values])
+
+
+class Codec:
+    """Precompiled LVAPP message codec.
+
+    Attributes:
+        name: the message name (same as the construct definition)
+        fields: list of (name, format) tuples for the fixed part of the
+          message. The format is either a struct format character or a Flags
+          instance
+        tail: list of handlers for the variable part of the message
+    """
+
+    def __init__(self, name, fields, tail=()):
+
+        self.name = name
+        self.fields = fields
+        self.tail = tail
+
+        fmt = "!" + "".join([x.fmt if isinstance(x, Flags) else x
+                             for _, x in fields])
+
+        self.struct = struct.Struct(fmt)
+        self.names = tuple([name for name, _ in fields])
+        self.flags = [(name, x) for name, x in fields
+                      if isinstance(x, Flags)]
+
+    def sizeof(self):
+        """Return the size of the fixed part of the message."""
+
+        return self.struct.size
+
+    def parse(self, data):
+        """Parse data into a Message."""
+
+        msg = Message()
+        fields = msg.__dict__
+
+        fields.update(zip(self.names, self.struct.unpack_from(data, 0)))
+
+        for name, flags in self.flags:
+            fields[name] = flags.decode(fields[name])
+
+        offset = self.struct.size
+
+        for handler in self.tail:
+            offset = handler.parse(data, offset, fields)
+
+        return msg
+
+    def build(self, msg):
+        """Build message (either a Message or a construct Container)."""
+
+        values = [getattr(msg, name) for name in self.names]
+
+        if self.flags:
+            for name, flags in self.flags:
+                idx = self.names.index(name)
+                values[idx] = flags.encode(values[idx])
+
+        out = self.struct.pack(*values)
+
+        if not self.tail:
+            return out
+
+        return out + b''.join([x.build(msg) for x in self.tail])
+
+
+HEADER_FIELDS = [("version", "B"),
+                 ("type", "B"),
+                 ("length", "I"),
+                 ("seq", "I")]
+
+LVAP_FLAGS = Flags("H", "set_mask", "associated", "authenticated")
+
+PORT_FLAGS = Flags("H", "no_ack")
+
+HEADER = Codec("header", HEADER_FIELDS[:3])
+
+HELLO = Codec("hello", HEADER_FIELDS + [("wtp", "6s"),
+                                        ("period", "I")])
+
+PROBE_REQUEST = Codec("probe_request", HEADER_FIELDS + [("wtp", "6s"),
+                                                        ("sta", "6s"),
+                                                        ("hwaddr", "6s"),
+                                                        ("channel", "B"),
+                                                        ("band", "B"),
+                                                        ("supported_band",
+                                                         "B")],
+                      [Raw("ssid")])
+
+PROBE_RESPONSE = Codec("probe_response", HEADER_FIELDS + [("sta", "6s")],
+                       [Raw("ssid")])
+
+AUTH_REQUEST = Codec("auth_request", HEADER_FIELDS + [("wtp", "6s"),
+                                                      ("sta", "6s"),
+                                                      ("bssid", "6s")])
+
+AUTH_RESPONSE = Codec("auth_response", HEADER_FIELDS + [("sta", "6s")])
+
+ASSOC_REQUEST = Codec("assoc_request", HEADER_FIELDS + [("wtp", "6s"),
+                                                        ("sta", "6s"),
+                                                        ("bssid", "6s"),
+                                                        ("hwaddr", "6s"),
+                                                        ("channel", "B"),
+                                                        ("band", "B"),
+                                                        ("supported_band",
+                                                         "B")],
+                      [Raw("ssid")])
+
+ASSOC_RESPONSE = Codec("assoc_response", HEADER_FIELDS + [("sta", "6s")])
+
+ADD_LVAP = Codec("add_lvap", HEADER_FIELDS + [("module_id", "I"),
+                                              ("flags", LVAP_FLAGS),
+                                              ("assoc_id", "H"),
+                                              ("hwaddr", "6s"),
+                                              ("channel", "B"),
+                                              ("band", "B"),
+                                              ("supported_band", "B"),
+                                              ("sta", "6s"),
+                                              ("encap", "6s"),
+                                              ("net_bssid", "6s"),
+                                              ("lvap_bssid", "6s")],
+                 [SSIDs()])
+
+DEL_LVAP = Codec("del_lvap", HEADER_FIELDS + [("module_id", "I"),
+                                              ("sta", "6s"),
+                                              ("target_hwaddr", "6s"),
+                                              ("target_channel", "B"),
+                                              ("tagert_band", "B"),
+                                              ("csa_switch_mode", "B"),
+                                              ("csa_switch_count", "B")])
+
+STATUS_LVAP = Codec("status_lvap", HEADER_FIELDS + [("flags", LVAP_FLAGS),
+                                                    ("assoc_id", "H"),
+                                                    ("wtp", "6s"),
+                                                    ("sta", "6s"),
+                                                    ("encap", "6s"),
+                                                    ("hwaddr", "6s"),
+                                                    ("channel", "B"),
+                                                    ("band", "B"),
+                                                    ("supported_band", "B"),
+                                                    ("net_bssid", "6s"),
+                                                    ("lvap_bssid", "6s")],
+                    [SSIDs()])
+
+CAPS_RESPONSE = Codec("caps", HEADER_FIELDS + [("wtp", "6s"),
+                                               ("nb_resources_elements", "B"),
+                                               ("nb_ports_elements", "B")],
+                      [Array("blocks", "nb_resources_elements", "!6sBB"),
+                       Array("ports", "nb_ports_elements", "!6sH10s")])
+
+CAPS_REQUEST = Codec("caps_request", HEADER_FIELDS)
+
+LVAP_STATUS_REQUEST = Codec("lvap_status_request", HEADER_FIELDS)
+
+VAP_STATUS_REQUEST = Codec("vap_status_request", HEADER_FIELDS)
+
+PORT_STATUS_REQUEST = Codec("port_status_request", HEADER_FIELDS)
+
+SET_PORT = Codec("set_port", HEADER_FIELDS + [("flags", PORT_FLAGS),
+                                              ("hwaddr", "6s"),
+                                              ("channel", "B"),
+                                              ("band", "B"),
+                                              ("sta", "6s"),
+                                              ("rts_cts", "H"),
+                                              ("tx_mcast", "B"),
+                                              ("ur_mcast_count", "B"),
+                                              ("nb_mcses", "B"),
+                                              ("nb_ht_mcses", "B")],
+                 [Array("mcs", "nb_mcses", "!B"),
+                  Array("ht_mcs", "nb_ht_mcses", "!B")])
+
+STATUS_PORT = Codec("status_port", HEADER_FIELDS + [("flags", PORT_FLAGS),
+                                                    ("wtp", "6s"),
+                                                    ("sta", "6s"),
+                                                    ("hwaddr", "6s"),
+                                                    ("channel", "B"),
+                                                    ("band", "B"),
+                                                    ("rts_cts", "H"),
+                                                    ("tx_mcast", "B"),
+                                                    ("ur_mcast_count", "B"),
+                                                    ("nb_mcses", "B"),
+                                                    ("nb_ht_mcses", "B")],
+                    [Array("mcs", "nb_mcses", "!B"),
+                     Array("ht_mcs", "nb_ht_mcses", "!B")])
+
+ADD_VAP = Codec("add_vap", HEADER_FIELDS + [("hwaddr", "6s"),
+                                            ("channel", "B"),
+                                            ("band", "B"),
+                                            ("net_bssid", "6s")],
+                [Raw("ssid")])
+
+DEL_VAP = Codec("del_vap", HEADER_FIELDS + [("net_bssid", "6s")])
+
+STATUS_VAP = Codec("status_vap", HEADER_FIELDS + [("wtp", "6s"),
+                                                  ("hwaddr", "6s"),
+                                                  ("channel", "B"),
+                                                  ("band", "B"),
+                                                  ("net_bssid", "6s")],
+                   [Raw("ssid")])
+
+ADD_DEL_LVAP_RESPONSE = Codec("add_del_lvap", HEADER_FIELDS + [("wtp", "6s"),
+                                                              ("sta", "6s"),
+                                                              ("module_id",
+                                                               "I"),
+                                                              ("status",
+                                                               "I")])
@@ -22,7 +22,6 @@ import tornado.httpserver
 
 from empower.datatypes.etheraddress import EtherAddress
 from empower.restserver.apihandlers import EmpowerAPIHandler
-from empower.core.resourcepool import ResourceBlock
 
 from empower.main import RUNTIME
 
@@ -67,6 +66,7 @@ class LVAPHandler(EmpowerAPIHandler):
 
         Request:
             version: the protocol version (1.0)
+            tx_policy: downlink tx policy fields (optional)
 
         Example URLs:
             PUT /api/v1/lvaps/11:22:33:44:55:66
@@ -86,33 +86,47 @@ class LVAPHandler(EmpowerAPIHandler):
 
             lvap = RUNTIME.lvaps[lvap_addr]
 
-            if "wtp" in request:
+            # changes are pushed to the agents when the batch exits
+            with lvap.batch():
 
-                wtp_addr = EtherAddress(request['wtp'])
-                wtp = RUNTIME.wtps[wtp_addr]
-                lvap.wtp = wtp
+                if "wtp" in request:
 
-            elif "blocks" in request:
+                    wtp_addr = EtherAddress(request['wtp'])
+                    wtp = RUNTIME.wtps[wtp_addr]
+                    lvap.wtp = wtp
 
-                pool = []
+                elif "blocks" in request:
 
-                for block in request["blocks"]:
+                    pool = []
 
-                    wtp_addr = EtherAddress(block['wtp'])
-                    wtp = RUNTIME.wtps[wtp_addr]
-                    hwaddr = EtherAddress(block['hwaddr'])
-                    channel = int(block['channel'])
-                    band = int(block['band'])
+                    for block in request["blocks"]:
+
+                        wtp_addr = EtherAddress(block['wtp'])
+                        wtp = RUNTIME.wtps[wtp_addr]
+                        hwaddr = EtherAddress(block['hwaddr'])
+                        channel = int(block['channel'])
+                        band = int(block['band'])
+
+                        r_block = wtp.block(hwaddr, channel, band)
+
+                        if not r_block:
+                            raise ValueError("Block %s/%u/%u not supported "
+                                             "by %s" % (hwaddr, channel, band,
+                                                        wtp_addr))
+
+                        pool.append(r_block)
+
+                    lvap.blocks = pool
 
-                    r_block = ResourceBlock(wtp, hwaddr, channel, band)
-                    pool.append(r_block)
+                if "encap" in request:
 
-                lvap.blocks = pool
+                    encap = EtherAddress(request["encap"])
+                    lvap.encap = encap
 
-            if "encap" in request:
+                if "tx_policy" in request:
 
-                encap = EtherAddress(request["encap"])
-                lvap.encap = encap
+                    for port in lvap.downlink.values():
+                        port.update(**request["tx_policy"])
 
         except KeyError as ex:
             self.send_error(404, message=ex)
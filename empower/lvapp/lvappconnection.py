@@ -18,38 +18,37 @@
 """LVAP Connection."""
 
 import time
+import struct
 import tornado.ioloop
 
-from construct import Container
-
 from empower.datatypes.etheraddress import EtherAddress
 from empower.datatypes.ssid import SSID
 from empower.core.resourcepool import ResourceBlock
 from empower.core.resourcepool import BT_L20
 from empower.core.radioport import RadioPort
-from empower.lvapp import HEADER
 from empower.lvapp import PT_VERSION
+from empower.lvapp.codec import Message
 from empower.lvapp import PT_BYE
 from empower.lvapp import PT_REGISTER
 from empower.lvapp import PT_LVAP_JOIN
 from empower.lvapp import PT_AUTH_RESPONSE
-from empower.lvapp import AUTH_RESPONSE
+from empower.lvapp.codec import AUTH_RESPONSE
 from empower.lvapp import PT_ASSOC_RESPONSE
-from empower.lvapp import ASSOC_RESPONSE
+from empower.lvapp.codec import ASSOC_RESPONSE
 from empower.lvapp import PT_SET_PORT
-from empower.lvapp import SET_PORT
+from empower.lvapp.codec import SET_PORT
 from empower.lvapp import PT_ADD_LVAP
-from empower.lvapp import ADD_LVAP
+from empower.lvapp.codec import ADD_LVAP
 from empower.lvapp import PT_DEL_LVAP
-from empower.lvapp import DEL_LVAP
+from empower.lvapp.codec import DEL_LVAP
 from empower.lvapp import PT_PROBE_RESPONSE
-from empower.lvapp import PROBE_RESPONSE
+from empower.lvapp.codec import PROBE_RESPONSE
 from empower.lvapp import PT_ADD_LVAP_RESPONSE
 from empower.lvapp import PT_DEL_LVAP_RESPONSE
-from empower.lvapp import CAPS_REQUEST
-from empower.lvapp import LVAP_STATUS_REQUEST
-from empower.lvapp import VAP_STATUS_REQUEST
-from empower.lvapp import PORT_STATUS_REQUEST
+from empower.lvapp.codec import CAPS_REQUEST
+from empower.lvapp.codec import LVAP_STATUS_REQUEST
+from empower.lvapp.codec import VAP_STATUS_REQUEST
+from empower.lvapp.codec import PORT_STATUS_REQUEST
 from empower.lvapp import PT_CAPS_REQUEST
 from empower.lvapp import PT_LVAP_STATUS_REQ
 from empower.lvapp import PT_VAP_STATUS_REQ
@@ -58,7 +57,9 @@ from empower.core.lvap import LVAP
 from empower.core.networkport import NetworkPort
 from empower.core.vap import VAP
 from empower.lvapp import PT_ADD_VAP
-from empower.lvapp import ADD_VAP
+from empower.lvapp.codec import ADD_VAP
+from empower.lvapp.codec import DEL_VAP
+from empower.lvapp import PT_DEL_VAP
 from empower.core.tenant import T_TYPE_SHARED
 from empower.core.tenant import T_TYPE_UNIQUE
 from empower.core.utils import generate_bssid
@@ -71,6 +72,12 @@ LOG = empower.logger.get_logger()
 
 BASE_MAC = EtherAddress("02:ca:fe:00:00:00")
 
+# fixed header (version, type, length) shared by all LVAPP messages
+FRAME_HEADER = struct.Struct("!BBI")
+
+# max number of bytes requested from the stream for each read
+READ_CHUNK = 65536
+
 
 class LVAPPConnection:
     """LVAPP Connection.
@@ -113,6 +120,11 @@ class LVAPPConnection:
         address: The connection source address, i.e. the WTP IP address.
         server: Pointer to the server object.
         wtp: Pointer to a WTP object.
+        rx_bytes: Total number of bytes read from the stream.
+        rx_frames: Total number of frames dispatched.
+        rx_reads: Total number of read operations completed.
+        last_read_bytes: Number of bytes returned by the last read.
+        last_read_frames: Number of frames dispatched by the last read.
     """
 
     def __init__(self, stream, addr, server):
@@ -122,7 +134,12 @@ class LVAPPConnection:
         self.server = server
         self.wtp = None
         self.stream.set_close_callback(self._on_disconnect)
-        self.__buffer = b''
+        self.__buffer = bytearray()
+        self.rx_bytes = 0
+        self.rx_frames = 0
+        self.rx_reads = 0
+        self.last_read_bytes = 0
+        self.last_read_frames = 0
         self._hb_interval_ms = 500
         self._hb_worker = tornado.ioloop.PeriodicCallback(self._heartbeat_cb,
                                                           self._hb_interval_ms)
@@ -143,59 +160,89 @@ class LVAPPConnection:
                 LOG.info('Client inactive %s at %r', self.wtp.addr, self.addr)
                 self.stream.close()
 
-    def _on_read(self, line):
-        """ Appends bytes read from socket to a buffer. Once the full packet
-        has been read the parser is invoked and the buffers is cleared. The
-        parsed packet is then passed to the suitable method or dropped if the
-        packet type in unknown. """
+    def _on_read(self, data):
+        """ Appends bytes read from socket to a buffer. Every complete frame
+        found in the buffer is then passed to the suitable method (or dropped
+        if the packet type in unknown) and removed from the buffer. Trailing
+        partial frames are kept until the next read completes them. """
 
-        self.__buffer = self.__buffer + line
-        hdr = HEADER.parse(self.__buffer)
+        self.__buffer.extend(data)
 
-        if len(self.__buffer) < hdr.length:
-            remaining = hdr.length - len(self.__buffer)
-            self.stream.read_bytes(remaining, self._on_read)
-            return
+        self.rx_reads += 1
+        self.rx_bytes += len(data)
+        self.last_read_bytes = len(data)
+        self.last_read_frames = 0
 
-        try:
-            self._trigger_message(hdr.type)
-        except Exception as ex:
-            LOG.exception(ex)
-            self.stream.close()
+        offset = 0
+        available = len(self.__buffer)
+
+        with memoryview(self.__buffer) as view:
+
+            while available - offset >= FRAME_HEADER.size:
+
+                _, msg_type, length = FRAME_HEADER.unpack_from(view, offset)
+
+                if length < FRAME_HEADER.size:
+                    LOG.error("Invalid frame length %u from %s", length,
+                              self.addr)
+                    self.stream.close()
+                    return
+
+                if available - offset < length:
+                    break
+
+                frame = view[offset:offset + length]
+                offset += length
+
+                self.rx_frames += 1
+                self.last_read_frames += 1
+
+                try:
+                    self._trigger_message(msg_type, frame)
+                except Exception as ex:
+                    LOG.exception(ex)
+                    self.stream.close()
+                finally:
+                    frame.release()
+
+                if self.stream.closed():
+                    return
+
+        # drop consumed frames
+        del self.__buffer[:offset]
 
         if not self.stream.closed():
             self._wait()
 
-    def _trigger_message(self, msg_type):
+    def _trigger_message(self, msg_type, frame):
 
-        if msg_type not in self.server.pt_types:
+        try:
+            parser, builtin, handlers = self.server.dispatch[msg_type]
+        except KeyError:
             LOG.error("Unknown message type %u", msg_type)
             return
 
-        if self.server.pt_types[msg_type]:
-
-            LOG.info("Got message type %u (%s)", msg_type,
-                     self.server.pt_types[msg_type].name)
+        # nobody is listening for this message type
+        if not parser or not (builtin or handlers):
+            return
 
-            msg = self.server.pt_types[msg_type].parse(self.__buffer)
-            addr = EtherAddress(msg.wtp)
+        LOG.debug("Got message type %u (%s)", msg_type, parser.name)
 
-            try:
-                wtp = RUNTIME.wtps[addr]
-            except KeyError:
-                LOG.error("Unknown WTP (%s), closing connection", addr)
-                self.stream.close()
-                return
+        msg = parser.parse(frame.tobytes())
+        addr = EtherAddress(msg.wtp)
 
-            handler_name = "_handle_%s" % self.server.pt_types[msg_type].name
+        try:
+            wtp = RUNTIME.wtps[addr]
+        except KeyError:
+            LOG.error("Unknown WTP (%s), closing connection", addr)
+            self.stream.close()
+            return
 
-            if hasattr(self, handler_name):
-                handler = getattr(self, handler_name)
-                handler(wtp, msg)
+        if builtin:
+            getattr(self, builtin)(wtp, msg)
 
-            if msg_type in self.server.pt_types_handlers:
-                for handler in self.server.pt_types_handlers[msg_type]:
-                    handler(wtp, msg)
+        for handler in handlers:
+            handler(wtp, msg)
 
     def _handle_add_del_lvap(self, wtp, status):
         """Handle an incoming ADD_DEL_LVAP message.
@@ -231,6 +278,7 @@ class LVAPPConnection:
                      lvap.addr, status.module_id)
             idx = lvap.pending.index(status.module_id)
             del lvap.pending[idx]
+            lvap.touch()
         else:
             LOG.info("LVAP %s, pending module id %s not found. Ignoring.",
                      lvap.addr, status.module_id)
@@ -289,8 +337,7 @@ class LVAPPConnection:
                 continue
 
             tenant_id = tenant.tenant_id
-            tokens = [tenant_id.hex[0:12][i:i + 2] for i in range(0, 12, 2)]
-            base_bssid = EtherAddress(':'.join(tokens))
+            base_bssid = tenant.get_prefix()
 
             for block in self.wtp.supports:
 
@@ -303,7 +350,7 @@ class LVAPPConnection:
                 vap = VAP(net_bssid, block, self.wtp, tenant)
 
                 self.send_add_vap(vap)
-                RUNTIME.tenants[tenant_id].vaps[net_bssid] = vap
+                RUNTIME.add_vap(vap)
 
     def _handle_probe_request(self, wtp, request):
         """Handle an incoming PROBE_REQUEST message.
@@ -340,15 +387,8 @@ class LVAPPConnection:
         else:
             LOG.info("Probe request from %s ssid %s", sta, ssid)
 
-        # generate list of available SSIDs
-        ssids = set()
-
-        for tenant in RUNTIME.tenants.values():
-            if tenant.bssid_type == T_TYPE_SHARED:
-                continue
-            for wtp_in_tenant in tenant.wtps.values():
-                if wtp.addr == wtp_in_tenant.addr:
-                    ssids.add(tenant.tenant_name)
+        # list of available SSIDs
+        ssids = RUNTIME.wtp_ssids(wtp.addr)
 
         if not ssids:
             LOG.info("No SSIDs available at this WTP")
@@ -364,17 +404,15 @@ class LVAPPConnection:
         lvap.supported_band = request.supported_band
 
         # Check if block is valid
-        incoming = ResourceBlock(wtp, EtherAddress(request.hwaddr),
-                                 request.channel, request.band)
-
-        valid = [block for block in wtp.supports if block == incoming]
+        valid = wtp.block(EtherAddress(request.hwaddr), request.channel,
+                          request.band)
 
         if not valid:
             LOG.warning("No valid intersection found. Ignoring request.")
             return
 
         # This will trigger an LVAP ADD message (and REMOVE if necessary)
-        lvap.blocks = valid[0]
+        lvap.blocks = valid
 
         # save LVAP in the runtime
         RUNTIME.lvaps[sta] = lvap
@@ -437,7 +475,8 @@ class LVAPPConnection:
             return
 
         # this will trigger an add lvap message to update the bssid
-        lvap.lvap_bssid = lvap_bssid
+        with lvap.batch():
+            lvap.lvap_bssid = lvap_bssid
 
         LOG.info("Auth request from %s for BSSID %s, replying", sta, bssid)
 
@@ -496,17 +535,21 @@ class LVAPPConnection:
                      lvap.addr, lvap.ssid, lvap.lvap_bssid)
             return
 
-        # this will trigger an add lvap message to update the ssid
-        lvap.tenant = RUNTIME.load_tenant(tenant_name)
+        # a single add lvap message (and set port message) is sent to each
+        # block when the batch exits
+        with lvap.batch():
 
-        # set supported band
-        lvap.supported_band = request.supported_band
+            # this will mark the ssid as changed
+            lvap.tenant = RUNTIME.load_tenant(tenant_name)
 
-        # reset downlink radio port
-        lvap.reset_downlink_port()
+            # set supported band
+            lvap.supported_band = request.supported_band
 
-        # this will trigger an add lvap message to update the assoc id
-        lvap.assoc_id = self.server.assoc_id
+            # reset downlink radio port
+            lvap.reset_downlink_port()
+
+            # this will mark the assoc id as changed
+            lvap.assoc_id = self.server.assoc_id
 
         LOG.info("Assoc request sta %s ssid %s bssid %s assoc id %u, replying",
                  lvap.addr, lvap.ssid, lvap.lvap_bssid, lvap.assoc_id)
@@ -514,9 +557,10 @@ class LVAPPConnection:
         self.send_assoc_response(lvap)
 
     def _wait(self):
-        """ Wait for incoming packets on signalling channel """
-        self.__buffer = b''
-        self.stream.read_bytes(6, self._on_read)
+        """ Wait for incoming packets on signalling channel. Whatever is
+        available on the socket (up to READ_CHUNK bytes) is returned. """
+
+        self.stream.read_bytes(READ_CHUNK, self._on_read, partial=True)
 
     def _on_disconnect(self):
         """ Handle WTP disconnection """
@@ -526,25 +570,19 @@ class LVAPPConnection:
 
         LOG.info("WTP disconnected: %s", self.wtp.addr)
 
-        # remove hosted lvaps
-        for addr in list(RUNTIME.lvaps.keys()):
-            lvap = RUNTIME.lvaps[addr]
-            dl_wtps = [block.radio for block in lvap.downlink.keys()]
-            ul_wtps = [block.radio for block in lvap.uplink.keys()]
-            # in case the downlink went down, the remove also the uplinks
-            if self.wtp in dl_wtps:
-                RUNTIME.remove_lvap(lvap.addr)
-            elif self.wtp in ul_wtps:
-                LOG.info("Deleting LVAP (UL): %s", lvap.addr)
-                lvap.clear_uplink()
+        # remove hosted lvaps, in case the downlink went down, the remove
+        # also the uplinks
+        for lvap in RUNTIME.hosted_lvaps(self.wtp):
+            RUNTIME.remove_lvap(lvap.addr)
+
+        for lvap in RUNTIME.hosted_ul_lvaps(self.wtp):
+            LOG.info("Deleting LVAP (UL): %s", lvap.addr)
+            lvap.clear_uplink()
 
         # remove hosted vaps
-        for tenant_id in RUNTIME.tenants.keys():
-            for vap_id in list(RUNTIME.tenants[tenant_id].vaps.keys()):
-                vap = RUNTIME.tenants[tenant_id].vaps[vap_id]
-                if vap.wtp == self.wtp:
-                    LOG.info("Deleting VAP: %s", vap.net_bssid)
-                    del RUNTIME.tenants[tenant_id].vaps[vap.net_bssid]
+        for vap in RUNTIME.hosted_vaps(self.wtp):
+            LOG.info("Deleting VAP: %s", vap.net_bssid)
+            RUNTIME.remove_vap(vap)
 
         # reset state
         self.wtp.set_disconnected()
@@ -631,10 +669,8 @@ class LVAPPConnection:
         lvap = RUNTIME.lvaps[sta]
 
         # Check if block is valid
-        incoming = ResourceBlock(wtp, EtherAddress(status.hwaddr),
-                                 status.channel, status.band)
-
-        valid = [block for block in wtp.supports if block == incoming]
+        valid = wtp.block(EtherAddress(status.hwaddr), status.channel,
+                          status.band)
 
         if not valid:
             LOG.warning("No valid intersection found. Removing block.")
@@ -646,13 +682,13 @@ class LVAPPConnection:
         try:
             if set_mask:
                 # set downlink+uplink block
-                lvap._downlink.setitem(valid[0], RadioPort(lvap, valid[0]))
+                lvap._downlink.setitem(valid, RadioPort(lvap, valid))
             else:
                 # set uplink only blocks
-                lvap._uplink.setitem(valid[0], RadioPort(lvap, valid[0]))
+                lvap._uplink.setitem(valid, RadioPort(lvap, valid))
         except Exception as e:
             LOG.exception(e)
-            LOG.error("Error while importing block %s, removing.", valid[0])
+            LOG.error("Error while importing block %s, removing.", valid)
             wtp.connection.send_del_lvap(lvap)
             return
 
@@ -723,17 +759,15 @@ class LVAPPConnection:
         sta_addr = EtherAddress(status.sta)
 
         # incoming block
-        incoming = ResourceBlock(wtp, EtherAddress(status.hwaddr),
-                                 status.channel, status.band)
-
-        valid = [block for block in wtp.supports if block == incoming]
+        block = wtp.block(EtherAddress(status.hwaddr), status.channel,
+                          status.band)
 
-        if not valid:
-            LOG.error("Incoming block %s is invalid", incoming)
+        if not block:
+            LOG.error("Incoming block (%s, %s, %u, %u) is invalid", wtp.addr,
+                      EtherAddress(status.hwaddr), status.channel,
+                      status.band)
             return
 
-        block = valid[0]
-
         LOG.info("Port status from %s, station %s", wtp.addr, sta_addr)
 
         tx_policy = block.tx_policies[sta_addr]
@@ -745,6 +779,9 @@ class LVAPPConnection:
         tx_policy._ur_count = int(status.ur_mcast_count)
         tx_policy._no_ack = bool(status.flags.no_ack)
 
+        # this is what the agent is currently using
+        tx_policy.mark_synced()
+
         LOG.info("Port status %s", tx_policy)
 
     def _handle_caps(self, wtp, caps):
@@ -760,7 +797,7 @@ class LVAPPConnection:
         for block in caps.blocks:
             hwaddr = EtherAddress(block[0])
             r_block = ResourceBlock(wtp, hwaddr, block[1], block[2])
-            wtp.supports.add(r_block)
+            wtp.add_block(r_block)
 
         for port in caps.ports:
 
@@ -771,7 +808,7 @@ class LVAPPConnection:
                                        port_id=int(port[1]),
                                        iface=iface)
 
-            wtp.ports[network_port.port_id] = network_port
+            wtp.add_port(network_port)
 
         # set state to online
         wtp.set_online()
@@ -838,10 +875,10 @@ class LVAPPConnection:
             TypeError: if vap is not an VAP object
         """
 
-        caps_request = Container(version=PT_VERSION,
-                                 type=PT_CAPS_REQUEST,
-                                 length=10,
-                                 seq=self.wtp.seq)
+        caps_request = Message(version=PT_VERSION,
+                               type=PT_CAPS_REQUEST,
+                               length=10,
+                               seq=self.wtp.seq)
 
         LOG.info("Sending caps request to %s", self.wtp.addr)
 
@@ -858,10 +895,10 @@ class LVAPPConnection:
             None
         """
 
-        caps_request = Container(version=PT_VERSION,
-                                 type=PT_LVAP_STATUS_REQ,
-                                 length=10,
-                                 seq=self.wtp.seq)
+        caps_request = Message(version=PT_VERSION,
+                               type=PT_LVAP_STATUS_REQ,
+                               length=10,
+                               seq=self.wtp.seq)
 
         LOG.info("Sending lvap status request to %s", self.wtp.addr)
 
@@ -878,10 +915,10 @@ class LVAPPConnection:
             None
         """
 
-        caps_request = Container(version=PT_VERSION,
-                                 type=PT_VAP_STATUS_REQ,
-                                 length=10,
-                                 seq=self.wtp.seq)
+        caps_request = Message(version=PT_VERSION,
+                               type=PT_VAP_STATUS_REQ,
+                               length=10,
+                               seq=self.wtp.seq)
 
         LOG.info("Sending vap status request to %s", self.wtp.addr)
 
@@ -898,10 +935,10 @@ class LVAPPConnection:
             None
         """
 
-        caps_request = Container(version=PT_VERSION,
-                                 type=PT_PORT_STATUS_REQ,
-                                 length=10,
-                                 seq=self.wtp.seq)
+        caps_request = Message(version=PT_VERSION,
+                               type=PT_PORT_STATUS_REQ,
+                               length=10,
+                               seq=self.wtp.seq)
 
         LOG.info("Sending port status request to %s", self.wtp.addr)
 
@@ -937,7 +974,7 @@ class LVAPPConnection:
         # If the VAP does not exists, then create a new one
         if net_bssid_addr not in tenant.vaps:
             vap = VAP(net_bssid_addr, incoming, wtp, tenant)
-            tenant.vaps[net_bssid_addr] = vap
+            RUNTIME.add_vap(vap)
 
         vap = tenant.vaps[net_bssid_addr]
 
@@ -953,15 +990,15 @@ class LVAPPConnection:
             TypeError: if vap is not an VAP object
         """
 
-        add_vap = Container(version=PT_VERSION,
-                            type=PT_ADD_VAP,
-                            length=24,
-                            seq=self.wtp.seq,
-                            hwaddr=vap.block.hwaddr.to_raw(),
-                            channel=vap.block.channel,
-                            band=vap.block.band,
-                            net_bssid=vap.net_bssid.to_raw(),
-                            ssid=vap.ssid.to_raw())
+        add_vap = Message(version=PT_VERSION,
+                          type=PT_ADD_VAP,
+                          length=24,
+                          seq=self.wtp.seq,
+                          hwaddr=vap.block.hwaddr.to_raw(),
+                          channel=vap.block.channel,
+                          band=vap.block.band,
+                          net_bssid=vap.net_bssid.to_raw(),
+                          ssid=vap.ssid.to_raw())
 
         add_vap.length = add_vap.length + len(vap.ssid)
         LOG.info("Add vap %s", vap)
@@ -979,11 +1016,11 @@ class LVAPPConnection:
             TypeError: if vap is not an VAP object
         """
 
-        del_vap = Container(version=PT_VERSION,
-                            type=PT_DEL_VAP,
-                            length=16,
-                            seq=self.wtp.seq,
-                            net_bssid=vap.net_bssid.to_raw())
+        del_vap = Message(version=PT_VERSION,
+                          type=PT_DEL_VAP,
+                          length=16,
+                          seq=self.wtp.seq,
+                          net_bssid=vap.net_bssid.to_raw())
 
         LOG.info("Del vap %s", vap)
 
@@ -1000,11 +1037,11 @@ class LVAPPConnection:
             TypeError: if lvap is not an LVAP object.
         """
 
-        response = Container(version=PT_VERSION,
-                             type=PT_ASSOC_RESPONSE,
-                             length=16,
-                             seq=self.wtp.seq,
-                             sta=lvap.addr.to_raw())
+        response = Message(version=PT_VERSION,
+                           type=PT_ASSOC_RESPONSE,
+                           length=16,
+                           seq=self.wtp.seq,
+                           sta=lvap.addr.to_raw())
 
         msg = ASSOC_RESPONSE.build(response)
         self.stream.write(msg)
@@ -1019,12 +1056,12 @@ class LVAPPConnection:
             TypeError: if lvap is not an LVAP object.
         """
 
-        response = Container(version=PT_VERSION,
-                             type=PT_AUTH_RESPONSE,
-                             length=22,
-                             seq=self.wtp.seq,
-                             sta=lvap.addr.to_raw(),
-                             bssid=lvap.lvap_bssid.to_raw())
+        response = Message(version=PT_VERSION,
+                           type=PT_AUTH_RESPONSE,
+                           length=22,
+                           seq=self.wtp.seq,
+                           sta=lvap.addr.to_raw(),
+                           bssid=lvap.lvap_bssid.to_raw())
 
         msg = AUTH_RESPONSE.build(response)
         self.stream.write(msg)
@@ -1039,12 +1076,12 @@ class LVAPPConnection:
             TypeError: if lvap is not an LVAP object.
         """
 
-        response = Container(version=PT_VERSION,
-                             type=PT_PROBE_RESPONSE,
-                             length=16 + len(ssid.to_raw()),
-                             seq=self.wtp.seq,
-                             sta=lvap.addr.to_raw(),
-                             ssid=ssid.to_raw())
+        response = Message(version=PT_VERSION,
+                           type=PT_PROBE_RESPONSE,
+                           length=16 + len(ssid.to_raw()),
+                           seq=self.wtp.seq,
+                           sta=lvap.addr.to_raw(),
+                           ssid=ssid.to_raw())
 
         msg = PROBE_RESPONSE.build(response)
         self.stream.write(msg)
@@ -1070,17 +1107,17 @@ class LVAPPConnection:
             target_channel = target_block.channel
             target_band = target_block.band
 
-        del_lvap = Container(version=PT_VERSION,
-                             type=PT_DEL_LVAP,
-                             length=30,
-                             seq=self.wtp.seq,
-                             module_id=lvap.module_id,
-                             sta=lvap.addr.to_raw(),
-                             target_hwaddr=target_hwaddr.to_raw(),
-                             target_channel=target_channel,
-                             tagert_band=target_band,
-                             csa_switch_mode=0,
-                             csa_switch_count=3)
+        del_lvap = Message(version=PT_VERSION,
+                           type=PT_DEL_LVAP,
+                           length=30,
+                           seq=self.wtp.seq,
+                           module_id=lvap.module_id,
+                           sta=lvap.addr.to_raw(),
+                           target_hwaddr=target_hwaddr.to_raw(),
+                           target_channel=target_channel,
+                           tagert_band=target_band,
+                           csa_switch_mode=0,
+                           csa_switch_count=3)
 
         LOG.info("Del lvap %s", lvap)
 
@@ -1097,26 +1134,26 @@ class LVAPPConnection:
             TypeError: if lvap is not an LVAP object.
         """
 
-        flags = Container(no_ack=tx_policy.no_ack)
+        flags = Message(no_ack=tx_policy.no_ack)
         rates = sorted([int(x * 2) for x in tx_policy.mcs])
         ht_rates = sorted([int(x) for x in tx_policy.ht_mcs])
 
-        set_port = Container(version=PT_VERSION,
-                             type=PT_SET_PORT,
-                             length=32 + len(rates) + len(ht_rates),
-                             seq=self.wtp.seq,
-                             flags=flags,
-                             sta=tx_policy.addr.to_raw(),
-                             hwaddr=tx_policy.block.hwaddr.to_raw(),
-                             channel=tx_policy.block.channel,
-                             band=tx_policy.block.band,
-                             rts_cts=tx_policy.rts_cts,
-                             tx_mcast=tx_policy.mcast,
-                             ur_mcast_count=tx_policy.ur_count,
-                             nb_mcses=len(rates),
-                             nb_ht_mcses=len(ht_rates),
-                             mcs=rates,
-                             ht_mcs=ht_rates)
+        set_port = Message(version=PT_VERSION,
+                           type=PT_SET_PORT,
+                           length=32 + len(rates) + len(ht_rates),
+                           seq=self.wtp.seq,
+                           flags=flags,
+                           sta=tx_policy.addr.to_raw(),
+                           hwaddr=tx_policy.block.hwaddr.to_raw(),
+                           channel=tx_policy.block.channel,
+                           band=tx_policy.block.band,
+                           rts_cts=tx_policy.rts_cts,
+                           tx_mcast=tx_policy.mcast,
+                           ur_mcast_count=tx_policy.ur_count,
+                           nb_mcses=len(rates),
+                           nb_ht_mcses=len(ht_rates),
+                           mcs=rates,
+                           ht_mcs=ht_rates)
 
         LOG.info("Set tx policy %s", tx_policy)
 
@@ -1133,44 +1170,44 @@ class LVAPPConnection:
             TypeError: if lvap is not an LVAP object.
         """
 
-        flags = Container(authenticated=lvap.authentication_state,
-                          associated=lvap.association_state,
-                          set_mask=set_mask)
+        flags = Message(authenticated=lvap.authentication_state,
+                        associated=lvap.association_state,
+                        set_mask=set_mask)
 
         encap = EtherAddress("00:00:00:00:00:00")
 
         if lvap.encap:
             encap = lvap.encap
 
-        add_lvap = Container(version=PT_VERSION,
-                             type=PT_ADD_LVAP,
-                             length=51,
-                             seq=self.wtp.seq,
-                             module_id=lvap.module_id,
-                             flags=flags,
-                             assoc_id=lvap.assoc_id,
-                             hwaddr=block.hwaddr.to_raw(),
-                             channel=block.channel,
-                             band=block.band,
-                             supported_band=lvap.supported_band,
-                             sta=lvap.addr.to_raw(),
-                             encap=encap.to_raw(),
-                             net_bssid=lvap.net_bssid.to_raw(),
-                             lvap_bssid=lvap.lvap_bssid.to_raw(),
-                             ssids=[])
+        add_lvap = Message(version=PT_VERSION,
+                           type=PT_ADD_LVAP,
+                           length=51,
+                           seq=self.wtp.seq,
+                           module_id=lvap.module_id,
+                           flags=flags,
+                           assoc_id=lvap.assoc_id,
+                           hwaddr=block.hwaddr.to_raw(),
+                           channel=block.channel,
+                           band=block.band,
+                           supported_band=lvap.supported_band,
+                           sta=lvap.addr.to_raw(),
+                           encap=encap.to_raw(),
+                           net_bssid=lvap.net_bssid.to_raw(),
+                           lvap_bssid=lvap.lvap_bssid.to_raw(),
+                           ssids=[])
 
         if lvap.ssid:
             b_ssid = lvap.ssid.to_raw()
-            tmp = Container(length=len(b_ssid), ssid=b_ssid)
+            tmp = Message(length=len(b_ssid), ssid=b_ssid)
             add_lvap.ssids.append(tmp)
             add_lvap.length = add_lvap.length + len(b_ssid) + 1
         else:
-            add_lvap.ssids.append(Container(length=0, ssid=b''))
+            add_lvap.ssids.append(Message(length=0, ssid=b''))
             add_lvap.length = add_lvap.length + 1
 
         for ssid in lvap.ssids:
             b_ssid = ssid.to_raw()
-            tmp = Container(length=len(b_ssid), ssid=b_ssid)
+            tmp = Message(length=len(b_ssid), ssid=b_ssid)
             add_lvap.ssids.append(tmp)
             add_lvap.length = add_lvap.length + len(b_ssid) + 1
 
@@ -39,6 +39,7 @@ from empower.lvapp.tenantlvaphandler import TenantLVAPHandler
 from empower.lvapp.tenantvaphandler import TenantVAPHandler
 from empower.lvapp.tenantlvapporthandler import TenantLVAPPortHandler
 from empower.lvapp.tenantlvapnexthandler import TenantLVAPNextHandler
+from empower.lvapp.wtplvaphandler import WTPLVAPHandler
 
 from empower.main import RUNTIME
 
@@ -95,18 +96,18 @@ class ModuleLVAPPWorker(ModuleWorker):
     def handle_lvap_leave(self, lvap):
         """LVAP left."""
 
-        for module_id in list(self.modules.keys()):
-            module = self.modules[module_id]
-            if hasattr(module, "lvap") and module.lvap == lvap:
-                self.modules[module_id].unload()
+        for module_id in self.modules.find('lvap', lvap):
+            if module_id not in self.modules:
+                continue
+            self.modules[module_id].unload()
 
     def handle_bye(self, wtp):
         """WTP left."""
 
-        for module_id in list(self.modules.keys()):
-            module = self.modules[module_id]
-            if hasattr(module, "wtp") and module.wtp == wtp:
-                self.modules[module_id].unload()
+        for module_id in self.modules.find('wtp', wtp):
+            if module_id not in self.modules:
+                continue
+            self.modules[module_id].unload()
 
     def handle_packet(self, wtp, msg):
         """Handle response message."""
@@ -119,6 +120,7 @@ class ModuleLVAPPWorker(ModuleWorker):
         self.log.info("Received %s response (id=%u)", self.module.MODULE_NAME,
                       msg.module_id)
 
+        module.request_completed()
         module.handle_response(msg)
 
 
@@ -127,6 +129,7 @@ class LVAPPServer(PNFPServer, TCPServer):
 
     PNFDEV = WTP
     TBL_PNFDEV = TblWTP
+    CONNECTION = LVAPPConnection
 
     def __init__(self, port, pt_types, pt_types_handlers):
 
@@ -178,6 +181,7 @@ def launch(port=DEFAULT_PORT):
     rest_server.add_handler_class(TenantVAPHandler, server)
     rest_server.add_handler_class(TenantLVAPPortHandler, server)
     rest_server.add_handler_class(TenantLVAPNextHandler, server)
+    rest_server.add_handler_class(WTPLVAPHandler, server)
 
     server.log.info("LVAP Server available at %u", server.port)
     return server
@@ -23,7 +23,6 @@ import uuid
 
 from empower.datatypes.etheraddress import EtherAddress
 from empower.restserver.apihandlers import EmpowerAPIHandlerUsers
-from empower.core.resourcepool import ResourceBlock
 
 from empower.main import RUNTIME
 
@@ -77,6 +76,7 @@ class TenantLVAPHandler(EmpowerAPIHandlerUsers):
 
         Request:
             version: the protocol version (1.0)
+            tx_policy: downlink tx policy fields (optional)
 
         Example URLs:
             PUT /api/v1/pools/52313ecb-9d00-4b7d-b873-b55d3d9ada26/lvaps/11:22:33:44:55:66
@@ -98,33 +98,47 @@ class TenantLVAPHandler(EmpowerAPIHandlerUsers):
             tenant = RUNTIME.tenants[tenant_id]
             lvap = tenant.lvaps[lvap_addr]
 
-            if "wtp" in request:
+            # changes are pushed to the agents when the batch exits
+            with lvap.batch():
 
-                wtp_addr = EtherAddress(request['wtp'])
-                wtp = tenant.wtps[wtp_addr]
-                lvap.wtp = wtp
+                if "wtp" in request:
 
-            elif "blocks" in request:
+                    wtp_addr = EtherAddress(request['wtp'])
+                    wtp = tenant.wtps[wtp_addr]
+                    lvap.wtp = wtp
 
-                pool = []
+                elif "blocks" in request:
 
-                for block in request["blocks"]:
+                    pool = []
 
-                    wtp_addr = EtherAddress(block['wtp'])
-                    wtp = RUNTIME.wtps[wtp_addr]
-                    hwaddr = EtherAddress(block['hwaddr'])
-                    channel = int(block['channel'])
-                    band = int(block['band'])
+                    for block in request["blocks"]:
 
-                    r_block = ResourceBlock(wtp, hwaddr, channel, band)
-                    pool.append(r_block)
+                        wtp_addr = EtherAddress(block['wtp'])
+                        wtp = RUNTIME.wtps[wtp_addr]
+                        hwaddr = EtherAddress(block['hwaddr'])
+                        channel = int(block['channel'])
+                        band = int(block['band'])
 
-                lvap.blocks = pool
+                        r_block = wtp.block(hwaddr, channel, band)
 
-            if "encap" in request:
+                        if not r_block:
+                            raise ValueError("Block %s/%u/%u not supported "
+                                             "by %s" % (hwaddr, channel, band,
+                                                        wtp_addr))
 
-                encap = EtherAddress(request["encap"])
-                lvap.encap = encap
+                        pool.append(r_block)
+
+                    lvap.blocks = pool
+
+                if "encap" in request:
+
+                    encap = EtherAddress(request["encap"])
+                    lvap.encap = encap
+
+                if "tx_policy" in request:
+
+                    for port in lvap.downlink.values():
+                        port.update(**request["tx_policy"])
 
         except KeyError as ex:
             self.send_error(404, message=ex)
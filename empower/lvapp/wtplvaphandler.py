@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2016 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+"""WTP LVAPs Handerler."""
+
+from empower.datatypes.etheraddress import EtherAddress
+from empower.restserver.apihandlers import EmpowerAPIHandler
+
+from empower.main import RUNTIME
+
+
+class WTPLVAPHandler(EmpowerAPIHandler):
+    """WTP LVAP handler. Used to view the LVAPs hosted by a WTP."""
+
+    HANDLERS = [r"/api/v1/wtps/([a-zA-Z0-9:]*)/lvaps/?"]
+
+    def get(self, *args, **kwargs):
+        """ Get the LVAPs hosted by a WTP.
+
+        LVAPs having the downlink block on the WTP are listed under downlink,
+        LVAPs having only uplink blocks on the WTP are listed under uplink.
+
+        Args:
+            wtp_id: the wtp address
+
+        Example URLs:
+            GET /api/v1/wtps/11:22:33:44:55:66/lvaps
+        """
+
+        try:
+            if len(args) != 1:
+                raise ValueError("Invalid URL")
+            wtp = RUNTIME.wtps[EtherAddress(args[0])]
+            self.write_as_json({'downlink': RUNTIME.hosted_lvaps(wtp),
+                                'uplink': RUNTIME.hosted_ul_lvaps(wtp)})
+        except KeyError as ex:
+            self.send_error(404, message=ex)
+        except ValueError as ex:
+            self.send_error(400, message=ex)
+        self.set_status(200, None)
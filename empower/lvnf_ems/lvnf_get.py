@@ -46,11 +46,9 @@ class LVNFGet(ModulePeriodic):
         self.retcode = None
         self.samples = None
 
-    def __eq__(self, other):
+    def poll_key(self):
 
-        return super().__eq__(other) and \
-            self.lvnf == other.lvnf and \
-            self.handler == other.handler
+        return super().poll_key() + (self.lvnf, self.handler)
 
     @property
     def handler(self):
@@ -48,12 +48,9 @@ class LVNFSet(ModulePeriodic):
         self.samples = None
         self.retcode = None
 
-    def __eq__(self, other):
+    def poll_key(self):
 
-        return super().__eq__(other) and \
-            self.lvnf == other.lvnf and \
-            self.handler == other.handler and \
-            self.value == other.value
+        return super().poll_key() + (self.lvnf, self.handler, self.value)
 
     @property
     def handler(self):
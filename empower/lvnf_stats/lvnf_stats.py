@@ -52,9 +52,9 @@ class LVNFStats(ModulePeriodic):
     def lvnf(self, value):
         self.__lvnf = UUID(str(value))
 
-    def __eq__(self, other):
+    def poll_key(self):
 
-        return super().__eq__(other) and self.lvnf == other.lvnf
+        return super().poll_key() + (self.lvnf, )
 
     def to_dict(self):
         """Return a JSON-serializable representation of this object."""
@@ -96,19 +96,21 @@ class LVNFPMainHandler(tornado.websocket.WebSocketHandler):
         LOG.info("Received %s seq %u from %s", msg['type'], msg['seq'],
                  self.request.remote_ip)
 
-        handler_name = "_handle_%s" % msg['type']
+        try:
+            _, builtin, handlers = self.server.dispatch[msg['type']]
+        except KeyError:
+            _, builtin, handlers = self.server.compile_message(msg['type'])
 
-        if hasattr(self, handler_name):
-            handler = getattr(self, handler_name)
+        if builtin:
+            handler = getattr(self, builtin)
             try:
                 handler(msg)
             except Exception as ex:
                 LOG.exception(ex)
                 return
 
-        if msg['type'] in self.server.pt_types_handlers:
-            for handler in self.server.pt_types_handlers[msg['type']]:
-                handler(msg)
+        for handler in handlers:
+            handler(msg)
 
     def send_bye_message_to_self(self):
         """Send bye message to self."""
@@ -230,7 +232,7 @@ class LVNFPMainHandler(tornado.websocket.WebSocketHandler):
                                        iface=port['iface'],
                                        hwaddr=EtherAddress(port['hwaddr']))
 
-            cpp.ports[network_port.port_id] = network_port
+            cpp.add_port(network_port)
 
         # set state to online
         cpp.set_online()
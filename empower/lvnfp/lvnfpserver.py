@@ -80,6 +80,7 @@ class ModuleLVNFPWorker(ModuleWorker):
         self.log.info("Received %s response (id=%u)", self.module.MODULE_NAME,
                       msg['module_id'])
 
+        module.request_completed()
         module.handle_response(msg)
 
 
@@ -105,6 +106,7 @@ class LVNFPServer(PNFPServer, tornado.web.Application):
 
     PNFDEV = CPP
     TBL_PNFDEV = TblCPP
+    CONNECTION = LVNFPMainHandler
 
     def __init__(self, port, pt_types, pt_types_handlers):
 
@@ -120,6 +122,14 @@ class LVNFPServer(PNFPServer, tornado.web.Application):
         http_server = tornado.httpserver.HTTPServer(self)
         http_server.listen(self.port)
 
+    def message_name(self, pt_type):
+        """Return the name used to look up the built-in handler.
+
+        LVNFP messages are JSON objects whose type is already the name of the
+        message."""
+
+        return pt_type
+
 
 def launch(port=DEFAULT_PORT):
     """Start LVNFP Server Module. """
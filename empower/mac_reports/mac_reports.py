@@ -135,6 +135,11 @@ class MACReports(ModuleTrigger):
 
         self._deadline = int(value)
 
+    def sample(self):
+        """Return the PRBs utilization (see Module.sample())."""
+
+        return dict(self.results) if self.results else None
+
     def to_dict(self):
         """ Return a JSON-serializable."""
 
@@ -173,6 +178,7 @@ class MACReports(ModuleTrigger):
                                     deadline=self.deadline)
 
         self.vbs.connection.send_message(mac_reports_req, MAC_REPORTS_REQ)
+        self.request_sent(self.vbs.addr)
 
     def handle_response(self, meas):
         """Handle an incoming MAC_REPORTS_RESP message.
@@ -64,6 +64,9 @@ class Busyness(ModulePeriodic):
     MODULE_NAME = "busyness"
     REQUIRED = ['module_type', 'worker', 'tenant_id', 'block']
 
+    # to_dict() embeds the block (busyness, ucqm, tx policies)
+    VERSIONED = ('block', )
+
     def __init__(self):
 
         super().__init__()
@@ -74,8 +77,8 @@ class Busyness(ModulePeriodic):
         # data structures
         self.busyness = None
 
-    def __eq__(self, other):
-        return super().__eq__(other) and self.block == other.block
+    def poll_key(self):
+        return super().poll_key() + (self.block, )
 
     @property
     def block(self):
@@ -105,24 +108,24 @@ class Busyness(ModulePeriodic):
                 raise ValueError("Missing field: wtp")
 
             # Check if block is valid
-            incoming = ResourceBlock(wtp, EtherAddress(value['hwaddr']),
-                                     int(value['channel']),
-                                     int(value['band']))
-
-            match = [block for block in wtp.supports if block == incoming]
+            block = wtp.block(EtherAddress(value['hwaddr']),
+                              int(value['channel']),
+                              int(value['band']))
 
-            if not match:
+            if not block:
                 raise ValueError("No block specified")
 
-            if len(match) > 1:
-                raise ValueError("More than one block specified")
-
-            self._block = match[0]
+            self._block = block
 
         else:
 
             raise ValueError("Invalid block")
 
+    def sample(self):
+        """Return the busyness (see Module.sample())."""
+
+        return self.busyness
+
     def to_dict(self):
         """ Return a JSON-serializable dictionary. """
 
@@ -168,6 +171,7 @@ class Busyness(ModulePeriodic):
 
         msg = BUSYNESS_REQUEST.build(req)
         wtp.connection.stream.write(msg)
+        self.request_sent(wtp.addr)
 
     def handle_response(self, response):
         """Handle an incoming poller response message.
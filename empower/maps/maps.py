@@ -68,6 +68,9 @@ class Maps(ModulePeriodic):
 
     MODULE_NAME = None
     REQUIRED = ['module_type', 'worker', 'tenant_id', 'block']
+
+    # to_dict() embeds the block (busyness, ucqm, tx policies)
+    VERSIONED = ('block', )
     PT_REQUEST = None
 
     def __init__(self):
@@ -80,8 +83,8 @@ class Maps(ModulePeriodic):
         # data structures
         self.maps = CQM()
 
-    def __eq__(self, other):
-        return super().__eq__(other) and self.block == other.block
+    def poll_key(self):
+        return super().poll_key() + (self.block, )
 
     @property
     def block(self):
@@ -111,26 +114,26 @@ class Maps(ModulePeriodic):
                 raise ValueError("Missing field: wtp")
 
             # Check if block is valid
-            incoming = ResourceBlock(wtp, EtherAddress(value['hwaddr']),
-                                     int(value['channel']),
-                                     int(value['band']))
-
-            match = [block for block in wtp.supports if block == incoming]
+            block = wtp.block(EtherAddress(value['hwaddr']),
+                              int(value['channel']),
+                              int(value['band']))
 
-            if not match:
+            if not block:
                 raise ValueError("No block specified")
 
-            if len(match) > 1:
-                raise ValueError("More than one block specified")
+            self._block = block
+
+    def sample(self):
+        """Return the RSSI of each station (see Module.sample())."""
 
-            self._block = match[0]
+        return self.maps.values_of('mov_rssi')
 
     def to_dict(self):
         """ Return a JSON-serializable dictionary. """
 
         out = super().to_dict()
 
-        out['maps'] = {str(k): v for k, v in self.maps.items()}
+        out['maps'] = self.maps.to_dict()
         out['block'] = self.block.to_dict()
 
         return out
@@ -171,6 +174,7 @@ class Maps(ModulePeriodic):
 
         msg = POLLER_REQUEST.build(req)
         wtp.connection.stream.write(msg)
+        self.request_sent(wtp.addr)
 
     def handle_response(self, response):
         """Handle an incoming poller response message.
@@ -180,34 +184,14 @@ class Maps(ModulePeriodic):
             None
         """
 
-        # update cache
+        # update the block row of the quality matrix in place
         map_entry_block = getattr(self.block, self.MODULE_NAME)
 
-        lvap_addrs = [EtherAddress(entry[0]) for entry in response.img_entries]
-
-        keys = [entry for entry in map_entry_block.keys()]
-
-        for key in keys:
-
-            if key not in lvap_addrs:
-                del map_entry_block[key]
+        map_entry_block.replace((EtherAddress(entry[0]), entry[1:6])
+                                for entry in response.img_entries)
 
         # update this object
-        self.maps = CQM()
-
-        for entry in response.img_entries:
-
-            addr = EtherAddress(entry[0])
-
-            value = {'addr': addr,
-                     'last_rssi_std': entry[1],
-                     'last_rssi_avg': entry[2],
-                     'last_packets': entry[3],
-                     'hist_packets': entry[4],
-                     'mov_rssi': entry[5]}
-
-            map_entry_block[addr] = value
-            self.maps[addr] = value
+        self.maps = map_entry_block
 
         # call callback
         self.handle_callback(self)
@@ -60,6 +60,10 @@ class EmpowerAPIHandler(tornado.web.RequestHandler):
     def write_as_json(self, value):
         """Return reply as a json document."""
 
+        if hasattr(value, 'snapshot_json'):
+            self.write(value.snapshot_json())
+            return
+
         self.write(json.dumps(value, sort_keys=True, indent=4,
                               cls=EmpowerEncoder))
 
@@ -18,12 +18,21 @@
 """Exposes a RESTful interface for EmPOWER."""
 
 import tornado.web
+import tornado.websocket
 import tornado.httpserver
 
 from tornado.web import MissingArgumentError
 from uuid import UUID
 from empower import settings
 from empower.core.service import Service
+from empower.core.timerwheel import TIMER_WHEEL
+from empower.core.callbacks import CALLBACKS
+from empower.core.latency import LATENCIES
+from empower.core.tsdb import TSDB
+from empower.core.streams import STREAMS
+from empower.core.streams import StreamSubscriber
+from empower.core.streams import module_topic
+from empower.core.streams import event_topic
 from empower.core.account import ROLE_ADMIN, ROLE_USER
 from empower.restserver.apihandlers import EmpowerAPIHandler
 from empower.restserver.apihandlers import EmpowerAPIHandlerUsers
@@ -1284,6 +1293,342 @@ class TenantComponentsHandler(EmpowerAPIHandlerUsers):
         self.set_status(201, None)
 
 
+class TimersHandler(EmpowerAPIHandler):
+    """Timers handler. Used to view the timer wheel load."""
+
+    HANDLERS = [r"/api/v1/timers/?"]
+
+    def get(self, *args):
+        """ Return the per period load statistics of the timer wheel.
+
+        Example URLs:
+
+            GET /api/v1/timers
+
+        """
+
+        self.write_as_json(TIMER_WHEEL)
+
+
+class LatenciesHandler(EmpowerAPIHandler):
+    """Latencies handler. Used to view the polling latency histograms."""
+
+    HANDLERS = [r"/api/v1/latencies/?"]
+
+    def get(self, *args):
+        """ Return the request/response latency histograms of the polled
+        modules, per module type and per module type and device.
+
+        Example URLs:
+
+            GET /api/v1/latencies
+
+        """
+
+        self.write_as_json(LATENCIES)
+
+
+class TimeSeriesHandler(EmpowerAPIHandler):
+    """Time-series handler. Used to query the time-series store."""
+
+    HANDLERS = [r"/api/v1/tsdb/?",
+                r"/api/v1/tsdb/(.+)"]
+
+    def get(self, *args):
+        """ List the stored series or query a series.
+
+        Args:
+            [0]: the series name (optional)
+
+        Query:
+            start: the first timestamp (optional)
+            end: the last timestamp (optional)
+            resolution: 0 (raw), 60, or 3600 seconds, if missing the finest
+                resolution covering start is used
+
+        Example URLs:
+
+            GET /api/v1/tsdb
+            GET /api/v1/tsdb/<tenant_id>/lvap_stats/<lvap>/6?start=1500000000
+            GET /api/v1/tsdb/<tenant_id>/busyness/<block>?resolution=3600
+
+        """
+
+        try:
+
+            if len(args) > 1:
+                raise ValueError("Invalid URL")
+
+            if not args or not args[0]:
+                out = TSDB.to_dict()
+                out['names'] = TSDB.names()
+                self.write_as_json(out)
+                return
+
+            start = self.get_argument("start", default=None)
+            end = self.get_argument("end", default=None)
+            resolution = self.get_argument("resolution", default=None)
+
+            start = float(start) if start is not None else None
+            end = float(end) if end is not None else None
+            resolution = int(resolution) if resolution is not None else None
+
+            self.write_as_json(TSDB.query(args[0].rstrip('/'), start, end,
+                                          resolution))
+
+        except KeyError as ex:
+            self.send_error(404, message=ex)
+        except ValueError as ex:
+            self.send_error(400, message=ex)
+
+
+class CallbacksHandler(EmpowerAPIHandler):
+    """Callbacks handler. Used to view and tune remote callbacks delivery."""
+
+    HANDLERS = [r"/api/v1/callbacks/?"]
+
+    def get(self, *args):
+        """ Return the statistics of the remote callbacks endpoints.
+
+        Example URLs:
+
+            GET /api/v1/callbacks
+
+        """
+
+        self.write_as_json(CALLBACKS)
+
+    def put(self, *args):
+        """ Update the settings of a remote callbacks endpoint.
+
+        Request:
+            version: protocol version (1.0)
+            url: the URL of the remote XML-RPC server
+            queue_size: the max number of pending calls (optional)
+            batch: the max number of calls per request (optional)
+
+        Example URLs:
+
+            PUT /api/v1/callbacks
+            {
+              "version" : 1.0,
+              "url" : "http://127.0.0.1:8000/RPC2",
+              "queue_size" : 50,
+              "batch" : 10
+            }
+
+        """
+
+        try:
+
+            request = tornado.escape.json_decode(self.request.body)
+
+            if "version" not in request:
+                raise ValueError("missing version element")
+
+            if "url" not in request:
+                raise ValueError("missing url element")
+
+            queue_size = request.get('queue_size')
+            batch = request.get('batch')
+
+            CALLBACKS.configure(request['url'],
+                                None if queue_size is None
+                                else int(queue_size),
+                                None if batch is None else int(batch))
+
+        except ValueError as ex:
+            self.send_error(400, message=ex)
+        except KeyError as ex:
+            self.send_error(404, message=ex)
+
+        self.set_status(204, None)
+
+
+def stream_subscriber(handler, transport):
+    """Build a stream subscriber from the request arguments.
+
+    Returns:
+        a (subscriber, since) tuple
+
+    Raises:
+        ValueError, if the arguments are not valid
+    """
+
+    topics = set()
+
+    for module in handler.get_argument("modules", "").split(","):
+        if not module:
+            continue
+        tokens = module.split(":")
+        if len(tokens) == 1:
+            topics.add(module_topic(tokens[0]))
+        elif len(tokens) == 2:
+            topics.add(module_topic(tokens[0], int(tokens[1])))
+        else:
+            raise ValueError("Invalid module %s" % module)
+
+    for event in handler.get_argument("events", "").split(","):
+        if event:
+            topics.add(event_topic(event))
+
+    if not topics:
+        raise ValueError("missing modules/events argument")
+
+    tenant_id = handler.get_argument("tenant_id", None)
+
+    if tenant_id:
+        tenant_id = UUID(tenant_id)
+
+    kwargs = {}
+
+    if handler.get_argument("rate", None):
+        kwargs['rate'] = float(handler.get_argument("rate"))
+
+    since = handler.get_argument("since", None) or \
+        handler.request.headers.get("Last-Event-ID")
+
+    if since is not None:
+        since = int(since)
+
+    return StreamSubscriber(transport, topics, tenant_id, **kwargs), since
+
+
+class StreamHandler(EmpowerAPIHandler):
+    """Stream handler. Used to receive module updates and events (SSE)."""
+
+    HANDLERS = [r"/api/v1/stream/?"]
+
+    def initialize(self, server=None):
+        super().initialize(server)
+        self.subscriber = None
+
+    @tornado.web.asynchronous
+    def get(self, *args):
+        """ Subscribe to module updates and events as Server-Sent Events.
+
+        Args:
+            modules: comma separated list of module types, optionally
+                followed by a module id (e.g. lvap_stats:12)
+            events: comma separated list of event types (e.g. lvapjoin)
+            tenant_id: only receive modules/events of this tenant
+            rate: max number of messages per second
+            since: resume after this sequence number (the Last-Event-ID
+                header is also supported)
+
+        Example URLs:
+
+            GET /api/v1/stream?modules=lvap_stats:12,maps&events=lvapjoin
+
+        """
+
+        try:
+
+            self.subscriber, since = stream_subscriber(self, self)
+
+        except ValueError as ex:
+            self.send_error(400, message=ex)
+            return
+
+        self.set_header('Content-Type', 'text/event-stream')
+        self.set_header('Cache-Control', 'no-cache')
+        self.flush()
+
+        STREAMS.subscribe(self.subscriber, since)
+
+    def send(self, seq, message):
+        """Send a message to the client."""
+
+        if self.request.connection.stream.closed():
+            return None
+
+        self.write("id: %u\n" % seq)
+
+        for line in message.split("\n"):
+            self.write("data: %s\n" % line)
+
+        self.write("\n")
+
+        return self.flush()
+
+    def close(self):
+        """Close the stream."""
+
+        if not self._finished:
+            self.finish()
+
+    def on_connection_close(self):
+        """The client went away."""
+
+        if self.subscriber:
+            STREAMS.unsubscribe(self.subscriber)
+
+
+class StreamWSHandler(tornado.websocket.WebSocketHandler):
+    """Stream handler. Used to receive module updates and events (WS)."""
+
+    HANDLERS = [r"/api/v1/stream/ws/?"]
+
+    def initialize(self, server=None):
+        """Set pointer to actual rest server."""
+
+        self.server = server
+        self.subscriber = None
+
+    def open(self, *args):
+        """ Subscribe to module updates and events over a WebSocket.
+
+        The arguments are the same of StreamHandler, each message is a
+        JSON document with the 'seq' and 'type' fields.
+
+        Example URLs:
+
+            ws://127.0.0.1:8888/api/v1/stream/ws?events=wtpup,wtpdown
+
+        """
+
+        try:
+
+            self.subscriber, since = stream_subscriber(self, self)
+
+        except ValueError as ex:
+            self.close(1008, str(ex))
+            return
+
+        STREAMS.subscribe(self.subscriber, since)
+
+    def send(self, seq, message):
+        """Send a message to the client."""
+
+        try:
+            return self.write_message(message)
+        except tornado.websocket.WebSocketClosedError:
+            return None
+
+    def on_close(self):
+        """The client went away."""
+
+        if self.subscriber:
+            STREAMS.unsubscribe(self.subscriber)
+
+
+class StreamsHandler(EmpowerAPIHandler):
+    """Streams handler. Used to view the stream subscribers."""
+
+    HANDLERS = [r"/api/v1/streams/?"]
+
+    def get(self, *args):
+        """ Return the stream subscribers and their statistics.
+
+        Example URLs:
+
+            GET /api/v1/streams
+
+        """
+
+        self.write_as_json(STREAMS)
+
+
 class RESTServer(Service, tornado.web.Application):
     """Exposes the REST API."""
 
@@ -1321,7 +1666,11 @@ class RESTServer(Service, tornado.web.Application):
                            ManageTenantHandler, AccountsHandler,
                            ComponentsHandler, TenantComponentsHandler,
                            PendingTenantHandler, TenantHandler,
-                           AllowHandler, DenyHandler, IMSI2MACHandler]
+                           AllowHandler, DenyHandler, IMSI2MACHandler,
+                           TimersHandler, LatenciesHandler,
+                           TimeSeriesHandler,
+                           CallbacksHandler,
+                           StreamHandler, StreamWSHandler, StreamsHandler]
 
         for handler_class in handler_classes:
             self.add_handler_class(handler_class, http_server)
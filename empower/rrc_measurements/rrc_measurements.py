@@ -137,6 +137,14 @@ class RRCMeasurements(ModuleTrigger):
 
         self._imsi = int(value)
 
+    def sample(self):
+        """Return the RSRP of each measurement (see Module.sample())."""
+
+        if not self.results:
+            return None
+
+        return {k: v['rsrp'] for k, v in self.results.items()}
+
     def to_dict(self):
         """ Return a JSON-serializable."""
 
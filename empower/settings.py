@@ -29,6 +29,13 @@ TEMPLATE_PATH = os.path.join(DIRNAME, 'templates')
 CONFIGDB_PATH = "%s/deploy/empower.db" % (ROOT_PATH,)
 CONFIGDB_ENGINE = "sqlite:///%s" % (CONFIGDB_PATH,)
 
+# Time-series store
+TSDB_PATH = "%s/deploy/tsdb" % (ROOT_PATH,)
+
+# Check the runtime indexes against a full scan after every update (slow,
+# for development only)
+CHECK_INDEXES = False
+
 # import base64
 # import uuid
 # COOKIE_SECRET = base64.b64encode(uuid.uuid4().bytes + uuid.uuid4().bytes)
@@ -139,19 +139,14 @@ class BusynessTrigger(ModuleTrigger):
                 raise ValueError("Missing field: wtp")
 
             # Check if block is valid
-            incoming = ResourceBlock(wtp, EtherAddress(value['hwaddr']),
-                                     int(value['channel']),
-                                     int(value['band']))
+            block = wtp.block(EtherAddress(value['hwaddr']),
+                              int(value['channel']),
+                              int(value['band']))
 
-            match = [block for block in wtp.supports if block == incoming]
-
-            if not match:
+            if not block:
                 raise ValueError("No block specified")
 
-            if len(match) > 1:
-                raise ValueError("More than one block specified")
-
-            self._block = match[0]
+            self._block = block
 
     @property
     def period(self):
@@ -293,12 +288,13 @@ class BusynessTrigger(ModuleTrigger):
         hwaddr = EtherAddress(message.hwaddr)
         channel = message.channel
         band = message.band
-        incoming = ResourceBlock(wtp, hwaddr, channel, band)
+        block = wtp.block(hwaddr, channel, band)
 
-        match = [block for block in wtp.supports if block == incoming]
+        if not block:
+            return
 
         self.event = \
-            {'block': matches[0],
+            {'block': block,
              'timestamp': datetime.now().strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
              'current': message.current / 180.0}
 
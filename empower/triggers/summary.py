@@ -156,19 +156,14 @@ class Summary(ModuleTrigger):
                 raise ValueError("Missing field: wtp")
 
             # Check if block is valid
-            incoming = ResourceBlock(wtp, EtherAddress(value['hwaddr']),
-                                     int(value['channel']),
-                                     int(value['band']))
+            block = wtp.block(EtherAddress(value['hwaddr']),
+                              int(value['channel']),
+                              int(value['band']))
 
-            match = [block for block in wtp.supports if block == incoming]
-
-            if not match:
+            if not block:
                 raise ValueError("No block specified")
 
-            if len(match) > 1:
-                raise ValueError("More than one block specified")
-
-            self._block = match[0]
+            self._block = block
 
     @property
     def period(self):
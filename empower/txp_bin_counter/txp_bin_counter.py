@@ -29,6 +29,7 @@ from construct import Array
 from empower.datatypes.etheraddress import EtherAddress
 from empower.lvapp.lvappserver import ModuleLVAPPWorker
 from empower.core.module import ModulePeriodic
+from empower.core.bins import fill_samples
 from empower.core.app import EmpowerApp
 from empower.core.resourcepool import ResourceBlock
 from empower.lvapp import PT_VERSION
@@ -84,12 +85,10 @@ class TXPBinCounter(ModulePeriodic):
         self.tx_packets = []
         self.tx_bytes = []
 
-    def __eq__(self, other):
+    def poll_key(self):
 
-        return super().__eq__(other) and \
-            self.mcast == other.mcast and \
-            self.block == other.block and \
-            self.bins == other.bins
+        return super().poll_key() + (self.mcast, self.block,
+                                     tuple(self.bins))
 
     @property
     def mcast(self):
@@ -157,19 +156,14 @@ class TXPBinCounter(ModulePeriodic):
                 raise ValueError("Missing field: wtp")
 
             # Check if block is valid
-            incoming = ResourceBlock(wtp, EtherAddress(value['hwaddr']),
-                                     int(value['channel']),
-                                     int(value['band']))
+            block = wtp.block(EtherAddress(value['hwaddr']),
+                              int(value['channel']),
+                              int(value['band']))
 
-            match = [block for block in wtp.supports if block == incoming]
-
-            if not match:
+            if not block:
                 raise ValueError("No block specified")
 
-            if len(match) > 1:
-                raise ValueError("More than one block specified")
-
-            self._block = match[0]
+            self._block = block
 
     def to_dict(self):
         """ Return a JSON-serializable dictionary representing the Stats """
@@ -221,60 +215,17 @@ class TXPBinCounter(ModulePeriodic):
 
         msg = TXP_BIN_COUNTER_REQUEST.build(stats_req)
         wtp.connection.stream.write(msg)
+        self.request_sent(wtp.addr)
 
     def fill_bytes_samples(self, data):
-        """ Compute samples.
-
-        Samples are in the following format (after ordering):
-
-        [[60, 3], [66, 2], [74, 1], [98, 40], [167, 2], [209, 2], [1466, 1762]]
-
-        Each 2-tuple has format [ size, count ] where count is the number of
-        size-long (bytes, including the Ethernet 2 header) TX/RX by the LVAP.
-
-        """
-
-        samples = sorted(data, key=lambda entry: entry[0])
-        out = [0] * len(self.bins)
-
-        for entry in samples:
-            if len(entry) == 0:
-                continue
-            size = entry[0]
-            count = entry[1]
-            for i in range(0, len(self.bins)):
-                if size <= self.bins[i]:
-                    out[i] = out[i] + size * count
-                    break
+        """ Compute the bytes in each bin (see fill_samples). """
 
-        return out
+        return fill_samples(self.bins, data)[0]
 
     def fill_packets_samples(self, data):
-        """ Compute samples.
-
-        Samples are in the following format (after ordering):
-
-        [[60, 3], [66, 2], [74, 1], [98, 40], [167, 2], [209, 2], [1466, 1762]]
+        """ Compute the packets in each bin (see fill_samples). """
 
-        Each 2-tuple has format [ size, count ] where count is the number of
-        size-long (bytes, including the Ethernet 2 header) TX/RX by the LVAP.
-
-        """
-
-        samples = sorted(data, key=lambda entry: entry[0])
-        out = [0] * len(self.bins)
-
-        for entry in samples:
-            if len(entry) == 0:
-                continue
-            size = entry[0]
-            count = entry[1]
-            for i in range(0, len(self.bins)):
-                if size <= self.bins[i]:
-                    out[i] = out[i] + count
-                    break
-
-        return out
+        return fill_samples(self.bins, data)[1]
 
     def handle_response(self, response):
         """Handle an incoming STATS_RESPONSE message.
@@ -285,8 +236,8 @@ class TXPBinCounter(ModulePeriodic):
         """
 
         # update this object
-        self.tx_bytes = self.fill_bytes_samples(response.stats)
-        self.tx_packets = self.fill_packets_samples(response.stats)
+        self.tx_bytes, self.tx_packets = \
+            fill_samples(self.bins, response.stats)
 
         # call callback
         self.handle_callback(self)
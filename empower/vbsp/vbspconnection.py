@@ -146,37 +146,35 @@ class VBSPConnection:
 
         msg_type = event.action
 
-        if msg_type not in self.server.pt_types:
+        try:
+            parser, builtin, handlers = self.server.dispatch[msg_type]
+        except KeyError:
             self.log.error("Unknown message type %u", msg_type)
             return
 
-        if self.server.pt_types[msg_type]:
-
-            self.log.info("Got message type %u (%s)", msg_type,
-                          self.server.pt_types[msg_type].name)
+        # nobody is listening for this message type
+        if not parser or not (builtin or handlers):
+            return
 
-            msg = self.server.pt_types[msg_type].parse(self.__buffer[offset:])
-            addr = hex_to_ether(hdr.enbid)
+        self.log.debug("Got message type %u (%s)", msg_type, parser.name)
 
-            try:
-                vbs = RUNTIME.vbses[addr]
-            except KeyError:
-                self.log.error("Unknown VBS %s, closing connection", addr)
-                self.stream.close()
-                return
+        msg = parser.parse(self.__buffer[offset:])
+        addr = hex_to_ether(hdr.enbid)
 
-            name = self.server.pt_types[msg_type].name
-            handler_name = "_handle_%s" % name
+        try:
+            vbs = RUNTIME.vbses[addr]
+        except KeyError:
+            self.log.error("Unknown VBS %s, closing connection", addr)
+            self.stream.close()
+            return
 
-            if hasattr(self, handler_name):
-                self.log.info("%s from %s VBS %s seq %u",
-                              name, self.addr[0], vbs.addr, hdr.seq)
-                handler = getattr(self, handler_name)
-                handler(vbs, hdr, event, msg)
+        if builtin:
+            self.log.info("%s from %s VBS %s seq %u",
+                          parser.name, self.addr[0], vbs.addr, hdr.seq)
+            getattr(self, builtin)(vbs, hdr, event, msg)
 
-            if msg_type in self.server.pt_types_handlers:
-                for handler in self.server.pt_types_handlers[msg_type]:
-                    handler(vbs, hdr, event, msg)
+        for handler in handlers:
+            handler(vbs, hdr, event, msg)
 
     def _wait(self):
         """ Wait for incoming packets on signalling channel """
@@ -95,6 +95,8 @@ class ModuleVBSPWorker(ModuleWorker):
         """UE left."""
 
         for module_id in list(self.modules.keys()):
+            if module_id not in self.modules:
+                continue
             module = self.modules[module_id]
             if hasattr(module, "ue") and module.ue == ue:
                 self.modules[module_id].unload()
@@ -103,6 +105,8 @@ class ModuleVBSPWorker(ModuleWorker):
         """VBS left."""
 
         for module_id in list(self.modules.keys()):
+            if module_id not in self.modules:
+                continue
             module = self.modules[module_id]
             if hasattr(module, "vbs") and module.vbs == vbs:
                 self.modules[module_id].unload()
@@ -119,6 +123,7 @@ class ModuleVBSPWorker(ModuleWorker):
                       self.module.MODULE_NAME, hdr.modid, event.op)
 
         if event.op == 1:
+            module.request_completed()
             module.handle_response(msg)
 
 
@@ -127,6 +132,7 @@ class VBSPServer(PNFPServer, TCPServer):
 
     PNFDEV = VBS
     TBL_PNFDEV = TblVBS
+    CONNECTION = VBSPConnection
 
     def __init__(self, port, prt_types, prt_types_handlers):
 
@@ -34,6 +34,7 @@ from empower.lvapp.lvappserver import LVAPPServer
 from empower.datatypes.etheraddress import EtherAddress
 from empower.lvapp.lvappserver import ModuleLVAPPWorker
 from empower.core.module import ModulePeriodic
+from empower.core.bins import BinTable
 from empower.core.app import EmpowerApp
 
 from empower.main import RUNTIME
@@ -99,22 +100,16 @@ class WTPBinCounter(ModulePeriodic):
         self._bins = [8192]
 
         # data structures
-        self.tx_packets = {}
-        self.rx_packets = {}
-        self.tx_bytes = {}
-        self.rx_bytes = {}
-        self.tx_packets_per_second = {}
-        self.rx_packets_per_second = {}
-        self.tx_bytes_per_second = {}
-        self.rx_bytes_per_second = {}
+        self.tx = BinTable(self._bins)
+        self.rx = BinTable(self._bins)
+        self.tx_per_second = BinTable(self._bins)
+        self.rx_per_second = BinTable(self._bins)
 
         self.last = None
 
-    def __eq__(self, other):
+    def poll_key(self):
 
-        return super().__eq__(other) and \
-            self.wtp == other.wtp and \
-            self.bins == other.bins
+        return super().poll_key() + (self.wtp, tuple(self.bins))
 
     @property
     def wtp(self):
@@ -161,18 +156,18 @@ class WTPBinCounter(ModulePeriodic):
 
         out['bins'] = self.bins
         out['wtp'] = self.wtp
-        out['tx_bytes'] = {str(k): v for k, v in self.tx_bytes.items()}
-        out['rx_bytes'] = {str(k): v for k, v in self.rx_bytes.items()}
-        out['tx_packets'] = {str(k): v for k, v in self.tx_packets.items()}
-        out['rx_packets'] = {str(k): v for k, v in self.rx_packets.items()}
+        out['tx_bytes'] = self.tx.to_dict(self.tx.bytes)
+        out['rx_bytes'] = self.rx.to_dict(self.rx.bytes)
+        out['tx_packets'] = self.tx.to_dict(self.tx.packets)
+        out['rx_packets'] = self.rx.to_dict(self.rx.packets)
         out['tx_bytes_per_second'] = \
-            {str(k): v for k, v in self.tx_bytes_per_second.items()}
+            self.tx_per_second.to_dict(self.tx_per_second.bytes)
         out['rx_bytes_per_second'] = \
-            {str(k): v for k, v in self.rx_bytes_per_second.items()}
+            self.rx_per_second.to_dict(self.rx_per_second.bytes)
         out['tx_packets_per_second'] = \
-            {str(k): v for k, v in self.tx_packets_per_second.items()}
+            self.tx_per_second.to_dict(self.tx_per_second.packets)
         out['rx_packets_per_second'] = \
-            {str(k): v for k, v in self.rx_packets_per_second.items()}
+            self.rx_per_second.to_dict(self.rx_per_second.packets)
 
         return out
 
@@ -194,7 +189,7 @@ class WTPBinCounter(ModulePeriodic):
         wtp = tenant.wtps[self.wtp]
 
         if not wtp.connection or wtp.connection.stream.closed():
-            self.log.info("WTP %s not connected", lvap.wtp.addr)
+            self.log.info("WTP %s not connected", wtp.addr)
             self.unload()
             return
 
@@ -209,86 +204,55 @@ class WTPBinCounter(ModulePeriodic):
 
         msg = WTP_STATS_REQUEST.build(stats_req)
         wtp.connection.stream.write(msg)
+        self.request_sent(wtp.addr)
 
-    def update_stats(self, delta, last, current):
-        """Update stats."""
-
-        stats = {}
-
-        for lvap in current.keys():
-
-            if lvap not in last:
-                continue
-
-            stats[lvap] = []
-
-            for i in range(0, len(last[lvap])):
-                diff = current[lvap][i] - last[lvap][i]
-                stats[lvap].append(diff / delta)
-
-        return stats
-
-    def fill_packets_sample(self, values):
-
-        out = {}
-
-        for value in values:
-            lvap = EtherAddress(value[0])
-            if lvap not in out:
-                out[lvap] = []
-            out[lvap].append([value[1], value[2]])
+    @property
+    def tx_bytes(self):
+        """Return the TX bytes per LVAP."""
 
-        for lvap in out.keys():
+        return self.tx.rows(self.tx.bytes)
 
-            data = out[lvap]
+    @property
+    def rx_bytes(self):
+        """Return the RX bytes per LVAP."""
 
-            samples = sorted(data, key=lambda entry: entry[0])
-            new_out = [0] * len(self.bins)
+        return self.rx.rows(self.rx.bytes)
 
-            for entry in samples:
-                if len(entry) == 0:
-                    continue
-                size = entry[0]
-                count = entry[1]
-                for i in range(0, len(self.bins)):
-                    if size <= self.bins[i]:
-                        new_out[i] = new_out[i] + count
-                        break
+    @property
+    def tx_packets(self):
+        """Return the TX packets per LVAP."""
 
-            out[lvap] = new_out
+        return self.tx.rows(self.tx.packets)
 
-        return out
+    @property
+    def rx_packets(self):
+        """Return the RX packets per LVAP."""
 
-    def fill_bytes_sample(self, values):
+        return self.rx.rows(self.rx.packets)
 
-        out = {}
+    @property
+    def tx_bytes_per_second(self):
+        """Return the TX bytes per second per LVAP."""
 
-        for value in values:
-            lvap = EtherAddress(value[0])
-            if lvap not in out:
-                out[lvap] = []
-            out[lvap].append([value[1], value[2]])
+        return self.tx_per_second.rows(self.tx_per_second.bytes)
 
-        for lvap in out.keys():
+    @property
+    def rx_bytes_per_second(self):
+        """Return the RX bytes per second per LVAP."""
 
-            data = out[lvap]
+        return self.rx_per_second.rows(self.rx_per_second.bytes)
 
-            samples = sorted(data, key=lambda entry: entry[0])
-            new_out = [0] * len(self.bins)
+    @property
+    def tx_packets_per_second(self):
+        """Return the TX packets per second per LVAP."""
 
-            for entry in samples:
-                if len(entry) == 0:
-                    continue
-                size = entry[0]
-                count = entry[1]
-                for i in range(0, len(self.bins)):
-                    if size <= self.bins[i]:
-                        new_out[i] = new_out[i] + size * count
-                        break
+        return self.tx_per_second.rows(self.tx_per_second.packets)
 
-            out[lvap] = new_out
+    @property
+    def rx_packets_per_second(self):
+        """Return the RX packets per second per LVAP."""
 
-        return out
+        return self.rx_per_second.rows(self.rx_per_second.packets)
 
     def handle_response(self, response):
         """Handle an incoming STATS_RESPONSE message.
@@ -301,28 +265,16 @@ class WTPBinCounter(ModulePeriodic):
         tx_samples = response.stats[0:response.nb_tx]
         rx_samples = response.stats[response.nb_tx:-1]
 
-        old_tx_bytes = self.tx_bytes
-        old_rx_bytes = self.rx_bytes
-
-        old_tx_packets = self.tx_packets
-        old_rx_packets = self.rx_packets
-
-        self.tx_bytes = self.fill_bytes_sample(tx_samples)
-        self.rx_bytes = self.fill_bytes_sample(rx_samples)
+        old_tx = self.tx
+        old_rx = self.rx
 
-        self.tx_packets = self.fill_packets_sample(tx_samples)
-        self.rx_packets = self.fill_packets_sample(rx_samples)
+        self.tx = BinTable.from_samples(self.bins, tx_samples, EtherAddress)
+        self.rx = BinTable.from_samples(self.bins, rx_samples, EtherAddress)
 
         if self.last:
             delta = time.time() - self.last
-            self.tx_bytes_per_second = \
-                self.update_stats(delta, old_tx_bytes, self.tx_bytes)
-            self.rx_bytes_per_second = \
-                self.update_stats(delta, old_rx_bytes, self.rx_bytes)
-            self.tx_packets_per_second = \
-                self.update_stats(delta, old_tx_packets, self.tx_packets)
-            self.rx_packets_per_second = \
-                self.update_stats(delta, old_rx_packets, self.rx_packets)
+            self.tx_per_second = self.tx.rates(delta, old_tx)
+            self.rx_per_second = self.rx.rates(delta, old_rx)
 
         self.last = time.time()
 
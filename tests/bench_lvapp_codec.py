@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2016 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Microbenchmark of the LVAPP codec against the construct messages.
+
+Run from the repository root:
+
+    python tests/bench_lvapp_codec.py [number]
+"""
+
+import os
+import sys
+import random
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import empower.lvapp as lvapp
+
+from empower.lvapp import codec
+
+from test_lvapp_codec import MESSAGES
+from test_lvapp_codec import random_message
+
+
+def main(number=2000):
+    """Print the parse and build time of every message type."""
+
+    rnd = random.Random(0)
+
+    print("%-22s %10s %10s %7s %10s %10s %7s" %
+          ("message", "parse", "construct", "", "build", "construct", ""))
+
+    for name in MESSAGES:
+
+        reference = getattr(lvapp, name)
+        message = getattr(codec, name)
+
+        container = random_message(rnd, message)
+        data = reference.build(container)
+
+        times = []
+
+        for func in (lambda: message.parse(data),
+                     lambda: reference.parse(data),
+                     lambda: message.build(container),
+                     lambda: reference.build(container)):
+            times.append(min(timeit.repeat(func, number=number, repeat=3)) /
+                         number * 1e6)
+
+        print("%-22s %8.1fus %8.1fus %6.1fx %8.1fus %8.1fus %6.1fx" %
+              (name, times[0], times[1], times[1] / times[0],
+               times[2], times[3], times[3] / times[2]))
+
+
+if __name__ == '__main__':
+    main(*[int(x) for x in sys.argv[1:]])
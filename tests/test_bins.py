@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2016 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Binning kernel tests."""
+
+import random
+import unittest
+
+from empower.core.bins import fill_samples
+from empower.core.bins import rates
+from empower.core.bins import BinTable
+
+
+def reference(bins, samples):
+    """The sort-and-scan binning used by the bin counters before."""
+
+    out_bytes = [0] * len(bins)
+    out_packets = [0] * len(bins)
+
+    for entry in sorted([x for x in samples if x], key=lambda x: x[0]):
+        for index, bound in enumerate(bins):
+            if entry[0] <= bound:
+                out_bytes[index] += entry[0] * entry[1]
+                out_packets[index] += entry[1]
+                break
+
+    return out_bytes, out_packets
+
+
+class TestFillSamples(unittest.TestCase):
+    """fill_samples() tests."""
+
+    def test_boundaries(self):
+        """A frame goes in the first bin not smaller than its size."""
+
+        bins = [128, 256, 512]
+        samples = [[128, 1], [129, 2], [512, 3], [513, 4], [], [1, 5]]
+
+        self.assertEqual(fill_samples(bins, samples),
+                         ([128 + 5, 258, 1536], [6, 2, 3]))
+
+    def test_reference(self):
+        """Random samples are binned like the previous implementation."""
+
+        rnd = random.Random(0)
+
+        for _ in range(100):
+
+            bins = sorted(rnd.sample(range(60, 2000), rnd.randint(1, 6)))
+            samples = [[rnd.randint(14, 2400), rnd.randint(1, 1000)]
+                       for _ in range(rnd.randint(0, 50))]
+
+            self.assertEqual(fill_samples(bins, samples),
+                             reference(bins, samples))
+
+    def test_rates(self):
+        """Rates are per second differences, bin by bin."""
+
+        self.assertEqual(rates(2.0, [10, 20], [30, 20]), [10.0, 0.0])
+        self.assertEqual(rates(0.5, [], []), [])
+
+
+class TestBinTable(unittest.TestCase):
+    """BinTable tests."""
+
+    def test_from_samples(self):
+        """Each key gets a row binned like fill_samples()."""
+
+        rnd = random.Random(1)
+        bins = [128, 512, 1500]
+        samples = [[rnd.choice("abcd"), rnd.randint(14, 2000),
+                    rnd.randint(1, 100)] for _ in range(200)]
+
+        table = BinTable.from_samples(bins, samples, convert=str.upper)
+
+        self.assertEqual(sorted(table.keys), ["A", "B", "C", "D"])
+        self.assertEqual(len(table), 4)
+
+        byte_rows = table.rows(table.bytes)
+        packet_rows = table.rows(table.packets)
+
+        for key in "abcd":
+            expected = fill_samples(bins, [x[1:] for x in samples
+                                           if x[0] == key])
+            self.assertEqual((byte_rows[key.upper()],
+                              packet_rows[key.upper()]), expected)
+
+    def test_convert_once(self):
+        """The key conversion is called once per raw key."""
+
+        calls = []
+
+        def convert(raw):
+            calls.append(raw)
+            return raw
+
+        BinTable.from_samples([100], [["a", 10, 1], ["a", 20, 1],
+                                      ["b", 30, 1], []], convert)
+
+        self.assertEqual(calls, ["a", "b"])
+
+    def test_rates(self):
+        """Rates only cover the keys present in both tables."""
+
+        bins = [100, 200]
+
+        last = BinTable.from_samples(bins, [["a", 50, 2], ["b", 150, 1]])
+        current = BinTable.from_samples(bins, [["c", 50, 1], ["a", 50, 6],
+                                               ["a", 150, 1]])
+
+        out = current.rates(2.0, last)
+
+        self.assertEqual(out.rows(out.bytes), {"a": [100.0, 75.0]})
+        self.assertEqual(out.rows(out.packets), {"a": [2.0, 0.5]})
+
+        # tables with different bins are not comparable
+        other = BinTable.from_samples([100], [["a", 50, 2]])
+        self.assertEqual(len(current.rates(1.0, other)), 0)
+
+    def test_to_dict(self):
+        """Rows are serialized by key."""
+
+        table = BinTable.from_samples([100], [[1, 50, 2]])
+
+        self.assertEqual(table.to_dict(table.bytes), {"1": [100]})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2016 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Remote callbacks delivery tests against a local XML-RPC server."""
+
+import time
+import socket
+import threading
+import unittest
+
+from xmlrpc.server import SimpleXMLRPCServer
+from xmlrpc.server import SimpleXMLRPCRequestHandler
+
+from empower.core.callbacks import CallbackDelivery
+from empower.core.callbacks import CallbackEndpoint
+
+
+def wait_for(condition, timeout=5.0):
+    """Wait until condition() is true, return its last value."""
+
+    deadline = time.monotonic() + timeout
+
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    return condition()
+
+
+class RequestHandler(SimpleXMLRPCRequestHandler):
+    """Count the HTTP requests and keep the connections alive."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.server.requests += 1
+        super().do_POST()
+
+
+class StandIn:
+    """A local XML-RPC server recording the calls it receives.
+
+    Calls block while the gate is closed, so that the tests can queue calls
+    while the endpoint is busy.
+    """
+
+    def __init__(self):
+
+        self.calls = []
+        self.gate = threading.Event()
+        self.gate.set()
+        self.server = SimpleXMLRPCServer(("127.0.0.1", 0),
+                                         requestHandler=RequestHandler,
+                                         logRequests=False, allow_none=True)
+        self.server.requests = 0
+        self.server.register_function(self.update, "update")
+        self.server.register_multicall_functions()
+        self.url = "http://127.0.0.1:%u/RPC2" % self.server.server_address[1]
+        self.thread = threading.Thread(target=self.server.serve_forever,
+                                       args=(0.05, ), daemon=True)
+        self.thread.start()
+
+    def update(self, value):
+        """The remote method."""
+
+        self.calls.append(value)
+        self.gate.wait(5)
+
+        return True
+
+    def busy(self):
+        """Close the gate and wait for a call to block on it."""
+
+        self.gate.clear()
+        count = len(self.calls)
+
+        return lambda: len(self.calls) > count
+
+    def close(self):
+        """Stop the server."""
+
+        self.gate.set()
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class TestCallbackEndpoint(unittest.TestCase):
+    """Endpoint tests."""
+
+    def setUp(self):
+
+        self.remote = StandIn()
+        self.endpoints = []
+
+    def tearDown(self):
+
+        for endpoint in self.endpoints:
+            endpoint.close()
+
+        self.remote.close()
+
+        for endpoint in self.endpoints:
+            endpoint.join(5)
+
+    def endpoint(self, url=None, **kwargs):
+        """Return a new endpoint, closed at the end of the test."""
+
+        endpoint = CallbackEndpoint(url or self.remote.url, **kwargs)
+        self.endpoints.append(endpoint)
+
+        return endpoint
+
+    def block(self, endpoint):
+        """Keep the endpoint busy with a call blocked on the remote side."""
+
+        blocked = self.remote.busy()
+        endpoint.put("update", ("blocker", ))
+        self.assertTrue(wait_for(blocked))
+
+    def test_order(self):
+        """Calls without a key are delivered in order, on one connection."""
+
+        endpoint = self.endpoint()
+
+        for value in range(20):
+            endpoint.put("update", (value, ))
+
+        self.assertTrue(wait_for(lambda: endpoint.sent == 20))
+        self.assertEqual(self.remote.calls, list(range(20)))
+        self.assertEqual(endpoint.errors, 0)
+        self.assertEqual(endpoint.depth, 0)
+
+    def test_coalesce(self):
+        """Pending calls with the same key are replaced by the latest."""
+
+        endpoint = self.endpoint()
+        self.block(endpoint)
+
+        for value in range(5):
+            endpoint.put("update", ("a%u" % value, ), key="a")
+            endpoint.put("update", ("b%u" % value, ), key="b")
+
+        self.assertEqual(endpoint.depth, 2)
+        self.assertEqual(endpoint.coalesced, 8)
+
+        self.remote.gate.set()
+
+        self.assertTrue(wait_for(lambda: endpoint.sent == 3))
+        self.assertEqual(self.remote.calls, ["blocker", "a4", "b4"])
+
+    def test_drop_oldest(self):
+        """A full queue drops the oldest pending call."""
+
+        endpoint = self.endpoint(queue_size=3)
+        self.block(endpoint)
+
+        for value in range(10):
+            endpoint.put("update", (value, ))
+
+        self.assertEqual(endpoint.depth, 3)
+        self.assertEqual(endpoint.dropped, 7)
+        self.assertEqual(endpoint.max_depth, 3)
+
+        self.remote.gate.set()
+
+        self.assertTrue(wait_for(lambda: endpoint.sent == 4))
+        self.assertEqual(self.remote.calls, ["blocker", 7, 8, 9])
+
+    def test_batch(self):
+        """With batch > 1 the pending calls go in one multicall request."""
+
+        endpoint = self.endpoint(batch=4)
+        self.block(endpoint)
+
+        requests = self.remote.server.requests
+
+        for value in range(8):
+            endpoint.put("update", (value, ))
+
+        self.remote.gate.set()
+
+        self.assertTrue(wait_for(lambda: endpoint.sent == 9))
+        self.assertEqual(self.remote.calls, ["blocker"] + list(range(8)))
+        self.assertEqual(self.remote.server.requests - requests, 2)
+        self.assertEqual(endpoint.requests, 3)
+
+    def test_backoff(self):
+        """An unreachable endpoint is retried with exponential backoff."""
+
+        sock = socket.socket()
+        sock.bind(("127.0.0.1", 0))
+        url = "http://127.0.0.1:%u/RPC2" % sock.getsockname()[1]
+        sock.close()
+
+        endpoint = self.endpoint(url, queue_size=50)
+
+        for value in range(50):
+            endpoint.put("update", (value, ))
+
+        # attempts at 0, 0.1, 0.3, 0.7 s, then every 1.5, 3.1, ...
+        time.sleep(0.5)
+
+        self.assertGreaterEqual(endpoint.errors, 2)
+        self.assertLessEqual(endpoint.errors, 4)
+        self.assertGreater(endpoint.depth, 40)
+        self.assertIsNotNone(endpoint.last_error)
+
+        # closing a failing endpoint drops its pending calls
+        endpoint.close()
+        endpoint.join(5)
+
+        self.assertEqual(endpoint.depth, 0)
+        self.assertEqual(endpoint.errors + endpoint.dropped, 50)
+
+    def test_close(self):
+        """A closed endpoint delivers its pending calls and exits."""
+
+        endpoint = self.endpoint()
+        self.block(endpoint)
+
+        for value in range(3):
+            endpoint.put("update", (value, ))
+
+        endpoint.close()
+        self.remote.gate.set()
+        endpoint.join(5)
+
+        self.assertEqual(self.remote.calls, ["blocker", 0, 1, 2])
+
+    def test_invalid(self):
+        """Queue and batch sizes must be positive."""
+
+        self.assertRaises(ValueError, CallbackEndpoint, "x", queue_size=0)
+        self.assertRaises(ValueError, CallbackEndpoint, "x", batch=0)
+
+
+class TestCallbackDelivery(unittest.TestCase):
+    """Delivery service tests."""
+
+    def setUp(self):
+
+        self.remote = StandIn()
+        self.callbacks = CallbackDelivery()
+
+    def tearDown(self):
+
+        for endpoint in self.callbacks.endpoints.values():
+            endpoint.close()
+
+        self.remote.close()
+
+    def test_reap(self):
+        """The endpoint is closed when its last reference is released."""
+
+        url = self.remote.url
+
+        self.callbacks.acquire(url)
+        self.callbacks.acquire(url)
+        self.callbacks.deliver([url, "update"], (1, ))
+
+        endpoint = self.callbacks.endpoints[url]
+
+        self.callbacks.release(url)
+        self.assertIn(url, self.callbacks.endpoints)
+
+        self.callbacks.deliver([url, "update"], (2, ))
+        self.callbacks.release(url)
+
+        self.assertNotIn(url, self.callbacks.endpoints)
+        self.assertNotIn(url, self.callbacks.refs)
+
+        endpoint.join(5)
+
+        self.assertEqual(self.remote.calls, [1, 2])
+
+    def test_unreferenced(self):
+        """Calls to an unreferenced endpoint are delivered, then it exits."""
+
+        url = self.remote.url
+
+        self.callbacks.deliver([url, "update"], (1, ))
+
+        self.assertNotIn(url, self.callbacks.endpoints)
+        self.assertTrue(wait_for(lambda: self.remote.calls == [1]))
+
+    def test_settings(self):
+        """Settings survive the endpoint being reaped and created again."""
+
+        url = self.remote.url
+
+        self.callbacks.configure(url, queue_size=7, batch=3)
+        self.assertRaises(ValueError, self.callbacks.configure, url, 0)
+
+        self.callbacks.acquire(url)
+        endpoint = self.callbacks.endpoint(url)
+
+        self.assertEqual((endpoint.queue_size, endpoint.batch), (7, 3))
+
+        self.callbacks.configure(url, batch=2)
+        self.assertEqual(endpoint.batch, 2)
+
+        self.callbacks.release(url)
+        self.callbacks.acquire(url)
+
+        endpoint = self.callbacks.endpoint(url)
+        self.assertEqual((endpoint.queue_size, endpoint.batch), (7, 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2016 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Channel quality matrix tests."""
+
+import unittest
+
+from empower.core.wtp import WTP
+from empower.core.cqm import CQM
+from empower.core.cqm import UCQM_MATRIX
+from empower.core.cqm import QualityMatrix
+from empower.core.resourcepool import BT_L20
+from empower.core.resourcepool import ResourceBlock
+from empower.datatypes.etheraddress import EtherAddress
+
+
+def entry(rssi, packets=1):
+    """Return the values of an entry, in FIELDS order."""
+
+    return (0.0, rssi, packets, packets, rssi)
+
+
+class TestQualityMatrix(unittest.TestCase):
+    """QualityMatrix tests."""
+
+    def setUp(self):
+
+        self.matrix = QualityMatrix()
+        self.matrix.replace('b1', [('s1', entry(-50)), ('s2', entry(-70))])
+        self.matrix.replace('b2', [('s1', entry(-60)), ('s3', entry(-40))])
+
+    def test_queries(self):
+        """Rows, columns and best blocks are computed from the entries."""
+
+        self.assertEqual(self.matrix.row('b1'), {'s1': -50, 's2': -70})
+        self.assertEqual(self.matrix.column('s1'), {'b1': -50, 'b2': -60})
+        self.assertEqual(self.matrix.best('s1'), ('b1', -50))
+        self.assertEqual(self.matrix.best('s1', blocks=['b2']), ('b2', -60))
+        self.assertEqual(self.matrix.best('s9'), (None, -float("inf")))
+        self.assertEqual(self.matrix.best_blocks(),
+                         {'s1': ('b1', -50), 's2': ('b1', -70),
+                          's3': ('b2', -40)})
+        self.assertEqual(self.matrix.neighbours('b2'),
+                         [('s3', -40), ('s1', -60)])
+        self.assertEqual(self.matrix.neighbours('b1', threshold=-60),
+                         [('s1', -50)])
+
+    def test_replace(self):
+        """Replacing a row removes the stations missing from the report."""
+
+        version = self.matrix.version('b1')
+
+        self.matrix.replace('b1', [('s2', entry(-65))])
+
+        self.assertEqual(self.matrix.row('b1'), {'s2': -65})
+        self.assertEqual(self.matrix.version('b1'), version + 1)
+        self.assertIsNone(self.matrix.get('b1', 's1'))
+        self.assertEqual(self.matrix.get('b1', 's2')['last_packets'], 1)
+
+        with self.assertRaises(KeyError):
+            self.matrix.remove('b1', 's1')
+
+    def test_column_reuse(self):
+        """A column is freed when no block sees its station anymore."""
+
+        column = self.matrix.columns['s2']
+
+        self.matrix.remove('b1', 's2')
+
+        self.assertNotIn('s2', self.matrix.columns)
+        self.assertIsNone(self.matrix.addrs[column])
+
+        self.matrix.set('b2', 's4', {'mov_rssi': -30})
+
+        self.assertEqual(self.matrix.columns['s4'], column)
+        self.assertEqual(len(self.matrix.addrs), 3)
+
+        # the reused column starts with the default values
+        self.assertEqual(self.matrix.column('s4'), {'b2': -30})
+        self.assertEqual(self.matrix.best('s4'), ('b2', -30))
+
+    def test_drop(self):
+        """Dropping a block frees its row and the columns it alone saw."""
+
+        row = self.matrix.rows['b1']
+
+        self.matrix.drop('b1')
+        self.matrix.drop('b1')
+
+        self.assertNotIn('b1', self.matrix.rows)
+        self.assertNotIn('s2', self.matrix.columns)
+        self.assertEqual(self.matrix.column('s1'), {'b2': -60})
+        self.assertEqual(self.matrix.best_blocks(),
+                         {'s1': ('b2', -60), 's3': ('b2', -40)})
+
+        self.matrix.replace('b3', [('s3', entry(-20))])
+
+        self.assertEqual(self.matrix.rows['b3'], row)
+        self.assertEqual(self.matrix.row('b3'), {'s3': -20})
+        self.assertEqual(self.matrix.best('s3'), ('b3', -20))
+        self.assertEqual(self.matrix.to_dict(),
+                         {'blocks': 2, 'rows': 2, 'stations': 2,
+                          'columns': 3})
+
+
+class TestCQM(unittest.TestCase):
+    """CQM tests."""
+
+    def test_mapping(self):
+        """A CQM behaves like a dictionary of read-only entries."""
+
+        cqm = CQM()
+        cqm['s1'] = {'mov_rssi': -50, 'last_packets': 3}
+
+        self.assertIn('s1', cqm)
+        self.assertEqual(list(cqm), ['s1'])
+        self.assertEqual(cqm['s1']['mov_rssi'], -50)
+        self.assertEqual(cqm['s2']['mov_rssi'], -float("inf"))
+        self.assertNotIn('s2', cqm)
+        self.assertIsNone(cqm.get('s2'))
+
+        with self.assertRaises(TypeError):
+            cqm['s1']['mov_rssi'] = -40
+
+        cqm['s1'] = dict(cqm['s1'], mov_rssi=-40)
+
+        self.assertEqual(cqm.value('s1'), -40)
+        self.assertEqual(cqm.to_dict()['s1']['last_packets'], 3)
+
+        del cqm['s1']
+
+        self.assertEqual(len(cqm), 0)
+
+    def test_shared(self):
+        """The views of a shared matrix see the same columns."""
+
+        matrix = QualityMatrix()
+        first = CQM(matrix, 'b1')
+        second = CQM(matrix, 'b2')
+
+        first['s1'] = {'mov_rssi': -50}
+        second['s1'] = {'mov_rssi': -40}
+
+        self.assertEqual(matrix.best('s1'), ('b2', -40))
+
+        second.drop()
+
+        self.assertEqual(matrix.best('s1'), ('b1', -50))
+        self.assertEqual(len(second), 0)
+
+    def test_wtp(self):
+        """The rows of the blocks of a WTP are dropped with the blocks."""
+
+        wtp = WTP(EtherAddress("00:0D:B9:2F:56:64"), "wtp")
+        block = ResourceBlock(wtp, EtherAddress("04:F0:21:09:F9:9E"), 36,
+                              BT_L20)
+
+        wtp.add_block(block)
+        block.ucqm['s1'] = {'mov_rssi': -50}
+
+        self.assertIn(block, UCQM_MATRIX.rows)
+
+        wtp.supports = set()
+
+        self.assertNotIn(block, UCQM_MATRIX.rows)
+        self.assertEqual(block.to_dict()['ucqm'], {})
+
+
+if __name__ == '__main__':
+    unittest.main()
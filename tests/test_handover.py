@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2016 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Handover engine tests."""
+
+import unittest
+
+from unittest import mock
+
+from empower.core.cqm import QualityMatrix
+from empower.core.handover import HandoverEngine
+
+
+class LVAP:
+    """A stand-in LVAP, served by at most one block."""
+
+    def __init__(self, addr, block=None):
+
+        self.addr = addr
+        self.pending = False
+        self.downlink = {block: None} if block else {}
+        self.moves = 0
+
+    @property
+    def blocks(self):
+        """Return the blocks serving the LVAP."""
+
+        return list(self.downlink)
+
+    @blocks.setter
+    def blocks(self, block):
+        """Move the LVAP."""
+
+        if block == 'broken':
+            raise ValueError("Invalid block")
+
+        self.downlink = {block: None}
+        self.moves += 1
+
+
+class TestHandoverEngine(unittest.TestCase):
+    """HandoverEngine tests."""
+
+    def setUp(self):
+
+        self.matrix = QualityMatrix()
+        self.engine = HandoverEngine(hysteresis=3, dwell=10,
+                                     matrix=self.matrix)
+        self.now = 1000.0
+
+        patcher = mock.patch('empower.core.handover.time')
+        self.addCleanup(patcher.stop)
+        patcher.start().monotonic.side_effect = lambda: self.now
+
+    def rssi(self, block, **stations):
+        """Replace the row of block with the mov_rssi of the stations."""
+
+        self.matrix.replace(block, [(addr, (0, 0, 0, 0, value))
+                                    for addr, value in stations.items()])
+
+    def test_hysteresis(self):
+        """Only improvements of at least hysteresis dB move an LVAP."""
+
+        near = LVAP('s1', 'b1')
+        far = LVAP('s2', 'b1')
+        new = LVAP('s3')
+
+        self.rssi('b1', s1=-60, s2=-60, s3=-70)
+        self.rssi('b2', s1=-58, s2=-57)
+
+        self.assertEqual(self.engine.run([near, far, new]), 2)
+        self.assertEqual(near.blocks, ['b1'])
+        self.assertEqual(far.blocks, ['b2'])
+        self.assertEqual(new.blocks, ['b1'])
+        self.assertEqual(self.engine.suppressed, 1)
+
+        # the best block is already the current one: nothing to do
+        self.assertEqual(self.engine.decide([far, new]), [])
+
+    def test_dwell(self):
+        """An LVAP is not moved again before the dwell time is over."""
+
+        lvap = LVAP('s1', 'b1')
+
+        self.rssi('b1', s1=-60)
+        self.rssi('b2', s1=-50)
+
+        self.assertEqual(self.engine.run([lvap]), 1)
+        self.assertEqual(lvap.blocks, ['b2'])
+
+        self.rssi('b1', s1=-40)
+        self.now += 5
+
+        self.assertEqual(self.engine.run([lvap]), 0)
+        self.assertEqual(lvap.blocks, ['b2'])
+        self.assertEqual(self.engine.suppressed, 1)
+
+        self.now += 5
+
+        self.assertEqual(self.engine.run([lvap]), 1)
+        self.assertEqual(lvap.blocks, ['b1'])
+        self.assertEqual(self.engine.to_dict()['handovers'], 2)
+
+    def test_candidates(self):
+        """Only the candidate blocks are considered, pending LVAPs wait."""
+
+        first = LVAP('s1', 'b1')
+        second = LVAP('s2', 'b1')
+        second.pending = True
+
+        self.rssi('b1', s1=-70, s2=-70)
+        self.rssi('b2', s1=-40, s2=-40)
+        self.rssi('b3', s1=-50)
+
+        self.assertEqual(self.engine.decide([first, second], ['b1', 'b3']),
+                         [(first, 'b3')])
+        self.assertEqual(self.engine.decide([first, second]),
+                         [(first, 'b2')])
+
+    def test_failure(self):
+        """A rejected handover is not counted and does not start dwell."""
+
+        lvap = LVAP('s1', 'b1')
+
+        self.rssi('b1', s1=-60)
+        self.rssi('broken', s1=-50)
+
+        self.assertEqual(self.engine.run([lvap]), 0)
+        self.assertEqual(self.engine.handovers, 0)
+
+        self.rssi('b2', s1=-40)
+
+        self.assertEqual(self.engine.run([lvap]), 1)
+        self.assertEqual(lvap.blocks, ['b2'])
+
+    def test_settings(self):
+        """Negative hysteresis and dwell times are rejected."""
+
+        with self.assertRaises(ValueError):
+            self.engine.hysteresis = -1
+
+        with self.assertRaises(ValueError):
+            self.engine.dwell = -1
+
+        self.engine.hysteresis = "1.5"
+        self.assertEqual(self.engine.to_dict()['hysteresis'], 1.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2016 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Module history tests."""
+
+import unittest
+
+from empower.core.history import History
+
+
+class TestHistory(unittest.TestCase):
+    """History tests."""
+
+    def filled(self, depth, count):
+        """Return a history with samples 0..count-1 at times 10*i."""
+
+        history = History(depth)
+
+        for index in range(count):
+            history.append(10.0 * index, index)
+
+        return history
+
+    def test_window(self):
+        """The window returns the last samples, oldest first."""
+
+        history = self.filled(4, 6)
+
+        self.assertEqual(len(history), 4)
+        self.assertEqual(history.window(), ([20.0, 30.0, 40.0, 50.0],
+                                            [2, 3, 4, 5]))
+        self.assertEqual(history.window(2), ([40.0, 50.0], [4, 5]))
+        self.assertEqual(history.window(10)[1], [2, 3, 4, 5])
+        self.assertEqual(history.window(0), ([], []))
+
+    def test_empty(self):
+        """Queries on an empty history return None."""
+
+        history = History(3)
+
+        self.assertIsNone(history.mean())
+        self.assertIsNone(history.ewma(0.5))
+        self.assertIsNone(history.percentile(50))
+        self.assertIsNone(history.rate())
+
+        history = self.filled(3, 3)
+        history.clear()
+
+        self.assertEqual(len(history), 0)
+        self.assertEqual(history.window(), ([], []))
+
+    def test_scalar(self):
+        """Queries over scalar samples."""
+
+        history = self.filled(5, 5)
+
+        self.assertEqual(history.mean(), 2.0)
+        self.assertEqual(history.mean(2), 3.5)
+        self.assertEqual(history.percentile(50), 2)
+        self.assertEqual(history.percentile(90), 3.6)
+        self.assertEqual(history.percentile(100), 4)
+        self.assertEqual(history.ewma(1.0), 4)
+        self.assertEqual(history.ewma(0.5, 3), 3.25)
+        self.assertEqual(history.rate(), 0.1)
+
+    def test_lists(self):
+        """Queries over list samples are element-wise."""
+
+        history = History(3)
+        history.append(0.0, [1, 10])
+        history.append(2.0, [3, 30])
+
+        self.assertEqual(history.mean(), [2.0, 20.0])
+        self.assertEqual(history.rate(), [1.0, 10.0])
+
+    def test_dicts(self):
+        """Dictionary entries are computed where they are present."""
+
+        history = History(3)
+        history.append(0.0, {'a': 1, 'b': 5})
+        history.append(1.0, {'a': 3})
+        history.append(2.0, {'a': 5, 'c': 7})
+
+        self.assertEqual(history.mean(), {'a': 3.0, 'b': 5.0, 'c': 7.0})
+        self.assertEqual(history.rate(), {'a': 2.0, 'b': None, 'c': None})
+
+    def test_invalid(self):
+        """Invalid parameters are rejected."""
+
+        self.assertRaises(ValueError, History, 0)
+        self.assertRaises(ValueError, History(2).ewma, 0)
+        self.assertRaises(ValueError, History(2).percentile, 101)
+
+    def test_to_dict(self):
+        """Samples are serialized in columnar form."""
+
+        history = History(2)
+        history.append(1.0, {1: 2})
+
+        self.assertEqual(history.to_dict(), {'depth': 2,
+                                             'timestamps': [1.0],
+                                             'values': [{'1': 2}]})
+
+
+if __name__ == '__main__':
+    unittest.main()
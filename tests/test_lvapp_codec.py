@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2016 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Differential tests of the LVAPP codec against the construct messages."""
+
+import re
+import random
+import unittest
+
+from construct import Container
+
+import empower.lvapp as lvapp
+
+from empower.lvapp import codec
+
+# the messages with both a construct definition and a codec
+MESSAGES = ['HELLO', 'PROBE_REQUEST', 'PROBE_RESPONSE', 'AUTH_REQUEST',
+            'AUTH_RESPONSE', 'ASSOC_REQUEST', 'ASSOC_RESPONSE', 'ADD_LVAP',
+            'DEL_LVAP', 'STATUS_LVAP', 'CAPS_RESPONSE', 'CAPS_REQUEST',
+            'LVAP_STATUS_REQUEST', 'VAP_STATUS_REQUEST',
+            'PORT_STATUS_REQUEST', 'SET_PORT', 'STATUS_PORT', 'ADD_VAP',
+            'DEL_VAP', 'STATUS_VAP', 'ADD_DEL_LVAP_RESPONSE']
+
+# number of random messages per message type
+ROUNDS = 200
+
+
+def random_value(rnd, fmt):
+    """Return a random value for a struct format."""
+
+    if isinstance(fmt, codec.Flags):
+        return Container(**{name: rnd.randint(0, 1)
+                            for name, _ in fmt.bits})
+
+    if fmt.endswith('s'):
+        return bytes(rnd.getrandbits(8) for _ in range(int(fmt[:-1])))
+
+    return rnd.getrandbits(8 * codec.struct.calcsize("!" + fmt))
+
+
+def random_message(rnd, message):
+    """Return a random Container for a codec, with a consistent length."""
+
+    fields = {name: random_value(rnd, fmt) for name, fmt in message.fields}
+    fields['version'] = lvapp.PT_VERSION
+
+    for tail in message.tail:
+
+        if isinstance(tail, codec.Raw):
+            fields[tail.name] = random_value(rnd, "%us" % rnd.randint(0, 32))
+
+        elif isinstance(tail, codec.SSIDs):
+            ssids = [random_value(rnd, "%us" % rnd.randint(0, 32))
+                     for _ in range(rnd.randint(1, tail.maxcount))]
+            fields[tail.name] = [Container(length=len(x), ssid=x)
+                                 for x in ssids]
+
+        elif isinstance(tail, codec.Array):
+            record = re.findall(r'\d*[a-zA-Z]', tail.record.format[1:])
+            count = rnd.randint(0, 8)
+            fields[tail.count] = count
+            if tail.flat:
+                fields[tail.name] = [random_value(rnd, record[0])
+                                     for _ in range(count)]
+            else:
+                fields[tail.name] = [[random_value(rnd, x) for x in record]
+                                     for _ in range(count)]
+
+    container = Container(**fields)
+    container.length = len(message.build(container))
+
+    return container
+
+
+def normalize(value):
+    """Turn Containers, Messages and tuples into dicts and lists."""
+
+    if isinstance(value, Container):
+        return {k: normalize(v) for k, v in value.items()}
+
+    if isinstance(value, codec.Message):
+        return {k: normalize(v) for k, v in value.__dict__.items()}
+
+    if isinstance(value, (list, tuple)):
+        return [normalize(x) for x in value]
+
+    return value
+
+
+class TestLVAPPCodec(unittest.TestCase):
+    """The codecs must match the construct definitions byte for byte."""
+
+    def test_names(self):
+        """Each codec keeps the name of its construct definition."""
+
+        for name in MESSAGES:
+            self.assertEqual(getattr(lvapp, name).name,
+                             getattr(codec, name).name)
+
+    def test_header(self):
+        """The header codec parses the fixed header of any message."""
+
+        data = lvapp.CAPS_REQUEST.build(Container(version=0, type=0x16,
+                                                  length=10, seq=7))
+
+        header = codec.HEADER.parse(data)
+
+        self.assertEqual((header.version, header.type, header.length),
+                         (0, 0x16, 10))
+
+    def test_round_trip(self):
+        """Random messages build and parse the same with both codecs."""
+
+        rnd = random.Random(0)
+
+        for name in MESSAGES:
+
+            reference = getattr(lvapp, name)
+            message = getattr(codec, name)
+
+            for _ in range(ROUNDS):
+
+                container = random_message(rnd, message)
+                data = reference.build(container)
+
+                self.assertEqual(message.build(container), data, name)
+
+                parsed = message.parse(data)
+
+                self.assertEqual(normalize(parsed),
+                                 normalize(reference.parse(data)), name)
+                self.assertEqual(message.build(parsed), data, name)
+
+    def test_truncated(self):
+        """Truncated tails are rejected."""
+
+        rnd = random.Random(1)
+
+        container = random_message(rnd, codec.CAPS_RESPONSE)
+        container.nb_ports_elements = 1
+        container.ports = [[b'\x00' * 6, 1, b'\x00' * 10]]
+        container.length = len(codec.CAPS_RESPONSE.build(container))
+
+        data = codec.CAPS_RESPONSE.build(container)
+
+        self.assertRaises(ValueError, codec.CAPS_RESPONSE.parse, data[:-1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2016 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Streaming subscriptions tests."""
+
+import json
+import unittest
+
+from unittest import mock
+
+from tornado.concurrent import Future
+from tornado.ioloop import IOLoop
+
+from empower.core.streams import StreamHub
+from empower.core.streams import StreamSubscriber
+from empower.core.streams import module_topic
+from empower.core.streams import event_topic
+
+
+class Transport:
+    """A transport recording the messages it is asked to send."""
+
+    def __init__(self, future=False):
+        self.messages = []
+        self.futures = []
+        self.future = future
+        self.closed = False
+
+    def send(self, seq, message):
+        self.messages.append(json.loads(message))
+        if not self.future:
+            return None
+        future = Future()
+        self.futures.append(future)
+        return future
+
+    def close(self):
+        self.closed = True
+
+    def data(self):
+        """Return the data of the messages sent, resets excluded."""
+
+        return [x['data'] for x in self.messages if x['type'] != 'reset']
+
+
+class Module:
+    """A module publishing its state."""
+
+    def __init__(self, module_type, module_id, tenant_id=None):
+        self.module_type = module_type
+        self.module_id = module_id
+        self.tenant_id = tenant_id
+        self.value = None
+
+    def snapshot_json(self):
+        return json.dumps({'id': self.module_id, 'value': self.value})
+
+
+class TestStreams(unittest.TestCase):
+    """Streaming subscriptions tests."""
+
+    def setUp(self):
+
+        self.ioloop = IOLoop()
+        self.ioloop.make_current()
+        self.hub = StreamHub()
+
+    def tearDown(self):
+
+        IOLoop.clear_current()
+        self.ioloop.close(all_fds=True)
+
+    def run_for(self, seconds):
+        """Run the IOLoop for a while."""
+
+        self.ioloop.call_later(seconds, self.ioloop.stop)
+        self.ioloop.start()
+
+    def subscribe(self, topics, since=None, **kwargs):
+        """Return the transport of a new subscriber."""
+
+        transport = Transport(kwargs.pop('future', False))
+        subscriber = StreamSubscriber(transport, topics, **kwargs)
+        self.hub.subscribe(subscriber, since)
+
+        return transport
+
+    def update(self, module, value):
+        """Publish a new module state."""
+
+        module.value = value
+        self.hub.publish_module(module)
+
+    def test_events_not_coalesced(self):
+        """Events over the rate are delayed, never dropped."""
+
+        transport = self.subscribe({event_topic('lvapjoin')}, rate=100)
+
+        for index in range(150):
+            self.hub.publish_event('lvapjoin', {'sta': index})
+
+        self.assertEqual(len(transport.messages), 100)
+
+        self.run_for(0.8)
+
+        self.assertEqual([x['sta'] for x in transport.data()],
+                         list(range(150)))
+
+    def test_modules_coalesced(self):
+        """Over the rate only the latest update of each module is kept."""
+
+        transport = self.subscribe({module_topic('lvap_stats')}, rate=10)
+
+        first, second, other = Module('lvap_stats', 1), \
+            Module('lvap_stats', 2), Module('lvap_stats', 3)
+
+        for value in range(10):
+            self.update(other, value)
+
+        for value in range(3):
+            self.update(first, value)
+            self.update(second, value)
+
+        self.assertEqual(len(transport.messages), 10)
+
+        self.run_for(0.5)
+
+        self.assertEqual(transport.data()[10:],
+                         [{'id': 1, 'value': 2}, {'id': 2, 'value': 2}])
+        self.assertEqual(self.hub.subscribers[0].coalesced, 4)
+
+    def test_topics_and_tenants(self):
+        """Only the subscribed modules of the subscribed tenant are sent."""
+
+        transport = self.subscribe({module_topic('maps', 1)}, tenant_id='t1')
+
+        self.update(Module('maps', 1, 't1'), 'a')
+        self.update(Module('maps', 2, 't1'), 'b')
+        self.update(Module('maps', 1, 't2'), 'c')
+        self.update(Module('busyness', 1, 't1'), 'd')
+
+        self.assertEqual(transport.data(), [{'id': 1, 'value': 'a'}])
+
+    def test_resume(self):
+        """Resuming replays the messages after since, regardless of rate."""
+
+        topics = {event_topic('lvapjoin')}
+        self.subscribe(topics)
+
+        for index in range(10):
+            self.hub.publish_event('lvapjoin', {'sta': index})
+
+        transport = self.subscribe(topics, since=4, rate=1)
+
+        self.assertEqual([x['seq'] for x in transport.messages],
+                         list(range(5, 11)))
+
+        transport = self.subscribe(topics, since=10)
+        self.assertEqual(transport.messages, [])
+
+    def test_resume_expired(self):
+        """Resuming from an expired message sends a reset first."""
+
+        with mock.patch('empower.core.streams.BACKLOG', 4):
+            self.hub = StreamHub()
+
+        topics = {event_topic('lvapjoin')}
+        self.subscribe(topics)
+
+        for index in range(10):
+            self.hub.publish_event('lvapjoin', {'sta': index})
+
+        transport = self.subscribe(topics, since=2)
+
+        self.assertEqual(transport.messages[0]['type'], 'reset')
+        self.assertEqual(transport.messages[0]['first'], 7)
+        self.assertEqual([x['seq'] for x in transport.messages[1:]],
+                         [7, 8, 9, 10])
+
+        # a sequence number from the future, e.g. before a restart
+        transport = self.subscribe(topics, since=100)
+        self.assertEqual([x['type'] for x in transport.messages], ['reset'])
+
+    def test_resume_too_large(self):
+        """A replay that cannot be written in full is replaced by a reset."""
+
+        topics = {event_topic('lvapjoin')}
+        self.subscribe(topics)
+
+        for index in range(10):
+            self.hub.publish_event('lvapjoin', {'sta': index})
+
+        with mock.patch('empower.core.streams.MAX_INFLIGHT', 5):
+            transport = self.subscribe(topics, since=0, future=True)
+
+        self.assertEqual([x['type'] for x in transport.messages], ['reset'])
+
+    def test_slow_consumer(self):
+        """Subscribers with too many pending messages are disconnected."""
+
+        transport = self.subscribe({event_topic('lvapjoin')}, rate=1)
+
+        with mock.patch('empower.core.streams.MAX_PENDING', 5):
+            for index in range(10):
+                self.hub.publish_event('lvapjoin', {'sta': index})
+
+        self.assertTrue(transport.closed)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2016 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Timer wheel tests."""
+
+import unittest
+
+from tornado.ioloop import IOLoop
+
+from empower.core.timerwheel import TimerWheel
+from empower.core.timerwheel import LEVEL_SIZE
+
+
+class TestTimerWheel(unittest.TestCase):
+    """Timer wheel tests (one tick is one ms)."""
+
+    def setUp(self):
+
+        self.wheel = TimerWheel(tick=1)
+        self.fired = []
+
+    def add(self, name, every, key=None):
+        """Add a timer recording its fire ticks."""
+
+        def callback():
+            self.fired.append((self.wheel.now, name))
+
+        return self.wheel.add_timer(callback, every, key or name)
+
+    def step(self, end):
+        """Process the ticks up to end one at a time (no lag)."""
+
+        for target in range(self.wheel.now + 1, end + 1):
+            self.wheel.advance(target)
+
+    def test_order_across_levels(self):
+        """Timers in every level fire at their phase, in time order."""
+
+        # level 0, 1, 2 and 3 periods
+        periods = {'l0': 7,
+                   'l1': LEVEL_SIZE * 3 + 5,
+                   'l2': LEVEL_SIZE ** 2 * 2 + 11,
+                   'l3': LEVEL_SIZE ** 3 + 13}
+
+        timers = {name: self.add(name, every)
+                  for name, every in periods.items()}
+
+        end = periods['l3'] + LEVEL_SIZE
+        self.step(end)
+
+        ticks = [x for x, _ in self.fired]
+        self.assertEqual(ticks, sorted(ticks))
+
+        for name, timer in timers.items():
+            expected = [x for x in range(1, end + 1)
+                        if x % timer.ticks == timer.phase]
+            self.assertEqual([x for x, n in self.fired if n == name],
+                             expected, name)
+
+    def test_phases(self):
+        """Phases are deterministic and spread over the period."""
+
+        timers = [self.add("poller-%u" % x, 100) for x in range(10)]
+        again = [TimerWheel(tick=1).phase("poller-%u" % x, 100)
+                 for x in range(10)]
+
+        self.assertEqual([x.phase for x in timers], again)
+        self.assertGreater(len(set(again)), 5)
+
+        bucket = self.wheel.buckets[100]
+        self.assertEqual(bucket.timers, 10)
+        self.assertEqual(bucket.to_dict()['max_phase_timers'],
+                         max(bucket.phases.values()))
+
+    def test_stop(self):
+        """A stopped timer does not fire and can be restarted."""
+
+        timer = self.add("timer", 10)
+
+        self.step(30)
+        fired = len(self.fired)
+
+        timer.stop()
+        self.step(100)
+
+        self.assertEqual(len(self.fired), fired)
+        self.assertFalse(timer.is_running())
+        self.assertEqual(self.wheel.buckets[10].timers, 0)
+
+        timer.start()
+        self.step(200)
+
+        self.assertGreater(len(self.fired), fired)
+
+    def test_stop_from_callback(self):
+        """A timer stopped by another callback in the same tick is skipped."""
+
+        def stop_other():
+            other.stop()
+
+        self.wheel.add_timer(stop_other, 10, 1)
+        other = self.wheel.add_timer(lambda: self.fired.append(1), 10, 1)
+
+        self.step(100)
+
+        self.assertEqual(self.fired, [])
+
+    def test_missed_periods(self):
+        """Missed periods are skipped when the wheel falls behind."""
+
+        timer = self.add("timer", 10)
+
+        self.wheel.advance(1000)
+
+        self.assertEqual(len(self.fired), 1)
+        self.assertGreater(timer.expires, 1000)
+        self.assertEqual(timer.expires % 10, timer.phase)
+
+    def test_invalid_period(self):
+        """Periods must be positive."""
+
+        self.assertRaises(ValueError, self.wheel.add_timer, print, 0)
+
+    def test_stats(self):
+        """Buckets count fired callbacks and bursts."""
+
+        for x in range(3):
+            self.wheel.add_timer(lambda: None, 50, 7)
+
+        self.step(100)
+
+        stats = self.wheel.to_dict()['buckets']['50']
+
+        self.assertEqual(stats['timers'], 3)
+        self.assertEqual(stats['fired'], 6)
+        self.assertEqual(stats['max_burst'], 3)
+        self.assertEqual(stats['max_phase_timers'], 3)
+
+    def test_idle(self):
+        """The IOLoop callback stops when no timer is left."""
+
+        ioloop = IOLoop()
+        ioloop.make_current()
+
+        try:
+
+            wheel = TimerWheel(tick=5)
+
+            def callback():
+                self.fired.append(wheel.now)
+                if len(self.fired) == 3:
+                    timer.stop()
+
+            timer = wheel.add_timer(callback, 10)
+            self.assertTrue(wheel.is_running())
+
+            ioloop.call_later(0.2, ioloop.stop)
+            ioloop.start()
+
+            self.assertEqual(len(self.fired), 3)
+            self.assertFalse(wheel.is_running())
+
+            # restart from the last tick without catching up
+            now = wheel.now
+            timer.start()
+
+            self.assertTrue(wheel.is_running())
+            self.assertLessEqual(timer.expires, now + timer.ticks)
+
+        finally:
+            IOLoop.clear_current()
+            ioloop.close(all_fds=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2016 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Time-series store tests."""
+
+import os
+import time
+import shutil
+import tempfile
+import threading
+import unittest
+
+from empower.core.tsdb import TimeSeriesStore
+from empower.core.tsdb import flatten
+from empower.core.tsdb import series_name
+
+
+class TestTimeSeriesStore(unittest.TestCase):
+    """TimeSeriesStore tests."""
+
+    def setUp(self):
+
+        self.path = tempfile.mkdtemp()
+        self.now = int(time.time()) // 60 * 60
+        self.store = self.new_store()
+
+    def tearDown(self):
+
+        self.store.close()
+        shutil.rmtree(self.path)
+
+    def new_store(self):
+        """Return a store on the test directory."""
+
+        return TimeSeriesStore(self.path, [(0, 3600), (60, 7200)], 4)
+
+    def write(self, name, samples):
+        """Write the (offset from now, value) samples of name."""
+
+        for offset, value in samples:
+            self.store.append(name, self.now + offset, value)
+
+        self.store.flush()
+
+    def test_raw(self):
+        """Raw samples are returned in [start, end], late ones dropped."""
+
+        self.write("a/b", [(0, 1.0), (1, 2.0), (2, 3.0), (1.5, 9.0),
+                           (3, 4.0), (4, 5.0), (5, 6.0)])
+
+        out = self.store.query("a/b", resolution=0)
+        self.assertEqual(out['values'], [1.0, 2.0, 3.0, 4.0, 5.0, 6.0])
+        self.assertEqual(self.store.dropped, 1)
+
+        out = self.store.query("a/b", self.now + 2, self.now + 4, 0)
+        self.assertEqual(out['timestamps'],
+                         [self.now + 2, self.now + 3, self.now + 4])
+
+    def test_rollup(self):
+        """Roll-ups store the mean, min and max of each bucket."""
+
+        self.write("a/b", [(0, 1.0), (10, 5.0), (20, 3.0),
+                           (60, 10.0), (70, 20.0)])
+
+        out = self.store.query("a/b", resolution=60)
+        self.assertEqual(out['timestamps'], [self.now, self.now + 60])
+        self.assertEqual(out['values'], [3.0, 15.0])
+        self.assertEqual(out['min'], [1.0, 10.0])
+        self.assertEqual(out['max'], [5.0, 20.0])
+
+    def test_partial_bucket(self):
+        """The current bucket is stored and resumed after a restart."""
+
+        self.write("a/b", [(0, 2.0), (10, 4.0)])
+
+        out = self.store.query("a/b", resolution=60)
+        self.assertEqual(out['values'], [3.0])
+
+        self.store.close()
+        self.store = self.new_store()
+
+        self.write("a/b", [(20, 9.0), (30, 1.0)])
+
+        out = self.store.query("a/b", resolution=60)
+        self.assertEqual(out['timestamps'], [self.now])
+        self.assertEqual(out['values'], [4.0])
+        self.assertEqual(out['min'], [1.0])
+        self.assertEqual(out['max'], [9.0])
+
+    def test_expire(self):
+        """Segments older than the retention are removed."""
+
+        self.write("a/b", [(-7200 + x, x) for x in range(8)])
+        self.write("a/b", [(x, 100.0 + x) for x in range(5)])
+
+        self.store.expire()
+
+        # a segment goes when the next one starts before the retention
+        out = self.store.query("a/b", resolution=0)
+        self.assertEqual(out['values'], [4.0, 5.0, 6.0, 7.0, 100.0, 101.0,
+                                         102.0, 103.0, 104.0])
+
+        out = self.store.query("a/b", self.now - 3600, resolution=0)
+        self.assertEqual(out['values'], [100.0, 101.0, 102.0, 103.0, 104.0])
+
+        # the roll-up buckets are still within their retention
+        out = self.store.query("a/b", resolution=60)
+        self.assertEqual(out['values'], [3.5, 102.0])
+
+    def test_open_series(self):
+        """Only the most recently used series keep their segments open."""
+
+        self.store.max_open = 2
+        fds = len(os.listdir("/proc/self/fd"))
+
+        for index in range(10):
+            self.write("s/%u" % index, [(0, index), (1, index)])
+
+        self.assertEqual(self.store.to_dict()['open'], 2)
+        self.assertLessEqual(len(os.listdir("/proc/self/fd")), fds + 8)
+
+        for index in range(10):
+            out = self.store.query("s/%u" % index, resolution=60)
+            self.assertEqual(out['values'], [index])
+
+        self.assertEqual(self.store.names(),
+                         sorted("s/%u" % x for x in range(10)))
+
+    def test_concurrent(self):
+        """Names and queries can be read while a batch is written."""
+
+        self.store.max_open = 4
+        errors = []
+
+        def reader():
+            try:
+                while writer.is_alive():
+                    self.store.names()
+                    self.store.to_dict()
+            except Exception as ex:
+                errors.append(ex)
+
+        def write():
+            for offset in range(20):
+                for index in range(50):
+                    self.store.append("c/%u" % index, self.now + offset, 1.0)
+                self.store.flush()
+
+        writer = threading.Thread(target=write)
+        thread = threading.Thread(target=reader)
+        writer.start()
+        thread.start()
+        writer.join()
+        thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(self.store.names()), 50)
+
+    def test_names(self):
+        """Series names are sanitized and samples flattened."""
+
+        self.assertEqual(series_name("t", "a b", ".."), "t/a_b/_")
+        self.assertEqual(sorted(flatten("x", {'p': [1, 2.5], 'q': "n"})),
+                         [("x/p/0", 1.0), ("x/p/1", 2.5)])
+
+        with self.assertRaises(ValueError):
+            self.store.append("../x", self.now, 1.0)
+
+        with self.assertRaises(KeyError):
+            self.store.query("missing")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2016 Roberto Riggio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied. See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Versioned objects tests."""
+
+import json
+import unittest
+
+from unittest import mock
+
+from empower.core.wtp import WTP
+from empower.core.versioned import Versioned
+from empower.core.versioned import VersionedDict
+from empower.core.versioned import Uncacheable
+from empower.core.versioned import deep_version
+from empower.core.resourcepool import BT_L20
+from empower.core.resourcepool import ResourceBlock
+from empower.datatypes.etheraddress import EtherAddress
+
+
+class Item(Versioned):
+    """A versioned object counting its serializations."""
+
+    def __init__(self, value):
+        self.value = value
+        self.children = []
+        self.calls = 0
+
+    def to_dict(self):
+        object.__setattr__(self, 'calls', self.calls + 1)
+        return {'value': self.value, 'children': self.children}
+
+
+class Table(Versioned):
+    """A versioned object with a versioned dictionary."""
+
+    VERSIONED = ('entries', )
+
+    def __init__(self):
+        self.entries = VersionedDict()
+
+    def to_dict(self):
+        return {'entries': dict(self.entries)}
+
+
+class Poller(Versioned):
+    """A versioned object copying the serialized form of a block."""
+
+    VERSIONED = ('block', )
+
+    def __init__(self, block):
+        self.block = block
+
+    def to_dict(self):
+        return {'block': self.block.to_dict()}
+
+
+class Plain:
+    """An unversioned serializable object."""
+
+    def __init__(self, value):
+        self.value = value
+
+    def to_dict(self):
+        return {'value': self.value}
+
+
+class TestVersioned(unittest.TestCase):
+    """Versioned objects tests."""
+
+    def test_versioned_dict(self):
+        """Every change bumps the version."""
+
+        entries = VersionedDict(a=1)
+        versions = [entries.version]
+
+        for change in (lambda: entries.__setitem__('b', 2),
+                       lambda: entries.update(c=3),
+                       lambda: entries.pop('a'),
+                       lambda: entries.setdefault('d', 4),
+                       lambda: entries.__delitem__('b'),
+                       entries.popitem,
+                       entries.touch,
+                       entries.clear):
+            change()
+            versions.append(entries.version)
+
+        self.assertEqual(versions, sorted(set(versions)))
+        self.assertEqual(entries, {})
+
+    def test_snapshot(self):
+        """The snapshot is computed once per version."""
+
+        item = Item(1)
+
+        first = item.snapshot()
+        self.assertIs(item.snapshot(), first)
+        self.assertEqual(item.calls, 1)
+
+        item.value = 2
+        self.assertEqual(item.snapshot()['value'], 2)
+        self.assertEqual(item.calls, 2)
+
+        # in place changes need touch()
+        item.children.append(3)
+        self.assertIs(item.snapshot()['children'], item.children)
+        self.assertEqual(item.calls, 2)
+        item.touch()
+        item.snapshot()
+        self.assertEqual(item.calls, 3)
+
+    def test_versioned_attributes(self):
+        """Changes to VERSIONED attributes change the object version."""
+
+        table = Table()
+        version = table.version
+
+        table.entries['a'] = 1
+
+        self.assertNotEqual(table.version, version)
+        self.assertEqual(table.snapshot(), {'entries': {'a': 1}})
+
+    def test_json(self):
+        """The JSON document is cached until a nested object changes."""
+
+        parent, child = Item(1), Item(2)
+        parent.children.append(child)
+        parent.touch()
+
+        first = parent.snapshot_json()
+
+        self.assertIs(parent.snapshot_json(), first)
+        self.assertEqual(json.loads(first)['children'][0]['value'], 2)
+
+        child.value = 3
+
+        second = parent.snapshot_json()
+
+        self.assertIsNot(second, first)
+        self.assertEqual(json.loads(second)['children'][0]['value'], 3)
+
+    def test_embedded(self):
+        """Copies of VERSIONED objects follow their nested changes."""
+
+        wtp = WTP(EtherAddress("00:0D:B9:2F:56:64"), "wtp")
+        wtp.connection = mock.Mock()
+        block = ResourceBlock(wtp, EtherAddress("04:F0:21:09:F9:9E"), 36,
+                              BT_L20)
+        poller = Poller(block)
+
+        self.assertIsNone(Poller(None).version[1])
+
+        documents = [poller.snapshot_json()]
+        self.assertIs(poller.snapshot_json(), documents[0])
+
+        for change in (lambda: setattr(block, 'busyness', 10),
+                       lambda: block.ucqm.__setitem__('s1', {'mov_rssi': -50}),
+                       lambda: block.tx_policies['s1'],
+                       lambda: setattr(block.tx_policies['s1'], 'no_ack',
+                                       True)):
+            change()
+            documents.append(poller.snapshot_json())
+
+        self.assertEqual(len(set(documents)), len(documents))
+
+        last = json.loads(documents[-1])['block']
+        self.assertEqual(last['busyness'], 10)
+        self.assertEqual(last['ucqm']['s1']['mov_rssi'], -50)
+        self.assertTrue(last['tx_policies']['s1']['no_ack'])
+
+    def test_uncacheable(self):
+        """Unversioned nested objects disable the JSON cache."""
+
+        item = Item(1)
+        plain = Plain(2)
+        item.children.append(plain)
+        item.touch()
+
+        self.assertRaises(Uncacheable, deep_version, item)
+
+        first = item.snapshot_json()
+        plain.value = 3
+
+        self.assertEqual(json.loads(item.snapshot_json())['children'],
+                         [{'value': 3}])
+        self.assertIsNot(item.snapshot_json(), first)
+
+    def test_cycles(self):
+        """deep_version visits each object once."""
+
+        first, second = Item(1), Item(2)
+        first.children.append(second)
+        second.children.append(first)
+
+        versions = deep_version(first)
+
+        self.assertEqual(dict(versions), {id(first): first.version,
+                                          id(second): second.version})
+
+
+if __name__ == '__main__':
+    unittest.main()